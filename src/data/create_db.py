@@ -3,6 +3,7 @@ Code from COMP0035
 Contains functions to create the paralympics database without data.
 """
 import sqlite3
+from importlib import resources
 
 from paralympics import add_data
 
@@ -34,6 +35,8 @@ def create_db(cursor, connection):
                     host_id INTEGER PRIMARY KEY,
                     country_code TEXT NOT NULL,
                     host TEXT NOT NULL,
+                    latitude REAL,
+                    longitude REAL,
                     FOREIGN KEY (country_code) REFERENCES country(code) ON DELETE CASCADE ON UPDATE CASCADE)'''
 
     event_sql = '''CREATE TABLE event (
@@ -158,6 +161,12 @@ def create_db(cursor, connection):
         cursor.execute(student_response_sql)
         cursor.execute(medal_result_sql)
 
+        # Create the indexes for the lookup and join columns, and the unique indexes
+        indexes_sql = resources.files('data').joinpath('paralympics_indexes.sql').read_text()
+        for index_sql in indexes_sql.split(';'):
+            if index_sql.strip():
+                cursor.execute(index_sql)
+
         # Commit the changes
         connection.commit()
 
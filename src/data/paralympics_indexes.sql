@@ -0,0 +1,17 @@
+-- Indexes for the columns used in lookups and joins, and unique indexes for the values the apps assume are unique.
+-- These match the indexes defined in paralympics/models.py and can be run again on an existing database.
+CREATE UNIQUE INDEX IF NOT EXISTS ix_country_name ON country (name);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_disability_category ON disability (category);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_event_year_type ON event (year, type);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_quiz_quiz_name ON quiz (quiz_name);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_host_host ON host (host);
+CREATE INDEX IF NOT EXISTS ix_host_country_code ON host (country_code);
+CREATE INDEX IF NOT EXISTS ix_disability_event_disability_id ON disability_event (disability_id);
+CREATE INDEX IF NOT EXISTS ix_medal_result_event_id ON medal_result (event_id);
+CREATE INDEX IF NOT EXISTS ix_medal_result_country_code ON medal_result (country_code);
+CREATE INDEX IF NOT EXISTS ix_participants_event_id ON participants (event_id);
+CREATE INDEX IF NOT EXISTS ix_question_event_id ON question (event_id);
+CREATE INDEX IF NOT EXISTS ix_student_response_quiz_id ON student_response (quiz_id);
+CREATE INDEX IF NOT EXISTS ix_answer_choice_question_id ON answer_choice (question_id);
+CREATE INDEX IF NOT EXISTS ix_host_event_event_id ON host_event (event_id);
+CREATE INDEX IF NOT EXISTS ix_quiz_question_question_id ON quiz_question (question_id);
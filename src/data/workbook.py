@@ -0,0 +1,80 @@
+"""
+Reads the sheets in paralympics.xlsx.
+
+Parsing the workbook with openpyxl is slow, so the first read parses every sheet once and saves the DataFrames to a
+pickle file in the same directory. The cache file name includes a hash of the xlsx file, so when the workbook changes
+the hash no longer matches, the workbook is parsed again and the old cache file is replaced.
+"""
+import hashlib
+import os
+import tempfile
+from importlib import resources
+from pathlib import Path
+
+import pandas as pd
+
+
+def workbook_path():
+    """Return the path to the paralympics.xlsx file in the data package."""
+    return Path(str(resources.files("data").joinpath("paralympics.xlsx")))
+
+
+def latlon_path():
+    """Return the path to the latlon.csv file of host city coordinates in the data package."""
+    return Path(str(resources.files("data").joinpath("latlon.csv")))
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of the contents of a file."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def cache_path(path, digest):
+    """Return the path of the cache file for a workbook with the given hash."""
+    path = Path(path)
+    return path.with_name(f'{path.stem}.{digest[:16]}.cache.pkl')
+
+
+def read_workbook(path=None):
+    """Return all the sheets in the workbook as a dict of sheet name to DataFrame.
+
+    Parameters:
+    path (str or Path): the xlsx file, defaults to data/paralympics.xlsx
+
+    Returns:
+    sheets (dict): sheet name mapped to a DataFrame
+    """
+    path = Path(path) if path else workbook_path()
+    cache = cache_path(path, file_hash(path))
+    if cache.exists():
+        try:
+            return pd.read_pickle(cache)
+        except Exception as e:
+            print(f'Could not read the cache file {cache.name}, the workbook will be parsed again. Error: {e}')
+
+    # Parse every sheet in one pass of the workbook
+    sheets = pd.read_excel(path, sheet_name=None)
+
+    # Remove cache files for older versions of the workbook, then write the new one to a temporary file and rename it
+    # so that another process never reads a partly written cache file
+    try:
+        for old in path.parent.glob(f'{path.stem}.*.cache.pkl'):
+            if old != cache:
+                old.unlink(missing_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pd.to_pickle(sheets, f)
+        os.replace(tmp, cache)
+    except OSError as e:
+        # The data directory may be read-only, in which case the workbook is parsed each time
+        print(f'Could not write the cache file {cache.name}. Error: {e}')
+    return sheets
+
+
+def read_sheet(sheet_name, path=None):
+    """Return a single sheet from the workbook as a DataFrame."""
+    return read_workbook(path)[sheet_name]
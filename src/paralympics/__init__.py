@@ -4,6 +4,8 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 
+from paralympics.read_engine import ReadRoutingSession
+
 
 # Create a SQLAlchemy declarative base object called Base to be used in the models (Python classes)
 class Base(DeclarativeBase):
@@ -11,7 +13,8 @@ class Base(DeclarativeBase):
 
 
 # Create a SQLAlchemy object called db, the Base object is passed to the SQLAlchemy object
-db = SQLAlchemy(model_class=Base)
+# The session class uses the read-only engine for GET requests if SQLALCHEMY_READ_ONLY_ENGINE is set, see read_engine.py
+db = SQLAlchemy(model_class=Base, session_options={'class_': ReadRoutingSession})
 
 
 def create_app(test_config=None):
@@ -23,7 +26,32 @@ def create_app(test_config=None):
         SECRET_KEY='dev',
         # Set the location of the database file called paralympics.db which will be in the app's instance folder
         SQLALCHEMY_DATABASE_URI="sqlite:///" + os.path.join(app.instance_path, 'paralympics.db'),
-        SQLALCHEMY_ECHO=False
+        SQLALCHEMY_ECHO=False,
+        # Path to a prebuilt, already seeded SQLite database. If set, the database is created by copying this file
+        # and the tables are not created or seeded when the app starts, see snapshot.py
+        DATABASE_SNAPSHOT=None,
+        # The Hacker News API used by the /news page, the number of stories and the timeout in seconds for each call
+        NEWS_API_URL="https://hacker-news.firebaseio.com/v0",
+        NEWS_STORY_COUNT=3,
+        NEWS_TIMEOUT=5,
+        # Seconds that the news stories are cached for, and the circuit breaker settings for the Hacker News API
+        NEWS_CACHE_TTL=300,
+        NEWS_BREAKER_FAILURES=3,
+        NEWS_BREAKER_RESET=60,
+        # The maximum size of the cache of rendered pages, see fragment_cache.py
+        FRAGMENT_CACHE_MAX_BYTES=4 * 1024 * 1024,
+        # SQLite connection settings, 'default' or 'production', see sqlite_profile.py
+        SQLITE_PROFILE='default',
+        SQLITE_PRAGMAS=None,
+        # Use a second, read-only engine for GET requests, see read_engine.py
+        SQLALCHEMY_READ_ONLY_ENGINE=False,
+        SQLALCHEMY_READ_ONLY_IMMUTABLE=False,
+        # The most student responses written in one transaction, and the most time in milliseconds that a response
+        # waits for others to join its transaction, see response_writer.py
+        RESPONSE_BATCH_SIZE=500,
+        RESPONSE_BATCH_WAIT_MS=1,
+        # Seconds that a request submitting a response waits for it to be written
+        RESPONSE_SUBMIT_TIMEOUT=10
     )
 
     if test_config:
@@ -36,29 +64,106 @@ def create_app(test_config=None):
     except OSError:
         pass
 
+    # If there is a database snapshot, create the database by copying it
+    snapshot = app.config['DATABASE_SNAPSHOT']
+    if snapshot:
+        from paralympics.snapshot import clone_database, database_path
+        clone_database(snapshot, database_path(app.config['SQLALCHEMY_DATABASE_URI'], app.instance_path))
+
     # Initialise the database
     # Make sure you already defined SQLALCHEMY_DATABASE_URI in the app.config
     db.init_app(app)
 
     with app.app_context():
+        # Apply the SQLite connection settings before any connections are opened
+        from paralympics import sqlite_profile
+        sqlite_profile.init_app(app, db.engine)
+
         # Optionally, create the database tables
         # This will only work once the models are defined
 
         # This imports the models
         from paralympics import models
-        # If the database file does not exist, it will be created
-        # If the tables do not exist, they will be created but does not overwrite or update existing tables
-        db.create_all()
 
-        # Import and use the function to add the data to the database only if it is empty
-        # If query of the Events returns None, then the database is assumed empty
-        if db.session.execute(db.select(models.Event).limit(1)).first() is None:
-            from paralympics.add_data import add_all_data
-            add_all_data()
+        # Read the version of each table so that cached results are replaced after the data changes
+        from paralympics import data_version
+        data_version.init_app(app, db.engine)
+
+        # The tables and data are already in a database cloned from a snapshot
+        if not snapshot:
+            # If the database file does not exist, it will be created
+            # If the tables do not exist, they will be created but does not overwrite or update existing tables
+            db.create_all()
+
+            # Add any columns and indexes that are missing from a database that was created by an earlier version of
+            # the models
+            from paralympics.migrate import create_missing_columns, create_missing_indexes
+            added_columns = create_missing_columns()
+            create_missing_indexes()
+
+            # Create the full-text search table and the triggers that keep it up to date, see search.py
+            from paralympics.search import create_search_index
+            create_search_index(db.engine)
+
+            # Import and use the function to add the data to the database only if it is empty
+            # If query of the Events returns None, then the database is assumed empty
+            if db.session.execute(db.select(models.Event).limit(1)).first() is None:
+                from paralympics.add_data import add_all_data
+                add_all_data()
+            elif 'host.latitude' in added_columns:
+                # The host coordinates columns have just been added to an existing database
+                from paralympics.add_data import load_host_coordinates
+                load_host_coordinates()
+
+        # Create the table of data versions and the triggers that update it when a table is written, see
+        # data_version.py, this is also needed for a database cloned from a snapshot that was built without them
+        with db.engine.begin() as conn:
+            data_version.create_version_table(conn.exec_driver_sql)
+
+        # Create the read-only engine if it is enabled, once the database has been created
+        from paralympics import read_engine
+        read_engine.init_app(app)
+
+        # Build the spatial index of the host cities, see geo.py
+        from paralympics import geo
+        geo.init_app(app)
+
+        # Create the queue and writer thread for student responses
+        from paralympics import response_writer
+        response_writer.init_app(app, db.engine)
 
         # Register the blueprint
         from paralympics.paralympics import main
         app.register_blueprint(main)
 
+    # Create the cache for rendered pages
+    from paralympics import fragment_cache
+    fragment_cache.init_app(app)
+
+    # Create the cache of the line charts
+    from paralympics import figures
+    figures.init_app(app)
+
+    # Create the cache of the teams for the prediction form
+    from paralympics import team_choices
+    team_choices.init_app(app)
+
+    # Create the cache for the news stories
+    from paralympics.news import NewsCache
+    app.extensions['news_cache'] = NewsCache(app.config['NEWS_BREAKER_FAILURES'], app.config['NEWS_BREAKER_RESET'])
+
+    # Register the commands to save a database snapshot, add missing indexes, import quiz questions, rebuild the
+    # quiz summaries and export the medal results
+    from paralympics.export import export_medals_command
+    from paralympics.migrate import migrate_indexes_command
+    from paralympics.quiz_import import import_questions_command
+    from paralympics.quiz_summary import rebuild_quiz_summaries_command
+    from paralympics.snapshot import build_snapshot_command
+    app.cli.add_command(build_snapshot_command)
+    app.cli.add_command(migrate_indexes_command)
+    app.cli.add_command(import_questions_command)
+    app.cli.add_command(rebuild_quiz_summaries_command)
+    app.cli.add_command(export_medals_command)
+
     # return the app
     return app
@@ -2,205 +2,340 @@
 Code from COMP0035
 Contains functions to add data to the paralympics database.
 Uses the SQLAlchemy object, db.
+
+Each function converts a DataFrame into a list of row values and inserts them using a single SQLAlchemy Core
+insert() executemany in one transaction per table, rather than adding one ORM object at a time.
 """
-from importlib import resources
+import time
+from collections import Counter
 
 import pandas as pd
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import func
 
+from data.workbook import latlon_path, read_workbook
 from paralympics import db
 from paralympics.models import Country, Disability, DisabilityEvent, Event, Host, HostEvent, MedalResult, \
     Participants
 
 
-def add_country_data(df):
+def df_to_rows(df, columns):
+    """Convert the columns of a DataFrame to a list of dicts of native Python values for an executemany insert.
+
+    Parameters:
+    df (DataFrame): the source data
+    columns (dict): maps each table column name to the DataFrame column name
+
+    Returns:
+    rows (list): one dict per DataFrame row, with NaN replaced by None
+    """
+    data = df[list(columns.values())].astype(object)
+    data = data.where(data.notna(), None)
+    data.columns = list(columns.keys())
+    return data.to_dict(orient='records')
+
+
+def bulk_insert(model, rows):
+    """Insert a list of row dicts into the table for a model using a single Core insert() executemany.
+
+    The caller is responsible for committing the transaction.
+    """
+    if rows:
+        db.session.execute(db.insert(model.__table__), rows)
+    return len(rows)
+
+
+class KeyResolver:
+    """Resolves the natural keys used in paralympics.xlsx to the keys in the database.
+
+    Each index is a dict that is built with a single query the first time it is used, and is then shared by all the
+    data addition functions instead of running a SELECT for each row. Keys that cannot be resolved are recorded in
+    `unresolved` as (table, index, key) so they can be reported rather than silently skipped.
+
+    Indexes:
+    country: country name -> country code
+    event: (year, type) -> event_id
+    host: host name -> host_id
+    disability: category -> disability_id
+    host_event: (year, host name) -> event_id
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self.unresolved = []
+
+    def refresh(self, *names):
+        """Discard the named indexes (or all indexes) so they are rebuilt after new rows have been inserted."""
+        for name in names or list(self._indexes):
+            self._indexes.pop(name, None)
+
+    def resolve(self, name, key, table):
+        """Return the database key for the natural key from the named index, or None if it is not found.
+
+        Parameters:
+        name (str): the name of the index e.g. 'country'
+        key: the natural key e.g. the country name
+        table (str): the table being loaded, used to report keys that could not be resolved
+        """
+        if name not in self._indexes:
+            self._indexes[name] = self._build_index(name)
+        value = self._indexes[name].get(key)
+        if value is None:
+            self.unresolved.append((table, name, key))
+        return value
+
+    def _build_index(self, name):
+        if name == 'country':
+            query = db.select(Country.name, Country.code)
+        elif name == 'event':
+            query = db.select(Event.year, Event.type, Event.event_id)
+        elif name == 'host':
+            query = db.select(Host.host, Host.host_id)
+        elif name == 'disability':
+            query = db.select(Disability.category, Disability.disability_id)
+        elif name == 'host_event':
+            query = db.select(Event.year, Host.host, Event.event_id).join(Event.host_events).join(HostEvent.host)
+        else:
+            raise ValueError(f'Unknown index "{name}"')
+        index = {}
+        for *key, value in db.session.execute(query):
+            key = key[0] if len(key) == 1 else tuple(key)
+            # A key that matches more than one row is ambiguous, so it is stored as None and reported as unresolved
+            index[key] = None if key in index else value
+        return index
+
+    def report(self):
+        """Print a line for each key that could not be resolved, with the number of rows affected."""
+        for (table, name, key), rows in Counter(self.unresolved).items():
+            print(f'Could not resolve {name} {key!r} for {rows} row(s) in {table}, the row(s) were not added')
+
+
+def add_country_data(df, resolver=None):
     """Add the country data to the paralympics database."""
     # Insert all values into the country table
     try:
-        for index, row in df.iterrows():
-            # The row is pandas series, we want the series as a list of values
-            row_values = row.tolist()
-            new_country = Country(code=row_values[0],
-                                  name=row_values[1],
-                                  region=row_values[2],
-                                  sub_region=row_values[3],
-                                  member_type=row_values[4],
-                                  notes=row_values[5])
-            db.session.add(new_country)
+        rows = df_to_rows(df, {'code': 'code',
+                               'name': 'name',
+                               'region': 'region',
+                               'sub_region': 'sub_region',
+                               'member_type': 'member_type',
+                               'notes': 'notes'})
+        count = bulk_insert(Country, rows)
         db.session.commit()
+        return count
     except SQLAlchemyError as e:
         print(f'An error occurred adding country data to the paralympics database. Error: {e}')
         db.session.rollback()  # Rollback the changes on error
+        return 0
 
 
-def add_event_data(df):
+def add_event_data(df, resolver=None):
     """Add event and participant data to the paralympics database."""
     try:
         # Convert the dates to strings
+        df = df.copy()
         df['start'] = df['start'].dt.strftime('%d/%m/%Y')
         df['end'] = df['end'].dt.strftime('%d/%m/%Y')
 
         # Insert the values into the event table
-        for index, row in df.iterrows():
-            event = Event(type=row['type'],
-                          year=row['year'],
-                          start=str(row['start']),
-                          end=str(row['end']),
-                          countries=row['countries'],
-                          events=row['events'],
-                          sports=row['sports'],
-                          highlights=row['highlights'],
-                          url=row['url'])
-
-            # Use the relationship definition to add the participants data
-            event.participants = Participants(participants_m=row['participants_m'],
-                                              participants_f=row['participants_f'],
-                                              participants=row['participants'])
-            db.session.add(event)  # adds the events and participants data to the session
+        rows = df_to_rows(df, {'type': 'type',
+                               'year': 'year',
+                               'start': 'start',
+                               'end': 'end',
+                               'countries': 'countries',
+                               'events': 'events',
+                               'sports': 'sports',
+                               'highlights': 'highlights',
+                               'url': 'url'})
+        count = bulk_insert(Event, rows)
+
+        # Find the generated event_id for each (year, type), then add the participants data
+        resolver = resolver or KeyResolver()
+        resolver.refresh('event')
+        participants = []
+        for row in df_to_rows(df, {'year': 'year',
+                                   'type': 'type',
+                                   'participants_m': 'participants_m',
+                                   'participants_f': 'participants_f',
+                                   'participants': 'participants'}):
+            event_id = resolver.resolve('event', (row.pop('year'), row.pop('type')), 'participants')
+            if event_id:
+                participants.append({'event_id': event_id, **row})
+        bulk_insert(Participants, participants)
         db.session.commit()
+        return count
     except SQLAlchemyError as e:
         print(f'An error occurred adding event data to the paralympics database. Error: {e}')
         db.session.rollback()
+        return 0
 
 
-def add_host_data(df_events):
+def add_host_data(df_events, resolver=None):
     """Add host data database."""
 
     try:
         # Extract unique host name and country pairs
-        # Initialize an empty DataFrame with the columns needed
-        host_country_df = pd.DataFrame(columns=['host', 'country'])
-        # Iterate over each row in the events DataFrame and split each column into multiple values where there is ','
-        for index, row in df_events.iterrows():
-            hosts = row['host'].split(',')
-            countries = row['country'].split(',')
-            # Create pairs of each host with each country and append to the DataFrame
-            for host, country in zip(hosts, countries):
-                new_row = pd.DataFrame({'host': [host.strip()], 'country': [country.strip()]})
-                host_country_df = pd.concat([host_country_df, new_row], ignore_index=True)
-        # Remove duplicate hosts from the dataframe
-        host_country_df = host_country_df.drop_duplicates(subset=['host', 'country'])
-
-        # Iterate over the dataframe, add the host and country to the host table
-        for index, row in host_country_df.iterrows():
-            # Get the country code from the country table
-            country_name = row['country']
-            country = Country.query.filter_by(name=country_name).first()
-            if country:
-                new_host = Host(country_code=country.code, host=row['host'])
-                db.session.add(new_host)
+        # Split each host and country on ',' and pair each host with each country
+        pairs = []
+        for hosts, countries in zip(df_events['host'], df_events['country']):
+            pairs.extend((host.strip(), country.strip()) for host, country in zip(hosts.split(','), countries.split(',')))
+        # Remove duplicate hosts, keeping the order in which they first appear
+        host_country_df = pd.DataFrame(pairs, columns=['host', 'country']).drop_duplicates(subset=['host', 'country'])
+
+        # Get the country code for each host
+        resolver = resolver or KeyResolver()
+        rows = []
+        for host_name, country_name in zip(host_country_df['host'], host_country_df['country']):
+            country_code = resolver.resolve('country', country_name, 'host')
+            if country_code:
+                rows.append({'country_code': country_code, 'host': host_name})
+        count = bulk_insert(Host, rows)
         # Commit the changes
         db.session.commit()
+        return count
 
     except SQLAlchemyError as e:
         print(f'An error occurred adding host data to the paralympics database. Error: {e}')
         db.session.rollback()
+        return 0
 
 
-def add_host_event_data(df):
+def add_host_event_data(df, resolver=None):
     """Add HostEvent data to the paralympics database."""
 
     try:
-        # Iterate each event, find the pairs of hosts, then get the event_id and host_id and insert into the host_event table
-        for index, row in df.iterrows():
-            hosts = row['host'].split(',')
+        # Iterate each event, find the pairs of hosts, then get the event_id and host_id for the host_event table
+        resolver = resolver or KeyResolver()
+        rows = []
+        for row in df_to_rows(df, {'host': 'host', 'year': 'year', 'type': 'type'}):
             # Find the event id for the event. This matches based on the year and type of event.
-            query = db.select(Event).where(Event.year == row['year'], Event.type == row['type'])
-            event = db.session.execute(query).scalar_one_or_none()
-            if event:
-                event_id = event.event_id
+            event_id = resolver.resolve('event', (row['year'], row['type']), 'host_event')
+            if event_id:
                 # Find the host_id for each host
-                for host_name in hosts:
-                    query = db.select(Host).where(Host.host == host_name.strip())
-                    host = db.session.execute(query).scalar_one_or_none()
-                    if host:
-                        host_id = host.host_id
-                        # Insert the host_event pair
-                        new_host_event = HostEvent(host_id=host_id, event_id=event_id)
-                        db.session.add(new_host_event)
+                for host_name in row['host'].split(','):
+                    host_id = resolver.resolve('host', host_name.strip(), 'host_event')
+                    if host_id:
+                        rows.append({'host_id': host_id, 'event_id': event_id})
+        count = bulk_insert(HostEvent, rows)
         db.session.commit()
+        return count
 
     except SQLAlchemyError as e:
         print(f'An error occurred adding host_event data to the paralympics database. Error: {e}')
         db.session.rollback()
+        return 0
 
 
-def add_disabilities_data(df):
+def add_disabilities_data(df, resolver=None):
     """Add Disability and DisabilityEvent data."""
 
     try:
         # Split the comma-separated values into lists
         split_disabilities = df['disabilities'].str.split(', ')
-        # Flatten the list of lists into a single list
-        all_disabilities = [item for sublist in split_disabilities for item in sublist]
-        # Convert the list to a set to get unique values
-        unique_disabilities = set(all_disabilities)
+        # Get the unique values, sorted so that the disability_id values are the same on every run
+        unique_disabilities = sorted({item for sublist in split_disabilities for item in sublist})
         # Insert the unique values into the table
-        for d in unique_disabilities:
-            new_disability = Disability(category=d)
-            db.session.add(new_disability)
-        db.session.commit()
+        count = bulk_insert(Disability, [{'category': d} for d in unique_disabilities])
 
-        # Iterate each result row in the event table
-        for index, row in df.iterrows():
-            # find the event
-            query = db.select(Event).where(Event.year == row['year'], Event.type == row['type'])
-            event = db.session.execute(query).scalar_one_or_none()
-            if event:
-                # Split the values for the disabilities
-                disabilities = row['disabilities'].split(', ')
-                # Add each disability
-                for d in disabilities:
-                    # Find the disability
-                    query = db.select(Disability).where(Disability.category == d)
-                    disability = db.session.execute(query).scalar_one_or_none()
-                    if disability:
-                        de = DisabilityEvent(event_id=event.event_id, disability_id=disability.disability_id)
-                        event.disability_events.append(de)
-                        disability.disability_events.append(de)
-                db.session.commit()
+        # Find the event and disability for each row and insert the pairs into the disability_event table
+        resolver = resolver or KeyResolver()
+        resolver.refresh('disability')
+        rows = []
+        for row in df_to_rows(df, {'disabilities': 'disabilities', 'year': 'year', 'type': 'type'}):
+            event_id = resolver.resolve('event', (row['year'], row['type']), 'disability_event')
+            if event_id:
+                for d in row['disabilities'].split(', '):
+                    disability_id = resolver.resolve('disability', d, 'disability_event')
+                    if disability_id:
+                        rows.append({'event_id': event_id, 'disability_id': disability_id})
+        bulk_insert(DisabilityEvent, rows)
+        db.session.commit()
+        return count
 
     except SQLAlchemyError as e:
         print(f'An error occurred adding disability data to the paralympics database. Error: {e}')
         db.session.rollback()
+        return 0
 
 
-def add_medal_result_data(df):
+def add_medal_result_data(df, resolver=None):
     """Add MedalResult data to the paralympics database."""
     try:
-        # Iterate each result row, get the event_id and code and insert into the MedalResult table
-        for index, row in df.iterrows():
-            # Find the event id for the event. This matches based on the year and host name.
-            query = db.select(Event).join(Event.host_events).join(HostEvent.host).where(Event.year == row['Year'], Host.host == row['Location'])
-            event = db.session.execute(query).scalar_one_or_none()
-            if event:
-                # Insert the medal results
-                event.medal_results.append(MedalResult(
-                    country_code=row['NPC'],
-                    rank=row['Rank'],
-                    gold=row['Gold'],
-                    silver=row['Silver'],
-                    bronze=row['Bronze'],
-                    total=row['Total']
-                ))
-                db.session.commit()
+        # Find the event_id for each result row. This matches based on the year and host name.
+        rows = df_to_rows(df, {'year': 'Year',
+                               'location': 'Location',
+                               'country_code': 'NPC',
+                               'rank': 'Rank',
+                               'gold': 'Gold',
+                               'silver': 'Silver',
+                               'bronze': 'Bronze',
+                               'total': 'Total'})
+        resolver = resolver or KeyResolver()
+        medal_results = []
+        for row in rows:
+            event_id = resolver.resolve('host_event', (row.pop('year'), row.pop('location')), 'medal_result')
+            if event_id:
+                row['event_id'] = event_id
+                medal_results.append(row)
+        # Insert the medal results in one transaction
+        count = bulk_insert(MedalResult, medal_results)
+        db.session.commit()
+        return count
 
     except SQLAlchemyError as e:
         print(f'An error occurred adding MedalResult data. Error: {e}')
         db.session.rollback()
+        return 0
+
+
+# Names in latlon.csv that are different to the host names in paralympics.xlsx
+# The 1984 summer games were held in both Stoke Mandeville and New York, latlon.csv has the coordinates of New York
+HOST_COORDINATE_NAMES = {"Milan and Cortina d'Ampezzo": 'Milano Cortina', 'Stoke Mandeville New York': 'New York'}
+
+
+def add_host_coordinates(df, resolver=None):
+    """Add the latitude and longitude from latlon.csv to the hosts that do not have coordinates yet.
+
+    Returns:
+    count (int): the number of hosts updated
+    """
+    try:
+        resolver = resolver or KeyResolver()
+        rows = []
+        for city, lat, lon in zip(df['city'], df['lat'], df['lon']):
+            host_id = resolver.resolve('host', HOST_COORDINATE_NAMES.get(city, city), 'host coordinates')
+            if host_id:
+                rows.append({'b_host_id': host_id, 'latitude': float(lat), 'longitude': float(lon)})
+        if rows:
+            stmt = (db.update(Host.__table__)
+                    .where(Host.host_id == db.bindparam('b_host_id'), Host.latitude.is_(None))
+                    .values(latitude=db.bindparam('latitude'), longitude=db.bindparam('longitude')))
+            db.session.execute(stmt, rows)
+        db.session.commit()
+        return len(rows)
+
+    except SQLAlchemyError as e:
+        print(f'An error occurred adding host coordinates to the paralympics database. Error: {e}')
+        db.session.rollback()
+        return 0
+
+
+def load_host_coordinates(resolver=None):
+    """Read latlon.csv and add the coordinates to the hosts, see add_host_coordinates()."""
+    return add_host_coordinates(pd.read_csv(latlon_path(), encoding='utf-8-sig'), resolver)
 
 
 def add_all_data():
     """Adds all the data.
-    """
-    # Specifies the path to the data file
-    data_path = resources.files("data").joinpath("paralympics.xlsx")
 
-    # Read data and create pandas dataframes
-    events_df = pd.read_excel(data_path, sheet_name='events')
-    medals_df = pd.read_excel(data_path, sheet_name='medal_standings')
-    npc_df = pd.read_excel(data_path, sheet_name='npc_codes')
+    Returns:
+    report (dict): table name mapped to a tuple of (rows inserted, seconds taken) for each table that was loaded
+    """
+    # Read the data into pandas dataframes, the workbook is only parsed if it has changed since it was last cached
+    sheets = read_workbook()
+    events_df = sheets['events']
+    medals_df = sheets['medal_standings']
+    npc_df = sheets['npc_codes']
 
     # List of tables and corresponding data addition functions
     tables_and_functions = [
@@ -212,8 +347,25 @@ def add_all_data():
         (MedalResult, add_medal_result_data, medals_df)
     ]
 
-    # Iterate through each table and function
+    # Iterate through each table and function, timing each one
+    # The resolver indexes are shared by all the functions, they are refreshed after each table is loaded
+    resolver = KeyResolver()
+    report = {}
     for table, add_function, data in tables_and_functions:
         count_query = db.select(func.count()).select_from(table)
         if db.session.execute(count_query).scalar() == 0:
-            add_function(data)
+            start = time.perf_counter()
+            rows = add_function(data, resolver)
+            report[table.__tablename__] = (rows, time.perf_counter() - start)
+            resolver.refresh()
+
+    # The host coordinates are added to the host rows, so are only added if no host has them yet
+    if db.session.execute(db.select(Host.host_id).where(Host.latitude.is_not(None)).limit(1)).first() is None:
+        start = time.perf_counter()
+        rows = load_host_coordinates(resolver)
+        report['host coordinates'] = (rows, time.perf_counter() - start)
+
+    for table_name, (rows, seconds) in report.items():
+        print(f'Loaded {rows} rows into {table_name} in {seconds * 1000:.1f} ms')
+    resolver.report()
+    return report
@@ -0,0 +1,49 @@
+"""
+Conditional GET support for pages that only change when the data in the database changes.
+
+The conditional_get decorator gives a page a strong ETag and a Last-Modified header based on the data version of the
+tables it reads (see data_version.py). If the browser sends If-None-Match or If-Modified-Since headers that match,
+a 304 Not Modified response is returned without running the view, so no SQL is run and no template is rendered.
+"""
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from flask import make_response, request, session
+
+from paralympics.data_version import get_data_version
+
+
+def conditional_get(*tables):
+    """Decorator for a view that only depends on its URL arguments, query string and the data in the tables."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            # Pages that display flashed messages are different each time, so they are not cached
+            if '_flashes' in session:
+                return view(**kwargs)
+
+            data_version = get_data_version()
+            key = f'{request.endpoint}:{sorted(kwargs.items())}:{request.query_string}:{data_version.token(*tables)}'
+            etag = hashlib.sha256(key.encode()).hexdigest()[:32]
+            # HTTP dates have a resolution of one second
+            last_modified = datetime.fromtimestamp(int(data_version.last_modified(*tables)), tz=timezone.utc)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = request.if_modified_since is not None and request.if_modified_since >= last_modified
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**kwargs))
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # Browsers may keep the page but must check it is still current before using it
+            response.cache_control.no_cache = True
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,106 @@
+"""
+Tracks a version number for each database table so that cached results can be reused until the data changes.
+
+The versions are kept in the database, in the data_version table, so every worker process that uses the database sees
+the same versions. create_version_table() adds triggers that add 1 to the version of a table and record the time for
+each row inserted, updated or deleted in it, in the same transaction as the change. So a write from any process, the
+sqlite3 app or a command is seen by all of them once it commits, and a write that is rolled back changes nothing.
+Each table's version starts at a random number, so versions from different databases do not match.
+
+Caches and ETags use the version of the tables they read from as part of their key, so a write to those tables means
+the cached value is no longer used. Only the tables in VERSIONED_TABLES have versions; add a table to it, and restart
+the app so the triggers are created, before caching a result read from that table.
+"""
+from flask import current_app, g, has_request_context
+
+# The tables that cached results are read from
+VERSIONED_TABLES = ('country', 'event', 'host', 'host_event', 'medal_result', 'participants', 'quiz')
+
+# The current time in seconds since the Unix epoch, with a fraction of a second
+NOW_SQL = "(julianday('now') - 2440587.5) * 86400.0"
+
+CREATE_SQL = """CREATE TABLE IF NOT EXISTS data_version (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+)"""
+
+INSERT_SQL = f"""INSERT OR IGNORE INTO data_version (table_name, version, modified)
+    VALUES (?, abs(random() % 1000000000), {NOW_SQL})"""
+
+TRIGGER_SQL = """CREATE TRIGGER IF NOT EXISTS {table}_version_{name} AFTER {operation} ON {table} BEGIN
+    UPDATE data_version SET version = version + 1, modified = {now} WHERE table_name = '{table}';
+END"""
+
+
+def create_version_table(execute):
+    """Create the data_version table, if it does not exist, and the triggers for each of the VERSIONED_TABLES.
+
+    Triggers are only created for tables that exist, so this is run again after the tables are created.
+
+    Parameters:
+    execute: function that runs SQL, with a tuple of parameters, in a transaction on the database
+    """
+    execute(CREATE_SQL, ())
+    existing = {row[0] for row in execute("SELECT name FROM sqlite_master WHERE type = 'table'", ())}
+    for table in VERSIONED_TABLES:
+        execute(INSERT_SQL, (table,))
+        if table in existing:
+            for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                execute(TRIGGER_SQL.format(table=table, name=operation.lower(), operation=operation, now=NOW_SQL), ())
+
+
+class DataVersion:
+    """Reads the versions of the tables from the data_version table of an app's database.
+
+    Parameters:
+    query: function that runs SQL, with a tuple of parameters, on the app's database and returns the rows
+    """
+
+    def __init__(self, query):
+        self.query = query
+
+    def _versions(self, tables):
+        unknown = set(tables).difference(VERSIONED_TABLES)
+        if unknown:
+            raise ValueError(f'No data version for {", ".join(sorted(unknown))}, add it to VERSIONED_TABLES')
+        # The versions are read once for each request, so the caches used by a request all see the same versions
+        versions = g.get('data_versions') if has_request_context() else None
+        if versions is None:
+            rows = self.query('SELECT table_name, version, modified FROM data_version', ())
+            versions = {table_name: (version, modified) for table_name, version, modified in rows}
+            if has_request_context():
+                g.data_versions = versions
+        return {table: versions[table] for table in tables}
+
+    def get(self, *tables):
+        """Return a number that changes whenever any of the tables change."""
+        return sum(version for version, modified in self._versions(tables).values())
+
+    def token(self, *tables):
+        """Return a string for the version of the tables, for use in cache keys."""
+        versions = self._versions(tables)
+        return '.'.join(str(versions[table][0]) for table in tables)
+
+    def last_modified(self, *tables):
+        """Return the time (seconds since the epoch) that any of the tables last changed."""
+        return max(modified for version, modified in self._versions(tables).values())
+
+
+def init_app(app, engine):
+    """Create the DataVersion for the app, reading the versions with a connection from the engine.
+
+    create_version_table() must be run on the database before the versions are read.
+    """
+    def query(sql, params):
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(sql, params).all()
+
+    data_version = DataVersion(query)
+    app.extensions['data_version'] = data_version
+    return data_version
+
+
+def get_data_version():
+    """Return the DataVersion for the current app."""
+    return current_app.extensions['data_version']
@@ -0,0 +1,125 @@
+"""
+Exports the medal results joined with the country, event and hosts as CSV or NDJSON.
+
+The rows are read with yield_per so that only EXPORT_BATCH_SIZE rows are held in memory at a time, and each batch is
+formatted and sent (or written) before the next is read. A response therefore starts as soon as the first batch has
+been read, and the memory used does not depend on the number of rows. The output can be gzip compressed as it is
+produced.
+
+To export from the command line:
+flask --app paralympics export-medals medals.csv.gz --gzip
+"""
+import csv
+import io
+import json
+import sys
+import zlib
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+
+from paralympics import db
+from paralympics.models import Country, Event, Host, HostEvent, MedalResult
+
+EXPORT_BATCH_SIZE = 1000
+FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+
+def export_query():
+    """Select one row for each medal result with the country, event and host names, in event and rank order."""
+    # An event can have more than one host, so the host names are joined into one column to keep one row per result
+    hosts = (select(func.group_concat(Host.host, '; '))
+             .join(HostEvent, HostEvent.host_id == Host.host_id)
+             .where(HostEvent.event_id == MedalResult.event_id)
+             .scalar_subquery())
+    return (select(Event.year, Event.type, Event.start, Event.end, hosts.label('host'),
+                   MedalResult.country_code, Country.name.label('country'), Country.region, MedalResult.rank,
+                   MedalResult.gold, MedalResult.silver, MedalResult.bronze, MedalResult.total)
+            .join(MedalResult.event)
+            .join(MedalResult.country)
+            .order_by(MedalResult.result_id))
+
+
+def export_batches(session, query=None):
+    """Yield the column names of the export query, then a list of rows for each batch of EXPORT_BATCH_SIZE rows."""
+    result = session.execute((query if query is not None else export_query())
+                             .execution_options(yield_per=EXPORT_BATCH_SIZE))
+    yield list(result.keys())
+    yield from result.partitions()
+
+
+def csv_text(rows):
+    """Return the rows formatted as CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def csv_chunks(batches):
+    """Yield the CSV header row, then the CSV text for each batch, so an export with no rows still has the header."""
+    batches = iter(batches)
+    yield csv_text([next(batches)])
+    for rows in batches:
+        yield csv_text(rows)
+
+
+def ndjson_chunks(batches):
+    """Yield the NDJSON text for each batch, one JSON object per row."""
+    batches = iter(batches)
+    columns = next(batches)
+    for rows in batches:
+        yield ''.join(json.dumps(dict(zip(columns, row))) + '\n' for row in rows)
+
+
+def encode_chunks(chunks, compress=False):
+    """Yield the chunks as UTF-8 bytes, gzip compressed if compress is True."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+    # wbits=31 writes a gzip header and trailer
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_medals(session, file_format, compress=False):
+    """Yield the export of all medal results as bytes.
+
+    Parameters:
+    session: the session to read the rows with
+    file_format (str): 'csv' or 'ndjson'
+    compress (bool): gzip compress the output
+    """
+    if file_format not in FORMATS:
+        raise ValueError(f'Unknown format "{file_format}", must be one of {", ".join(FORMATS)}')
+    batches = export_batches(session)
+    chunks = csv_chunks(batches) if file_format == 'csv' else ndjson_chunks(batches)
+    return encode_chunks(chunks, compress)
+
+
+@click.command('export-medals')
+@click.argument('output', type=click.Path(dir_okay=False, allow_dash=True))
+@click.option('--format', 'file_format', type=click.Choice(list(FORMATS)), default=None,
+              help='Output format, by default from the file extension (csv unless it is .ndjson).')
+@click.option('--gzip', 'compress', is_flag=True, help='Compress the output with gzip.')
+@with_appcontext
+def export_medals_command(output, file_format, compress):
+    """Export the medal results with the country, event and hosts to OUTPUT, or - for stdout."""
+    if file_format is None:
+        file_format = 'ndjson' if output.removesuffix('.gz').endswith('.ndjson') else 'csv'
+    size = 0
+    f = sys.stdout.buffer if output == '-' else open(output, 'wb')
+    try:
+        for data in export_medals(db.session, file_format, compress):
+            f.write(data)
+            size += len(data)
+    finally:
+        if f is not sys.stdout.buffer:
+            f.close()
+    if output != '-':
+        click.echo(f'Exported the medal results to {output} ({size} bytes)')
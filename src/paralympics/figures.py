@@ -1,7 +1,66 @@
+import threading
+from importlib import resources
+
 import pandas as pd
+import plotly
 import plotly.express as px
+from flask import current_app
 
+from paralympics.data_version import get_data_version
 from paralympics.models import Event, Participants
+from paralympics.read_engine import get_read_engine
+
+
+class ChartCache:
+    """The chart HTML for each feature for one app, with the data version it was created from."""
+
+    def __init__(self):
+        self._charts = {}
+        self._stats = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def get(self, feature, version, create):
+        """Return the chart for the feature, calling create() to make it again if the version has changed."""
+        with self._lock:
+            cached = self._charts.get(feature)
+            if cached is not None and cached[0] == version:
+                self._stats['hits'] += 1
+                return cached[1]
+            self._stats['misses'] += 1
+        # The chart is created without holding the lock, so charts for other features can be returned meanwhile
+        fig_html = create()
+        with self._lock:
+            self._charts[feature] = (version, fig_html)
+        return fig_html
+
+    def stats(self):
+        """Return the number of hits and misses."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def init_app(app):
+    """Create the ChartCache for the app."""
+    app.extensions['chart_cache'] = ChartCache()
+
+
+def plotly_js_path():
+    """Returns the path to the minified plotly.js file that is installed with the plotly package."""
+    return str(resources.files('plotly').joinpath('package_data', 'plotly.min.js'))
+
+
+def plotly_js_fingerprint():
+    """Returns a fingerprint for the plotly.js file, which only changes when the plotly package is upgraded."""
+    return plotly.__version__
+
+
+def cached_line_chart(feature, db):
+    """ Returns the line chart for the feature, only creating it again if the event or participants data has changed.
+
+    Parameters and return value are the same as line_chart().
+    """
+    version = get_data_version().token('event', 'participants')
+    return current_app.extensions['chart_cache'].get(feature, version, lambda: line_chart(feature, db))
 
 
 def line_chart(feature, db):
@@ -26,7 +85,8 @@ def line_chart(feature, db):
     stmt = db.select(Event, Participants).join(Participants).order_by(Event.type, Event.year)
 
     # Create a dataframe from the Event objects using pd.read_sql_query()
-    line_chart_df = pd.read_sql_query(stmt, db.get_engine())
+    # This only reads data so it uses the read-only engine if there is one
+    line_chart_df = pd.read_sql_query(stmt, get_read_engine())
 
     # Set the title for the chart using the value of 'feature'
     title_text = f"How has the number of {feature} changed over time?"
@@ -51,5 +111,6 @@ def line_chart(feature, db):
                   )
 
     # Convert to HTML
-    fig_html = {"fig": fig.to_html(full_html=False, include_plotlyjs=True, div_id="line-chart")}
+    # plotly.js is not included, the page loads it from a separate URL so the browser can cache it
+    fig_html = {"fig": fig.to_html(full_html=False, include_plotlyjs=False, div_id="line-chart")}
     return fig_html
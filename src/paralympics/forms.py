@@ -1,11 +1,11 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField
+from wtforms import SelectField, StringField
 from wtforms.fields.numeric import IntegerField
-from wtforms.validators import DataRequired, Optional, Regexp
-from wtforms_sqlalchemy.fields import QuerySelectField
+from wtforms.validators import DataRequired, Optional, Regexp, ValidationError
 
 from paralympics import db
 from paralympics.models import Country
+from paralympics.team_choices import get_teams
 
 
 class QuizForm(FlaskForm):
@@ -16,15 +16,26 @@ class QuizForm(FlaskForm):
                                       ])
 
 
-# TODO: Add a custom validator to ensure that the quiz_name is unique.
+# The quiz_name must be unique. This is checked by the database when the quiz is added, see create_quiz().
 
 def teams():
-    """Return a query to get the list of teams for the QuerySelectField.
-    https://wtforms-sqlalchemy.readthedocs.io/en/latest/wtforms_sqlalchemy/#wtforms_sqlalchemy.fields.QuerySelectField
+    """Return the Teams for the PredictionForm.
+    The names are only queried again after the country table changes, see team_choices.py
     """
-    return db.session.execute(db.select(Country).where(Country.member_type != 'dissolved')).scalars()
+    return get_teams(lambda: db.session.execute(
+        db.select(Country.name).where(Country.member_type != 'dissolved').order_by(Country.name)).scalars().all())
 
 
 class PredictionForm(FlaskForm):
     year = IntegerField('Year', validators=[DataRequired()])
-    team = QuerySelectField('Team', query_factory=teams, get_label='name', allow_blank=True, validators=[DataRequired()])
+    # The team is checked by validate_team() with a set lookup, rather than SelectField searching the choices
+    team = SelectField('Team', validators=[DataRequired()], validate_choice=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.teams = teams()
+        self.team.choices = self.teams.choices
+
+    def validate_team(self, field):
+        if field.data not in self.teams:
+            raise ValidationError('Not a valid choice.')
@@ -0,0 +1,130 @@
+"""
+A cache of rendered pages for views that only depend on their URL arguments and the data in the database.
+
+The cached_fragment decorator stores the HTML returned by a view, keyed by the endpoint, the URL arguments and the
+data version of the tables the view reads (see data_version.py), so the page is only queried and rendered again after
+the data changes. The cached_json decorator does the same for JSON API views, also keying on the query string. The
+least recently used pages are removed when the cache is larger than FRAGMENT_CACHE_MAX_BYTES.
+"""
+import functools
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request, session
+
+from paralympics.data_version import get_data_version
+
+
+class FragmentCache:
+    """A thread-safe LRU cache of rendered HTML with a limit on the total size in bytes.
+
+    Parameters:
+    max_bytes (int): the maximum total size of the cached HTML
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached HTML for the key, or None if it is not in the cache."""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        """Adds the HTML to the cache, removing the least recently used entries if the cache is too large."""
+        size = len(html.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key).encode())
+            self._entries[key] = html
+            self.size += size
+            while self.size > self.max_bytes:
+                old_key, old_html = self._entries.popitem(last=False)
+                self.size -= len(old_html.encode())
+
+    def stats(self):
+        """Returns a dict with the hit and miss counts, the number of entries and the size of the cache."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'size_bytes': self.size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def init_app(app):
+    """Create the FragmentCache for the app using FRAGMENT_CACHE_MAX_BYTES from the app config."""
+    app.extensions['fragment_cache'] = FragmentCache(app.config.get('FRAGMENT_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+
+
+def get_fragment_cache():
+    """Return the FragmentCache for the current app."""
+    return current_app.extensions['fragment_cache']
+
+
+def cached_fragment(*tables):
+    """Decorator for a view that returns HTML that only depends on its URL arguments and the data in the tables."""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            # Pages that display flashed messages are different each time, so they are not cached
+            if '_flashes' in session:
+                return view(**kwargs)
+
+            cache = get_fragment_cache()
+            key = (request.endpoint, tuple(sorted(kwargs.items())), get_data_version().token(*tables))
+            html = cache.get(key)
+            if html is None:
+                html = view(**kwargs)
+                if isinstance(html, str):
+                    cache.set(key, html)
+            return html
+
+        return wrapper
+
+    return decorator
+
+
+def cached_json(*tables):
+    """Decorator for a view that returns JSON data that only depends on its URL arguments, query string and the data
+    in the tables.
+
+    The view returns the data, or a (data, status) tuple for errors which are not cached. The JSON text is cached so
+    a cached response needs no SQL and no serialisation.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            cache = get_fragment_cache()
+            key = (request.endpoint, tuple(sorted(kwargs.items())), request.query_string,
+                   get_data_version().token(*tables))
+            body = cache.get(key)
+            if body is None:
+                result = view(**kwargs)
+                if isinstance(result, tuple):
+                    data, status = result
+                    return current_app.response_class(current_app.json.dumps(data), status,
+                                                      mimetype='application/json')
+                body = current_app.json.dumps(result)
+                cache.set(key, body)
+            return current_app.response_class(body, mimetype='application/json')
+
+        return wrapper
+
+    return decorator
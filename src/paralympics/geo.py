@@ -0,0 +1,197 @@
+"""
+An in-memory spatial index of the host cities, for finding the hosts within a distance of a point and the nearest
+hosts, and the host cities as GeoJSON for maps.
+
+Each host's latitude and longitude is converted to a point on a unit sphere and the points are stored in a k-d tree.
+The straight line (chord) distance between two points on the sphere increases with the distance along the surface,
+so the tree can be searched with chord distances and the results converted to kilometres with the haversine formula.
+A query only visits the branches of the tree that could contain a closer point, so it does not compare the point
+with every host.
+
+The index and the GeoJSON are built when the app starts, and again the next time they are used after the host,
+host_event or event tables change.
+"""
+import heapq
+import json
+import math
+import threading
+
+from flask import current_app
+
+from paralympics import db
+from paralympics.data_version import get_data_version
+from paralympics.models import Event, Host, HostEvent
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_TABLES = ('host', 'host_event', 'event')
+
+
+def to_xyz(lat, lon):
+    """Return the point on a unit sphere for a latitude and longitude in degrees."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    return math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+
+
+def to_coordinates(latitude, longitude):
+    """Return the latitude and longitude as floats, or None if either is missing or is not a number.
+
+    The values are converted as a database created from the workbook may store the coordinates as text.
+    """
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(latitude) or not math.isfinite(longitude):
+        return None
+    return latitude, longitude
+
+
+def chord_length(km):
+    """Return the straight line distance between two points on a unit sphere that are km apart on the Earth."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Return the distance in km along the surface of the Earth between two points."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class KDTree:
+    """A k-d tree of 3D points, each with a value.
+
+    The tree is stored as nested tuples of (point, value, axis, left, right).
+    """
+
+    def __init__(self, items):
+        self.root = self._build(list(items), 0)
+
+    def _build(self, items, depth):
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        middle = len(items) // 2
+        point, value = items[middle]
+        return point, value, axis, self._build(items[:middle], depth + 1), self._build(items[middle + 1:], depth + 1)
+
+    def within(self, target, radius):
+        """Return (distance squared, value) for each point within radius of the target."""
+        found = []
+        radius_sq = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            point, value, axis, left, right = node
+            distance_sq = sum((p - t) ** 2 for p, t in zip(point, target))
+            if distance_sq <= radius_sq:
+                found.append((distance_sq, value))
+            diff = target[axis] - point[axis]
+            stack.append(left if diff < 0 else right)
+            # Only search the other side if the splitting plane is closer than the radius
+            if diff * diff <= radius_sq:
+                stack.append(right if diff < 0 else left)
+        return found
+
+    def nearest(self, target, k):
+        """Return (distance squared, value) for the k points nearest the target, nearest first."""
+        # A max heap of the best k so far, using negative distances
+        best = []
+
+        def visit(node):
+            if node is None:
+                return
+            point, value, axis, left, right = node
+            distance_sq = sum((p - t) ** 2 for p, t in zip(point, target))
+            if len(best) < k:
+                heapq.heappush(best, (-distance_sq, id(value), value))
+            elif distance_sq < -best[0][0]:
+                heapq.heapreplace(best, (-distance_sq, id(value), value))
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            # Only search the other side if it could contain a point nearer than the furthest of the best k
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far)
+
+        visit(self.root)
+        return sorted(((-distance_sq, value) for distance_sq, _, value in best), key=lambda match: match[0])
+
+
+class HostIndex:
+    """The host cities with coordinates, in a KDTree, and as pre-serialized GeoJSON.
+
+    Parameters:
+    hosts (list): dicts with host_id, host, country_code, latitude, longitude and events, a list of 'year type'. Hosts
+    whose coordinates are missing or are not numbers are left out.
+    """
+
+    def __init__(self, hosts):
+        self.hosts = []
+        for host in hosts:
+            coordinates = to_coordinates(host['latitude'], host['longitude'])
+            if coordinates is not None:
+                self.hosts.append({**host, 'latitude': coordinates[0], 'longitude': coordinates[1]})
+        self.tree = KDTree((to_xyz(host['latitude'], host['longitude']), host) for host in self.hosts)
+        self.geojson = json.dumps({
+            'type': 'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'id': host['host_id'],
+                # GeoJSON coordinates are longitude then latitude
+                'geometry': {'type': 'Point', 'coordinates': [host['longitude'], host['latitude']]},
+                'properties': {'name': host['host'], 'country_code': host['country_code'], 'events': host['events']},
+            } for host in self.hosts],
+        }, separators=(',', ':'))
+
+    def _results(self, lat, lon, matches):
+        return [{'host_id': host['host_id'], 'host': host['host'], 'country_code': host['country_code'],
+                 'latitude': host['latitude'], 'longitude': host['longitude'],
+                 'distance_km': round(haversine_km(lat, lon, host['latitude'], host['longitude']), 1)}
+                for distance_sq, host in matches]
+
+    def within(self, lat, lon, radius_km):
+        """Return the hosts within radius_km of the point, nearest first, with their distance in km."""
+        matches = sorted(self.tree.within(to_xyz(lat, lon), chord_length(radius_km)), key=lambda match: match[0])
+        return self._results(lat, lon, matches)
+
+    def nearest(self, lat, lon, k):
+        """Return the k hosts nearest the point, nearest first, with their distance in km."""
+        return self._results(lat, lon, self.tree.nearest(to_xyz(lat, lon), k))
+
+
+def load_host_index():
+    """Query the hosts, their coordinates and events and return a HostIndex."""
+    hosts = {}
+    query = (db.select(Host.host_id, Host.host, Host.country_code, Host.latitude, Host.longitude, Event.year,
+                       Event.type)
+             .outerjoin(Host.host_events).outerjoin(HostEvent.event)
+             .order_by(Host.host_id, Event.year))
+    for host_id, name, country_code, latitude, longitude, year, event_type in db.session.execute(query):
+        host = hosts.setdefault(host_id, {'host_id': host_id, 'host': name, 'country_code': country_code,
+                                          'latitude': latitude, 'longitude': longitude, 'events': []})
+        if year is not None:
+            host['events'].append(f'{year} {event_type}')
+    return HostIndex(list(hosts.values()))
+
+
+def init_app(app):
+    """Build the HostIndex for the app, must be called in an app context."""
+    app.extensions['host_index'] = (get_data_version().token(*GEO_TABLES), load_host_index())
+    app.extensions['host_index_lock'] = threading.Lock()
+
+
+def get_host_index():
+    """Return the HostIndex for the current app, building it again if the hosts or events have changed."""
+    version = get_data_version().token(*GEO_TABLES)
+    built_version, index = current_app.extensions['host_index']
+    if built_version != version:
+        with current_app.extensions['host_index_lock']:
+            built_version, index = current_app.extensions['host_index']
+            if built_version != version:
+                index = load_host_index()
+                current_app.extensions['host_index'] = (version, index)
+    return index
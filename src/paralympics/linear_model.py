@@ -0,0 +1,77 @@
+"""
+A fast predictor for the linear regression medal model.
+
+The model saved by create_ml_model.py is a OneHotEncoder for the team and a LinearRegression, so a prediction is
+intercept + year_coefficient * year + team_coefficient[team]. export_coefficients() saves these values from the
+trained pipeline to a small JSON file, and LinearPredictor uses the JSON file to make predictions without importing
+scikit-learn or pandas, or building a DataFrame, when the app is running.
+
+To export the coefficients for the model.pkl files in the data and paralympics_sq3 packages:
+python -m paralympics.linear_model
+"""
+import json
+from importlib import resources
+
+
+class LinearPredictor:
+    """Predicts the total medals for a team and year from the coefficients of the linear regression model."""
+
+    def __init__(self, intercept, year, teams):
+        self.intercept = intercept
+        self.year = year
+        self.teams = teams
+
+    @classmethod
+    def load(cls, file):
+        """Create a predictor from an open JSON file saved by export_coefficients()."""
+        data = json.load(file)
+        return cls(data['intercept'], data['year'], data['teams'])
+
+    def predict(self, year, team):
+        """Return the predicted total medals (float) for the team in the year.
+
+        Raises:
+        ValueError: if the model was not trained with any data for the team
+        """
+        try:
+            team_coefficient = self.teams[team]
+        except KeyError:
+            raise ValueError(f"Unknown team: {team}") from None
+        return self.intercept + self.year * year + team_coefficient
+
+
+def export_coefficients(pipeline, path):
+    """Save the intercept and coefficients of a trained pipeline to a JSON file for LinearPredictor.
+
+    Parameters:
+    pipeline (Pipeline): the pipeline from create_ml_model.py with 'preprocessor' and 'regressor' steps
+    path (str or Path): the JSON file to write
+
+    Raises:
+    ValueError: if the pipeline does not have one-hot encoded teams followed by the year
+    """
+    preprocessor = pipeline.named_steps['preprocessor']
+    regressor = pipeline.named_steps['regressor']
+    categories = list(preprocessor.named_transformers_['team'].categories_[0])
+    features = list(preprocessor.get_feature_names_out())
+    if len(features) != len(categories) + 1 or features[-1] != 'remainder__Year':
+        raise ValueError(f'Expected one-hot encoded teams followed by Year, found features {features}')
+
+    coefficients = [float(c) for c in regressor.coef_]
+    data = {
+        'intercept': float(regressor.intercept_),
+        'year': coefficients[-1],
+        'teams': dict(zip((str(c) for c in categories), coefficients[:-1])),
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=1)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    for package in ['data', 'paralympics_sq3']:
+        model_dir = resources.files(package)
+        with model_dir.joinpath('model.pkl').open('rb') as model_file:
+            export_coefficients(joblib.load(model_file), str(model_dir.joinpath('model_coefficients.json')))
+        print(f"Coefficients saved to {package}/model_coefficients.json")
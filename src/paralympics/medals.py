@@ -0,0 +1,93 @@
+"""
+Medal table queries across events for the /api/medals endpoints.
+
+The totals, running totals and rank changes are calculated by SQLite using aggregates and window functions
+(SUM() OVER, RANK() and LAG()), so only the rows in the result are returned to Python.
+The routes cache the results by data version, see fragment_cache.cached_json.
+"""
+from sqlalchemy import func, select
+
+from paralympics import db
+from paralympics.models import Country, Event, MedalResult
+
+EVENT_TYPES = ('summer', 'winter')
+
+
+def country_history(code):
+    """Return the medals a country won at each event, with running totals and the change in rank.
+
+    The running totals and previous rank are for events of the same type, so a summer event is compared to the
+    previous summer event that the country has a result for. rank_change is positive if the rank improved.
+
+    Returns:
+    history (dict): the country and a list of events in date order, or None if there is no country with the code
+    """
+    country = db.session.execute(select(Country.code, Country.name).where(Country.code == code)).mappings().first()
+    if country is None:
+        return None
+
+    by_type = {'partition_by': Event.type, 'order_by': Event.year}
+    previous_rank = func.lag(MedalResult.rank).over(**by_type)
+    query = (select(Event.event_id, Event.year, Event.type, MedalResult.rank, MedalResult.gold, MedalResult.silver,
+                    MedalResult.bronze, MedalResult.total,
+                    func.sum(MedalResult.gold).over(**by_type).label('cumulative_gold'),
+                    func.sum(MedalResult.total).over(**by_type).label('cumulative_total'),
+                    previous_rank.label('previous_rank'),
+                    (previous_rank - MedalResult.rank).label('rank_change'))
+             .join(MedalResult.event)
+             .where(MedalResult.country_code == code)
+             .order_by(Event.year, Event.type))
+    return {**country, 'events': [dict(row) for row in db.session.execute(query).mappings()]}
+
+
+def medal_totals(event_type=None, limit=None):
+    """Return the all-time medal totals for each country, ranked by gold, then silver, then bronze.
+
+    Parameters:
+    event_type (str): 'summer' or 'winter' to only count those events, None for all events
+    limit (int): the number of countries to return, None for all
+
+    Returns:
+    totals (list): dicts with the rank, code, name, number of events and medal totals of each country
+    """
+    gold = func.sum(MedalResult.gold)
+    silver = func.sum(MedalResult.silver)
+    bronze = func.sum(MedalResult.bronze)
+    query = (select(func.rank().over(order_by=(gold.desc(), silver.desc(), bronze.desc())).label('rank'),
+                    Country.code, Country.name,
+                    func.count(MedalResult.event_id).label('events'),
+                    gold.label('gold'), silver.label('silver'), bronze.label('bronze'),
+                    func.sum(MedalResult.total).label('total'))
+             .join(MedalResult.country)
+             .join(MedalResult.event)
+             .group_by(Country.code)
+             .order_by(gold.desc(), silver.desc(), bronze.desc(), Country.name)
+             .limit(limit))
+    if event_type:
+        query = query.where(Event.type == event_type)
+    return [dict(row) for row in db.session.execute(query).mappings()]
+
+
+def rank_changes(event_type, year):
+    """Return the medal table for one event with each country's rank at its previous event of the same type.
+
+    Returns:
+    results (list): dicts with the rank, previous rank, rank change and medals of each country in rank order, empty
+    if there is no such event
+    """
+    previous_rank = func.lag(MedalResult.rank).over(partition_by=MedalResult.country_code, order_by=Event.year)
+    previous_year = func.lag(Event.year).over(partition_by=MedalResult.country_code, order_by=Event.year)
+    ranked = (select(Event.year, MedalResult.country_code, MedalResult.rank, MedalResult.gold, MedalResult.silver,
+                     MedalResult.bronze, MedalResult.total,
+                     previous_rank.label('previous_rank'), previous_year.label('previous_year'))
+              .join(MedalResult.event)
+              .where(Event.type == event_type)
+              .subquery())
+    # The window functions are calculated over all the events of the type before filtering to one year
+    query = (select(ranked.c.rank, ranked.c.country_code.label('code'), Country.name, ranked.c.gold, ranked.c.silver,
+                    ranked.c.bronze, ranked.c.total, ranked.c.previous_rank, ranked.c.previous_year,
+                    (ranked.c.previous_rank - ranked.c.rank).label('rank_change'))
+             .join(Country, Country.code == ranked.c.country_code)
+             .where(ranked.c.year == year)
+             .order_by(ranked.c.rank, Country.name))
+    return [dict(row) for row in db.session.execute(query).mappings()]
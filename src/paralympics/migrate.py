@@ -0,0 +1,77 @@
+"""
+Adds the columns and indexes defined in models.py to an existing database.
+
+db.create_all() only creates the columns and indexes for a table when it creates the table, so a database that was
+created before a column or index was added to the models will not have it. create_missing_columns() and
+create_missing_indexes() are run by create_app() and can also be run with:
+flask --app paralympics migrate-indexes
+"""
+import click
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+
+from paralympics import db
+
+
+def create_missing_columns():
+    """Add each column defined on the models that is not already in its table.
+
+    Only columns that can be NULL can be added, as the existing rows have no value for them. For other columns a
+    message is printed.
+
+    Returns:
+    added (list): 'table.column' for each column that was added
+    """
+    inspector = inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable or column.primary_key:
+                print(f'Could not add the column {table.name}.{column.name}, only columns that can be NULL can be added')
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            with db.engine.begin() as conn:
+                conn.exec_driver_sql(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}')
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+
+def create_missing_indexes():
+    """Create each index defined on the models that is not already in the database.
+
+    A unique index cannot be created if the table already has duplicate values, in which case a message is printed
+    and the other indexes are still created.
+
+    Returns:
+    created (list): the names of the indexes that were created
+    """
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(db.engine)
+                created.append(index.name)
+            except IntegrityError as e:
+                print(f'Could not create the unique index {index.name}, remove the duplicate values first. Error: {e}')
+    return created
+
+
+@click.command('migrate-indexes')
+def migrate_indexes_command():
+    """Add any missing columns and indexes to the database."""
+    added = create_missing_columns()
+    if added:
+        click.echo(f'Added columns: {", ".join(added)}')
+    created = create_missing_indexes()
+    click.echo(f'Created indexes: {", ".join(created)}' if created else 'All indexes already exist.')
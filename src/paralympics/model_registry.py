@@ -0,0 +1,72 @@
+"""
+A process-wide cache of the trained prediction model.
+
+Loading model.pkl with joblib takes tens of milliseconds, so the model is loaded once and shared by every request and
+thread in the process. The same applies to the coefficients file used by linear_model.LinearPredictor. Each call to
+get() checks the modification time of the file, and if the model has been retrained and saved again, the new model is
+loaded and swapped in without restarting the app.
+"""
+import hashlib
+import threading
+import time
+from importlib import resources
+from pathlib import Path
+
+import joblib
+
+
+class ModelRegistry:
+    """Loads a joblib model file once per process and reloads it when the file changes.
+
+    Parameters:
+    package (str): the package that contains the model file e.g. 'data'
+    filename (str): the name of the model file, defaults to 'model.pkl'
+    loader (callable): takes the open file (binary mode) and returns the model, defaults to joblib.load
+    """
+
+    def __init__(self, package, filename='model.pkl', loader=joblib.load):
+        self.path = Path(str(resources.files(package).joinpath(filename)))
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._model = None
+        self._mtime = None
+        self.version = None
+        self.load_seconds = None
+        self.loaded_at = None
+        self.loads = 0
+
+    def get(self):
+        """Return the model, loading it if this is the first call or the file has been modified since it was loaded."""
+        mtime = self.path.stat().st_mtime_ns
+        if self._model is None or mtime != self._mtime:
+            with self._lock:
+                # Another thread may have loaded the model while this one was waiting for the lock
+                if self._model is None or mtime != self._mtime:
+                    self._load(mtime)
+        return self._model
+
+    def _load(self, mtime):
+        start = time.perf_counter()
+        data = self.path.read_bytes()
+        version = hashlib.sha256(data).hexdigest()[:12]
+        # Only unpickle the file if the contents have changed, e.g. not if the file was just touched
+        if version != self.version:
+            with self.path.open('rb') as file:
+                model = self.loader(file)
+            # Replace the model in a single assignment so other threads see either the old or the new model
+            self._model = model
+            self.version = version
+            self.loads += 1
+            self.load_seconds = time.perf_counter() - start
+            self.loaded_at = time.time()
+        self._mtime = mtime
+
+    def metrics(self):
+        """Return a dict with the version, load time and number of loads of the model."""
+        return {
+            'path': self.path.name,
+            'version': self.version,
+            'load_seconds': self.load_seconds,
+            'loaded_at': self.loaded_at,
+            'loads': self.loads,
+        }
@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import ForeignKey, Integer, Text
+from sqlalchemy import Float, ForeignKey, Index, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from paralympics import db
@@ -9,6 +9,8 @@ from paralympics import db
 # Note: db.Model is the declarative base class for SQLAlchemy that was defined in the __init__.py file
 class Event(db.Model):
     __tablename__ = 'event'
+    # Each event is identified by the year and type, e.g. the 2012 summer paralympics
+    __table_args__ = (Index('ix_event_year_type', 'year', 'type', unique=True),)
     event_id = mapped_column(Integer, primary_key=True)
     type = mapped_column(Text, nullable=False)
     year = mapped_column(Integer, nullable=False)
@@ -45,7 +47,7 @@ class Country(db.Model):
     __tablename__ = 'country'
 
     code = mapped_column(Text, primary_key=True)
-    name = mapped_column(Text, nullable=False)
+    name = mapped_column(Text, nullable=False, index=True, unique=True)
     region = mapped_column(Text)
     sub_region = mapped_column(Text)
     member_type = mapped_column(Text)
@@ -59,7 +61,7 @@ class Disability(db.Model):
     __tablename__ = 'disability'
 
     disability_id = mapped_column(Integer, primary_key=True)
-    category = mapped_column(Text, nullable=False)
+    category = mapped_column(Text, nullable=False, index=True, unique=True)
     # Relationship to the DisabilityEvent table. back_populates takes the name of the relationship that is defined in the DisabilityClass
     disability_events: Mapped[List["DisabilityEvent"]] = relationship(back_populates="disability")
 
@@ -68,7 +70,7 @@ class DisabilityEvent(db.Model):
     __tablename__ = 'disability_event'
 
     event_id: Mapped[int] = mapped_column(ForeignKey('event.event_id'), primary_key=True)
-    disability_id: Mapped[int] = mapped_column(ForeignKey('disability.disability_id'), primary_key=True)
+    disability_id: Mapped[int] = mapped_column(ForeignKey('disability.disability_id'), primary_key=True, index=True)
 
     # Relationships to the parent classes: Event and Disability
     # back_populates takes the name of the relationships that is defined in the parent classes (same name was used in both)
@@ -80,8 +82,11 @@ class Host(db.Model):
     __tablename__ = 'host'
 
     host_id = mapped_column(Integer, primary_key=True)
-    country_code = mapped_column(ForeignKey('country.code'))
-    host = mapped_column(Text, nullable=False)
+    country_code = mapped_column(ForeignKey('country.code'), index=True)
+    host = mapped_column(Text, nullable=False, index=True, unique=True)
+    # The coordinates of the host city in degrees, from latlon.csv
+    latitude = mapped_column(Float)
+    longitude = mapped_column(Float)
 
     # Relationships
     host_events: Mapped[List["HostEvent"]] = relationship(back_populates="host")
@@ -97,7 +102,8 @@ class HostEvent(db.Model):
                             )
     event_id = mapped_column(Integer,
                              ForeignKey('event.event_id', onupdate="CASCADE", ondelete="NO ACTION"),
-                             primary_key=True
+                             primary_key=True,
+                             index=True
                              )
     # Relationships
     event: Mapped["Event"] = relationship("Event", back_populates="host_events")
@@ -108,7 +114,7 @@ class Participants(db.Model):
     __tablename__ = 'participants'
 
     participant_id = mapped_column(Integer, primary_key=True)
-    event_id = mapped_column(Integer, ForeignKey('event.event_id'))
+    event_id = mapped_column(Integer, ForeignKey('event.event_id'), index=True)
     participants_m = mapped_column(Integer)
     participants_f = mapped_column(Integer)
     participants = mapped_column(Integer)
@@ -121,8 +127,8 @@ class MedalResult(db.Model):
     __tablename__ = 'medal_result'
 
     result_id = mapped_column(Integer, primary_key=True)
-    event_id = mapped_column(Integer, ForeignKey('event.event_id'))
-    country_code = mapped_column(Text, ForeignKey('country.code'))
+    event_id = mapped_column(Integer, ForeignKey('event.event_id'), index=True)
+    country_code = mapped_column(Text, ForeignKey('country.code'), index=True)
     rank = mapped_column(Integer)
     gold = mapped_column(Integer)
     silver = mapped_column(Integer)
@@ -137,7 +143,7 @@ class Quiz(db.Model):
     __tablename__ = 'quiz'
 
     quiz_id = mapped_column(Integer, primary_key=True)
-    quiz_name = mapped_column(Text, nullable=False)
+    quiz_name = mapped_column(Text, nullable=False, index=True, unique=True)
     close_date = mapped_column(Text)
     # Relationships
     quiz_questions: Mapped[List["QuizQuestion"]] = relationship(back_populates="quiz")
@@ -149,7 +155,7 @@ class Question(db.Model):
 
     question_id = mapped_column(Integer, primary_key=True)
     question = mapped_column(Text, nullable=False)
-    event_id = mapped_column(Integer, ForeignKey('event.event_id'), nullable=True)
+    event_id = mapped_column(Integer, ForeignKey('event.event_id'), nullable=True, index=True)
     # Relationships
     event: Mapped["Event"] = relationship(back_populates="questions")
     answer_choices: Mapped[List["AnswerChoice"]] = relationship(back_populates="question")
@@ -165,7 +171,8 @@ class QuizQuestion(db.Model):
     )
     question_id: Mapped[int] = mapped_column(
         ForeignKey('question.question_id', onupdate="CASCADE", ondelete="CASCADE"),
-        primary_key=True
+        primary_key=True,
+        index=True
     )
     # Relationships
     question: Mapped["Question"] = relationship(back_populates="quiz_questions")
@@ -176,7 +183,7 @@ class AnswerChoice(db.Model):
     __tablename__ = 'answer_choice'
 
     ac_id = mapped_column(Integer, primary_key=True)
-    question_id = mapped_column(Integer, ForeignKey('question.question_id'))
+    question_id = mapped_column(Integer, ForeignKey('question.question_id'), index=True)
     choice_text = mapped_column(Text)
     choice_value = mapped_column(Integer)
     is_correct: Mapped[Optional[bool]] = mapped_column(Integer)
@@ -190,11 +197,44 @@ class StudentResponse(db.Model):
     response_id = mapped_column(Integer, primary_key=True)
     student_email = mapped_column(Text, nullable=False)
     score = mapped_column(Integer)
-    quiz_id = mapped_column(Integer, ForeignKey('quiz.quiz_id'))
+    quiz_id = mapped_column(Integer, ForeignKey('quiz.quiz_id'), index=True)
     # Relationships
     quiz: Mapped["Quiz"] = relationship(back_populates="student_responses")
 
 
+# The summary tables are updated in the same transaction as each insert into student_response, see quiz_summary.py
+class QuizSummary(db.Model):
+    __tablename__ = 'quiz_summary'
+
+    quiz_id = mapped_column(Integer, ForeignKey('quiz.quiz_id', ondelete="CASCADE"), primary_key=True)
+    response_count = mapped_column(Integer, nullable=False, default=0)
+    # The total, lowest and highest of the responses that have a score
+    scored_count = mapped_column(Integer, nullable=False, default=0)
+    score_total = mapped_column(Integer, nullable=False, default=0)
+    score_min = mapped_column(Integer)
+    score_max = mapped_column(Integer)
+
+
+class QuizScoreBucket(db.Model):
+    __tablename__ = 'quiz_score_bucket'
+
+    quiz_id = mapped_column(Integer, ForeignKey('quiz.quiz_id', ondelete="CASCADE"), primary_key=True)
+    # The lowest score in the bucket
+    bucket = mapped_column(Integer, primary_key=True)
+    response_count = mapped_column(Integer, nullable=False, default=0)
+
+
+class QuizTopScore(db.Model):
+    __tablename__ = 'quiz_top_score'
+    __table_args__ = (Index('ix_quiz_top_score_quiz_score', 'quiz_id', 'score'),)
+
+    response_id = mapped_column(Integer, ForeignKey('student_response.response_id', ondelete="CASCADE"),
+                                primary_key=True)
+    quiz_id = mapped_column(Integer, ForeignKey('quiz.quiz_id', ondelete="CASCADE"), nullable=False)
+    student_email = mapped_column(Text, nullable=False)
+    score = mapped_column(Integer, nullable=False)
+
+
 # This is an alternative version for the Event class using check constraints and converting the string to a Python datetime.
 '''
 class Event(db.Model):
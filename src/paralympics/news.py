@@ -0,0 +1,202 @@
+"""
+Fetches the top stories from the Hacker News API.
+
+The stories are fetched concurrently using a bounded thread pool, over a shared requests Session so that connections
+to the API are kept alive and reused between requests. Each call to the API has a timeout so a slow response cannot
+block the page for long.
+
+NewsCache keeps the stories for a time-to-live (TTL). After the TTL the old stories are still returned while they are
+fetched again in the background, so requests do not wait for the API. A circuit breaker stops calling the API for a
+while after several calls in a row have failed.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# The maximum number of stories fetched at the same time
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='news')
+# Background refreshes use their own thread so they never wait for a worker in _executor that they need themselves
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='news-refresh')
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+_session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+
+
+def fetch_json(url, timeout):
+    """Returns the JSON from a GET request to the url, raises requests.RequestException if the request fails."""
+    response = _session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_top_stories(api_url, count, timeout):
+    """Returns the top stories from the Hacker News API.
+
+    Parameters:
+    api_url (str): the base URL of the API e.g. https://hacker-news.firebaseio.com/v0
+    count (int): the number of stories
+    timeout (float): the timeout in seconds for each call to the API
+
+    Returns:
+    stories (list): a dict for each story, stories that could not be fetched are left out
+
+    Raises:
+    requests.RequestException: if the list of top stories cannot be fetched
+    """
+    item_ids = fetch_json(f"{api_url}/topstories.json", timeout)[:count]
+
+    def fetch_item(item_id):
+        try:
+            return fetch_json(f"{api_url}/item/{item_id}.json", timeout)
+        except (requests.RequestException, ValueError):
+            return None
+
+    # map() returns the results in the same order as the item_ids
+    return [story for story in _executor.map(fetch_item, item_ids) if story]
+
+
+class NewsUnavailable(Exception):
+    """Raised when there are no cached stories and the stories cannot be fetched from the API."""
+
+
+class CircuitBreaker:
+    """Stops calls to a service after a number of failures in a row, then allows a trial call after a reset timeout.
+
+    Parameters:
+    failure_threshold (int): the number of failures in a row that opens the circuit
+    reset_timeout (float): seconds after opening before a trial call is allowed
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Returns True if a call may be made. Only one trial call is allowed when the circuit is half-open."""
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                # Restart the timeout so that other callers wait for the result of this trial call
+                self.opened_at = time.monotonic()
+                return True
+            return state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class NewsCache:
+    """Caches the top stories, serves stale stories while refreshing them, and uses a circuit breaker for the API.
+
+    Parameters:
+    failure_threshold (int): the number of failed fetches in a row before the API is no longer called
+    reset_timeout (float): seconds before the API is tried again after the circuit breaker opens
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._lock = threading.Lock()
+        # (api_url, count) mapped to (time fetched, stories)
+        self._entries = {}
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get_stories(self, api_url, count, timeout, ttl):
+        """Returns the top stories, from the cache if possible.
+
+        Parameters:
+        api_url, count, timeout: passed to fetch_top_stories()
+        ttl (float): seconds that the cached stories are fresh for
+
+        Raises:
+        NewsUnavailable: if there are no cached stories and they cannot be fetched
+        """
+        key = (api_url, count)
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched, stories = entry
+            if time.monotonic() - fetched < ttl:
+                self.hits += 1
+            else:
+                # Serve the stale stories and refresh them in the background
+                self.stale_hits += 1
+                self._refresh_in_background(key, timeout)
+            return stories
+
+        self.misses += 1
+        if not self.breaker.allow():
+            raise NewsUnavailable('The news service is unavailable, please try again later')
+        return self._fetch(key, timeout)
+
+    def _fetch(self, key, timeout):
+        api_url, count = key
+        try:
+            stories = fetch_top_stories(api_url, count, timeout)
+            if count and not stories:
+                raise NewsUnavailable('No stories could be fetched')
+        except (requests.RequestException, ValueError, NewsUnavailable) as e:
+            self.breaker.record_failure()
+            raise NewsUnavailable(f'Could not get the news: {e}') from e
+        self.breaker.record_success()
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stories)
+        return stories
+
+    def _refresh_in_background(self, key, timeout):
+        with self._lock:
+            # Only refresh each key once at a time, and not while the circuit breaker is open
+            if key in self._refreshing or not self.breaker.allow():
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, timeout)
+            except NewsUnavailable:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
+
+    def stats(self):
+        """Returns a dict with the hit rate, the age of each cached entry and the circuit breaker state."""
+        requests_count = self.hits + self.stale_hits + self.misses
+        now = time.monotonic()
+        return {
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.stale_hits) / requests_count if requests_count else None,
+            'entries': [{'count': count, 'age_seconds': now - fetched}
+                        for (api_url, count), (fetched, stories) in self._entries.items()],
+            'circuit': self.breaker.state,
+            'failures': self.breaker.failures,
+        }
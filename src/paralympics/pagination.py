@@ -0,0 +1,70 @@
+"""
+Keyset (seek) pagination for the JSON list endpoints.
+
+Each page is ordered by a unique key made of indexed columns. Rather than skipping the earlier rows with OFFSET, the
+next page is selected with WHERE (key columns) > (key of the last row on the page), so SQLite seeks straight to the
+start of the page using the index and every page costs the same as the first.
+The key of the last row is returned to the client as an opaque cursor string for it to send back for the next page.
+"""
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor was not created by encode_cursor() for the same key columns."""
+
+
+def encode_cursor(values):
+    """Return an opaque, URL-safe string for the key values of a row."""
+    return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Return the key values from a cursor, checking that it has the expected number of str or int values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursor('Invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor('Invalid cursor')
+    # The cursor comes from the client, so only allow the types of value that encode_cursor() writes for a key
+    if not all(isinstance(value, (str, int)) and not isinstance(value, bool) for value in values):
+        raise InvalidCursor('Invalid cursor')
+    return values
+
+
+def keyset_page(session, query, key_columns, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return one page of a query ordered by the key columns, starting after the cursor.
+
+    Parameters:
+    session: the session to run the query with
+    query: a select() with the filters for the list, the key columns must be in its columns
+    key_columns (list): columns that together are unique for each row, in the order of the pages
+    cursor (str): the next_cursor from the previous page, or None for the first page
+    limit (int): the number of rows on the page
+
+    Returns:
+    page (dict): items, a list of a dict for each row, and next_cursor, which is None on the last page
+
+    Raises:
+    InvalidCursor: if the cursor cannot be decoded
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(key_columns))
+        if len(key_columns) == 1:
+            query = query.where(key_columns[0] > values[0])
+        else:
+            query = query.where(tuple_(*key_columns) > tuple_(*values))
+    # Select one more row than the page size to find out if there is another page
+    rows = session.execute(query.order_by(*key_columns).limit(limit + 1)).mappings().all()
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last[column.key] for column in key_columns])
+    return {'items': items, 'next_cursor': next_cursor}
@@ -1,19 +1,40 @@
-import importlib.resources
+from concurrent.futures import TimeoutError
 
-import joblib
-import pandas as pd
-import requests
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import (Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file,
+                   stream_with_context, url_for)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from paralympics import db
-from paralympics.figures import line_chart
-from paralympics.forms import PredictionForm, QuizForm
-from paralympics.models import Event, Host, HostEvent, Quiz
+from paralympics.conditional import conditional_get
+from paralympics.export import FORMATS, export_medals
+from paralympics.figures import cached_line_chart, plotly_js_fingerprint, plotly_js_path
+from paralympics.forms import PredictionForm, QuizForm, teams
+from paralympics.fragment_cache import cached_fragment, cached_json, get_fragment_cache
+from paralympics.geo import GEO_TABLES, get_host_index
+from paralympics.linear_model import LinearPredictor
+from paralympics.medals import EVENT_TYPES, country_history, medal_totals, rank_changes
+from paralympics.model_registry import ModelRegistry
+from paralympics.models import Country, Event, Host, HostEvent, MedalResult, Quiz
+from paralympics.news import NewsUnavailable
+from paralympics.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, keyset_page
+from paralympics.quiz_import import MAX_BATCH_SIZE, format_from_filename, import_questions
+from paralympics.quiz_summary import TOP_SCORES, get_quiz_stats, get_top_scores
+from paralympics.response_writer import get_response_writer
+from paralympics.search import search
 
 main = Blueprint('main', __name__)
 
+# The maximum number of predictions in one request to /api/predict
+MAX_BATCH_PREDICTIONS = 10000
+
+# The coefficients of the prediction model are loaded once and shared by all requests, and reloaded if the file changes
+# The file is exported from model.pkl, see linear_model.py
+model_registry = ModelRegistry('data', 'model_coefficients.json', loader=LinearPredictor.load)
+
 
 @main.route('/')
+@conditional_get('event', 'host_event', 'host')
+@cached_fragment('event', 'host_event', 'host')
 def index():
     """Renders the home page that is now a list of all paralympics with hyperlinks to the event page for each."""
     # Query the database to get all the events and arrange in date order
@@ -24,6 +45,8 @@ def index():
 
 
 @main.route('/event/<int:event_id>')
+@conditional_get('event', 'host_event', 'host')
+@cached_fragment('event', 'host_event', 'host')
 def get_event(event_id):
     """Get event by event_id
     If an event_id is not provided, the first event is returned by default.
@@ -39,27 +62,52 @@ def get_event(event_id):
 
 @main.route('/news')
 def get_news():
-    """Get the top 3 stories from Hacker News.
-    The page will be slow to load due to the number of requests made to the Hacker News API.
-    TODO: Investigate "Flask[async]" to load asynchronously.
+    """Get the top stories from Hacker News.
+    The number of stories is set by NEWS_STORY_COUNT in the app config. The stories are fetched at the same time, so
+    the page takes about as long as two requests to the Hacker News API rather than one request per story.
+    The stories are cached for NEWS_CACHE_TTL seconds, see news.NewsCache.
     """
-    url = "https://hacker-news.firebaseio.com/v0/topstories.json"
-    response = requests.get(url)
-    item_ids = response.json()
-    stories = []
-    # Get 3 articles
-    for i in range(3):
-        url = f"https://hacker-news.firebaseio.com/v0/item/{item_ids[i]}.json"
-        response = requests.get(url)
-        stories.append(response.json())
+    news_cache = current_app.extensions['news_cache']
+    try:
+        stories = news_cache.get_stories(current_app.config['NEWS_API_URL'],
+                                         current_app.config['NEWS_STORY_COUNT'],
+                                         current_app.config['NEWS_TIMEOUT'],
+                                         current_app.config['NEWS_CACHE_TTL'])
+    except NewsUnavailable as e:
+        flash(str(e))
+        stories = []
     return render_template('news.html', stories=stories)
 
 
+@main.get('/cache/stats')
+def cache_stats():
+    """Returns the hit and miss counts and the size of the rendered page cache as JSON."""
+    return jsonify(get_fragment_cache().stats())
+
+
+@main.get('/news/stats')
+def news_stats():
+    """Returns the hit rate and age of the news cache, and the state of the circuit breaker, as JSON."""
+    return jsonify(current_app.extensions['news_cache'].stats())
+
+
 @main.get('/chart')
+@conditional_get('event', 'participants')
 def display_chart():
     """ Returns a page with a line chart. """
-    line_fig = line_chart(feature="participants", db=db)
-    return render_template('chart.html', fig_html=line_fig)
+    line_fig = cached_line_chart(feature="participants", db=db)
+    plotly_js_url = url_for('main.plotly_js', fingerprint=plotly_js_fingerprint())
+    return render_template('chart.html', fig_html=line_fig, plotly_js_url=plotly_js_url)
+
+
+@main.get('/js/plotly-<fingerprint>.min.js')
+def plotly_js(fingerprint):
+    """ Returns the plotly.js library. The URL includes the plotly version so browsers can cache it for a year. """
+    if fingerprint != plotly_js_fingerprint():
+        abort(404)
+    response = send_file(plotly_js_path(), mimetype='text/javascript', max_age=31536000)
+    response.cache_control.immutable = True
+    return response
 
 
 # TODO: Move quiz to its own blueprint
@@ -73,26 +121,20 @@ def quiz():
         quiz_name = form.quiz_name.data
         close_date = form.close_date.data
 
-        # Create a Quiz object
-        quiz = Quiz(quiz_name=quiz_name, close_date=close_date)
-
-        # Check it does not already exist.
-        existing_quiz = db.session.query(Quiz).filter(Quiz.quiz_name == quiz_name).first()
-
-        # If it does, display a message and do not add it.
-        if existing_quiz:
-            flash(f"Quiz with name {quiz_name} already exists.")
-        # Otherwise, try to add it to the database
-        else:
-            try:
-                db.session.add(quiz)
-                db.session.commit()
+        try:
+            # Add the quiz, the database does not add it if a quiz with the same name already exists
+            quiz_id = create_quiz(quiz_name, close_date)
+            if quiz_id is None:
+                # If it does, display a message and do not add it.
+                flash(f"Quiz with name {quiz_name} already exists.")
+            else:
                 # Display a message to confirm it has been added
                 flash('Quiz added!', 'success')
                 return redirect(url_for('main.index'))
-            except Exception as e:
-                # If there is an error, display a message and return to the previous form
-                flash(f'Error adding quiz: {e}', 'danger')
+        except Exception as e:
+            # If there is an error, display a message and return to the previous form
+            db.session.rollback()
+            flash(f'Error adding quiz: {e}', 'danger')
 
     return render_template('quiz.html', form=form)
 
@@ -104,7 +146,7 @@ def predict():
     if form.validate_on_submit():
         # Get all values from the form
         year = form.year.data
-        team = form.team.data.name
+        team = form.team.data
 
         # Make the prediction
         prediction = make_prediction(year, team)
@@ -113,7 +155,7 @@ def predict():
         if type(prediction) != int:
             prediction_text = f"Sorry, insufficient data to predict a result, please select a different team"
         else:
-            prediction_text = f"Prediction: {form.team.data.name} will win {prediction} medals in {form.year.data}!"
+            prediction_text = f"Prediction: {team} will win {prediction} medals in {year}!"
 
         return render_template(
             "prediction.html", form=form, prediction_text=prediction_text
@@ -121,6 +163,272 @@ def predict():
     return render_template("prediction.html", form=form)
 
 
+@main.get('/predict/model')
+def model_metrics():
+    """Returns the version and load time of the prediction model as JSON."""
+    return jsonify(model_registry.metrics())
+
+
+@main.post('/api/predict')
+def api_predict():
+    """Returns predictions for many (year, team) pairs as JSON.
+
+    The JSON body is either a list of items:
+        {"items": [{"year": 2028, "team": "Germany"}, {"year": 2032, "team": "France"}]}
+    or a sweep of teams across a range of years (every team is used if "teams" is omitted):
+        {"teams": ["Germany", "France"], "start_year": 2028, "end_year": 2040, "step": 4}
+
+    Items with an unknown or invalid team or an invalid year have an "error" instead of a "prediction".
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+    if 'items' in data:
+        items = data['items']
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return jsonify({'error': '"items" must be a list of objects with "year" and "team"'}), 400
+        items = [(item.get('year'), item.get('team')) for item in items]
+        count = len(items)
+    else:
+        try:
+            years = range(int(data['start_year']), int(data['end_year']) + 1, int(data.get('step', 4)))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': '"items" or integer "start_year" and "end_year" are required'}), 400
+        team_names = data.get('teams')
+        if team_names is None:
+            team_names = teams().names
+        elif not isinstance(team_names, list):
+            return jsonify({'error': '"teams" must be a list of team names'}), 400
+        # Count the sweep before making the list of items, so a huge range is rejected without building it
+        count = len(years) * len(team_names)
+
+    if count > MAX_BATCH_PREDICTIONS:
+        return jsonify({'error': f'A maximum of {MAX_BATCH_PREDICTIONS} predictions can be requested at once'}), 400
+
+    if 'items' not in data:
+        items = [(year, team) for team in team_names for year in years]
+    return jsonify({'predictions': make_predictions(items)})
+
+
+@main.post('/api/quiz/import')
+def api_quiz_import():
+    """Imports quiz questions from an uploaded NDJSON or CSV file and returns a report as JSON.
+
+    The file is either a multipart upload in the "file" field, with the format taken from the file name, or the request
+    body with a content type of application/x-ndjson or text/csv. See quiz_import for the formats.
+    """
+    batch_size = request.args.get('batch_size', 1000, type=int)
+    if batch_size < 1:
+        return jsonify({'error': 'batch_size must be a positive integer'}), 400
+    # Limit the batch size so that a large file is never held in memory as one batch
+    batch_size = min(batch_size, MAX_BATCH_SIZE)
+    if 'file' in request.files:
+        upload = request.files['file']
+        stream, file_format = upload.stream, format_from_filename(upload.filename)
+    elif request.mimetype in ('application/x-ndjson', 'text/csv'):
+        stream, file_format = request.stream, 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    else:
+        return jsonify({'error': 'Upload a "file" or send application/x-ndjson or text/csv'}), 415
+    # Lines that cannot be imported are reported as errors, so the report always has the counts of what was imported
+    return jsonify(import_questions(stream, file_format, batch_size))
+
+
+@main.post('/api/quiz/<int:quiz_id>/responses')
+def api_submit_response(quiz_id):
+    """Saves a student's score for a quiz and returns the new response_id as JSON once it has been committed.
+
+    The JSON body is {"student_email": "a.student@ucl.ac.uk", "score": 7}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    email = data.get('student_email')
+    score = data.get('score')
+    if not isinstance(email, str) or '@' not in email:
+        return jsonify({'error': '"student_email" must be an email address'}), 400
+    if not isinstance(score, int) or isinstance(score, bool):
+        return jsonify({'error': '"score" must be an integer'}), 400
+    if db.session.get(Quiz, quiz_id) is None:
+        return jsonify({'error': f'Quiz {quiz_id} not found'}), 404
+
+    row = {'student_email': email, 'score': score, 'quiz_id': quiz_id}
+    try:
+        response_id = get_response_writer().submit(row, timeout=current_app.config['RESPONSE_SUBMIT_TIMEOUT'])
+    except TimeoutError:
+        # The row was taken off the queue, so it will not be saved and trying again does not add a duplicate
+        return jsonify({'error': 'The response was not saved in time, please try again'}), 503
+    except Exception as e:
+        return jsonify({'error': f'Error saving response: {e}'}), 500
+    return jsonify({'response_id': response_id}), 201
+
+
+@main.get('/api/quiz/<int:quiz_id>/stats')
+def api_quiz_stats(quiz_id):
+    """Returns the number of responses, the mean, min and max score and a histogram of the scores for a quiz."""
+    stats = get_quiz_stats(quiz_id)
+    if stats is None:
+        return jsonify({'error': f'Quiz {quiz_id} has no responses'}), 404
+    return jsonify(stats)
+
+
+@main.get('/api/quiz/<int:quiz_id>/top')
+def api_quiz_top(quiz_id):
+    """Returns the n highest scores for a quiz, highest first, where n is at most TOP_SCORES."""
+    n = request.args.get('n', TOP_SCORES, type=int)
+    if not 1 <= n <= TOP_SCORES:
+        return jsonify({'error': f'n must be between 1 and {TOP_SCORES}'}), 400
+    return jsonify({'quiz_id': quiz_id, 'top': get_top_scores(quiz_id, n)})
+
+
+@main.get('/api/medals/totals')
+@conditional_get('medal_result', 'country', 'event')
+@cached_json('medal_result', 'country', 'event')
+def api_medal_totals():
+    """Returns the all-time medal table. Optional query parameters: type (summer or winter) and limit."""
+    event_type = request.args.get('type')
+    limit = request.args.get('limit', type=int)
+    if event_type is not None and event_type not in EVENT_TYPES:
+        return {'error': f'type must be one of {", ".join(EVENT_TYPES)}'}, 400
+    if limit is not None and limit < 1:
+        return {'error': 'limit must be a positive integer'}, 400
+    return {'type': event_type, 'totals': medal_totals(event_type, limit)}
+
+
+@main.get('/api/medals/country/<code>')
+@conditional_get('medal_result', 'country', 'event')
+@cached_json('medal_result', 'country', 'event')
+def api_medal_history(code):
+    """Returns a country's medals at each event with running totals and the change in rank since its last event."""
+    history = country_history(code.upper())
+    if history is None:
+        return {'error': f'Country {code} not found'}, 404
+    return history
+
+
+@main.get('/api/medals/<event_type>/<int:year>/rank-changes')
+@conditional_get('medal_result', 'country', 'event')
+@cached_json('medal_result', 'country', 'event')
+def api_medal_rank_changes(event_type, year):
+    """Returns the medal table for an event with each country's rank at its previous event of the same type."""
+    if event_type not in EVENT_TYPES:
+        return {'error': f'type must be one of {", ".join(EVENT_TYPES)}'}, 400
+    results = rank_changes(event_type, year)
+    if not results:
+        return {'error': f'No medal results for the {year} {event_type} paralympics'}, 404
+    return {'type': event_type, 'year': year, 'results': results}
+
+
+@main.get('/api/events')
+@conditional_get('event')
+def api_events():
+    """Returns a page of events ordered by year and type.
+
+    Optional query parameters: type (summer or winter), year_from, year_to, limit and cursor (the next_cursor from the
+    previous page).
+    """
+    query = db.select(Event.event_id, Event.year, Event.type, Event.start, Event.end, Event.countries, Event.events,
+                      Event.sports, Event.url)
+    event_type = request.args.get('type')
+    if event_type:
+        query = query.where(Event.type == event_type)
+    query = filter_year_range(query, Event.year)
+    return paginated_response(query, [Event.year, Event.type])
+
+
+@main.get('/api/countries')
+@conditional_get('country')
+def api_countries():
+    """Returns a page of countries ordered by code. Optional query parameters: region, limit and cursor."""
+    query = db.select(Country.code, Country.name, Country.region, Country.sub_region, Country.member_type)
+    region = request.args.get('region')
+    if region:
+        query = query.where(Country.region == region)
+    return paginated_response(query, [Country.code])
+
+
+@main.get('/api/medal-results')
+@conditional_get('medal_result', 'event')
+def api_medal_results():
+    """Returns a page of medal results in the order they were added, which is by event and then rank.
+
+    Optional query parameters: country (the country code), type, year_from, year_to, limit and cursor.
+    """
+    query = db.select(MedalResult.result_id, MedalResult.event_id, Event.year, Event.type,
+                      MedalResult.country_code, MedalResult.rank, MedalResult.gold, MedalResult.silver,
+                      MedalResult.bronze, MedalResult.total).join(MedalResult.event)
+    country = request.args.get('country')
+    if country:
+        query = query.where(MedalResult.country_code == country.upper())
+    event_type = request.args.get('type')
+    if event_type:
+        query = query.where(Event.type == event_type)
+    query = filter_year_range(query, Event.year)
+    return paginated_response(query, [MedalResult.result_id])
+
+
+@main.get('/api/export/medals.<file_format>')
+def api_export_medals(file_format):
+    """Streams all the medal results with the country, event and host as CSV or NDJSON.
+
+    The response is gzip compressed if the client accepts gzip.
+    """
+    if file_format not in FORMATS:
+        abort(404)
+    compress = request.accept_encodings['gzip'] > 0
+    # stream_with_context keeps the request, and so the database session, open while the rows are sent
+    response = current_app.response_class(stream_with_context(export_medals(db.session, file_format, compress)),
+                                          mimetype=FORMATS[file_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=medal_results.{file_format}'
+    response.vary.add('Accept-Encoding')
+    if compress:
+        response.content_encoding = 'gzip'
+    return response
+
+
+@main.get('/search')
+def search_text():
+    """Returns the events, hosts and quiz questions that best match the q query parameter as JSON.
+
+    Each result has a snippet of the matching text as HTML with the matched words in <mark> tags, and a url for events.
+    """
+    terms = request.args.get('q', '')
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= limit <= 100:
+        return jsonify({'error': 'limit must be between 1 and 100'}), 400
+    results = search(db.session, terms, limit)
+    for result in results:
+        result['url'] = url_for('main.get_event', event_id=result['id']) if result['kind'] == 'event' else None
+    return jsonify({'query': terms, 'results': results})
+
+
+@main.get('/api/hosts/within')
+def api_hosts_within():
+    """Returns the host cities within radius_km of the lat and lon query parameters, nearest first."""
+    point = coordinates_arg()
+    radius_km = request.args.get('radius_km', type=float)
+    if point is None or radius_km is None or radius_km < 0:
+        return jsonify({'error': 'lat, lon and a positive radius_km are required'}), 400
+    return jsonify({'hosts': get_host_index().within(*point, radius_km)})
+
+
+@main.get('/api/hosts/nearest')
+def api_hosts_nearest():
+    """Returns the k (default 5) host cities nearest the lat and lon query parameters, nearest first."""
+    point = coordinates_arg()
+    k = request.args.get('k', 5, type=int)
+    if point is None or not 1 <= k <= 100:
+        return jsonify({'error': 'lat, lon and k between 1 and 100 are required'}), 400
+    return jsonify({'hosts': get_host_index().nearest(*point, k)})
+
+
+@main.get('/api/hosts.geojson')
+@conditional_get(*GEO_TABLES)
+def api_hosts_geojson():
+    """Returns the host cities and their events as a GeoJSON FeatureCollection for maps."""
+    return current_app.response_class(get_host_index().geojson, mimetype='application/geo+json')
+
+
 @main.route('/flash')
 def flash_message():
     """Renders a page with a flash message."""
@@ -133,6 +441,56 @@ def flash_message():
 # Helper functions used in the routes
 # -----------------------------------
 
+def coordinates_arg():
+    """Returns (lat, lon) from the query parameters, or None if they are missing or out of range."""
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    if lat is None or lon is None or not -90 <= lat <= 90 or not -180 <= lon <= 180:
+        return None
+    return lat, lon
+
+
+def filter_year_range(query, year_column):
+    """Adds the year_from and year_to query parameters, if given, to the query as filters on year_column."""
+    year_from = request.args.get('year_from', type=int)
+    year_to = request.args.get('year_to', type=int)
+    if year_from is not None:
+        query = query.where(year_column >= year_from)
+    if year_to is not None:
+        query = query.where(year_column <= year_to)
+    return query
+
+
+def paginated_response(query, key_columns):
+    """Returns the page of the query given by the cursor and limit query parameters as a JSON response."""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    try:
+        page = keyset_page(db.session, query, key_columns, request.args.get('cursor'), limit)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(page)
+
+
+def create_quiz(quiz_name, close_date):
+    """Adds a quiz using a single INSERT ... ON CONFLICT DO NOTHING RETURNING statement.
+
+    The unique index on quiz_name means the database, rather than a separate SELECT, detects a duplicate name, so two
+    requests for the same name at the same time cannot both add it.
+
+    Returns:
+    quiz_id (int or None): the id of the new quiz, or None if a quiz with the name already exists
+    """
+    stmt = (sqlite_insert(Quiz)
+            .values(quiz_name=quiz_name, close_date=close_date)
+            .on_conflict_do_nothing(index_elements=[Quiz.quiz_name])
+            .returning(Quiz.quiz_id))
+    quiz_id = db.session.execute(stmt).scalar_one_or_none()
+    db.session.commit()
+    return quiz_id
+
+
 def make_prediction(year, team):
     """Takes the year and team name and predicts how many total medals will be won
 
@@ -143,16 +501,42 @@ def make_prediction(year, team):
     Returns:
     prediction (str or int): int of the prediction result, or string if error
     """
-    # The predict() method fails if not in DataFrame format
-    input_data = pd.DataFrame({'Year': [year], 'Team': [team]})
-
     # Get a prediction from the model
-    with importlib.resources.open_binary('data', 'model.pkl') as file:
-        model = joblib.load(file)
+    model = model_registry.get()
     try:
-        prediction = model.predict(input_data)
+        prediction = model.predict(year, team)
         # Returns a float so convert to int and handle negative predictions
-        return max(0, int(prediction[0]))
+        return max(0, int(prediction))
     except Exception as e:
         return f"Error making prediction: {e}"
 
+
+def make_predictions(items):
+    """Takes a list of (year, team) pairs and predicts the total medals for each of them.
+
+    Parameters:
+    items (list): (year, team) tuples, year should be an int and team the name of a team on the prediction form
+
+    Returns:
+    predictions (list): a dict for each item with the year, team and either a "prediction" (int) or an "error" (str)
+    """
+    model = model_registry.get()
+    # The teams on the prediction form, only queried again after the country table changes
+    countries = teams()
+
+    results = []
+    for year, team in items:
+        result = {'year': year, 'team': team}
+        if not isinstance(year, int) or isinstance(year, bool):
+            result['error'] = 'Year must be an integer'
+        elif not isinstance(team, str):
+            result['error'] = 'Team must be a string'
+        elif team not in countries:
+            result['error'] = f'Unknown team: {team}'
+        elif team not in model.teams:
+            result['error'] = 'Insufficient data to predict a result for this team'
+        else:
+            # Returns a float so convert to int and handle negative predictions
+            result['prediction'] = max(0, int(model.predict(year, team)))
+        results.append(result)
+    return results
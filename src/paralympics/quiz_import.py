@@ -0,0 +1,266 @@
+"""
+Imports question banks into the Quiz, Question, QuizQuestion and AnswerChoice tables.
+
+The file is read one line at a time and the questions are inserted in batches, each batch using one executemany
+INSERT per table in a single transaction, so the memory used does not depend on the size of the file. Lines that
+cannot be imported are counted and reported as errors, and the rest of the file is still imported.
+
+NDJSON format, one question per line:
+{"quiz": "Summer 2024", "question": "Where were the 2024 games held?", "event_id": 17,
+ "choices": [{"text": "Paris", "value": 1, "correct": true}, {"text": "Tokyo", "value": 2, "correct": false}]}
+
+CSV format, one question per row, with the choices separated by | and the number of the correct choice (from 1):
+quiz,question,event_id,choices,correct
+Summer 2024,Where were the 2024 games held?,17,Paris|Tokyo|Rio,1
+
+To import from the command line:
+flask --app paralympics import-questions questions.ndjson
+"""
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from paralympics import db
+from paralympics.models import AnswerChoice, Event, Question, Quiz, QuizQuestion
+
+# The number of errors that are kept to report, the rest are only counted
+MAX_REPORTED_ERRORS = 20
+# The most questions held in memory and inserted in one transaction, larger batch sizes are reduced to this
+MAX_BATCH_SIZE = 10000
+# The range of an SQLite integer
+SQLITE_MIN_INT = -2 ** 63
+SQLITE_MAX_INT = 2 ** 63 - 1
+
+
+def parse_ndjson(lines):
+    """Yields (line number, record dict or error message) for each non-blank line of NDJSON."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, validate_record(json.loads(line))
+        except (ValueError, TypeError, AttributeError) as e:
+            yield line_number, f'{e}'
+
+
+def parse_csv(lines):
+    """Yields (line number, record dict or error message) for each row of CSV with a header row."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        try:
+            choices = [c.strip() for c in (row.get('choices') or '').split('|') if c.strip()]
+            correct = int(row['correct']) if row.get('correct') else None
+            record = {
+                'quiz': row.get('quiz'),
+                'question': row.get('question'),
+                'event_id': row.get('event_id') or None,
+                'choices': [{'text': text, 'value': i, 'correct': i == correct} for i, text in enumerate(choices, 1)],
+            }
+            yield reader.line_num, validate_record(record)
+        except (ValueError, TypeError) as e:
+            yield reader.line_num, f'{e}'
+
+
+def validate_record(record):
+    """Checks a parsed question and returns it with the event_id as an int, raises ValueError if it is invalid."""
+    if not isinstance(record, dict):
+        raise ValueError('Each line must be a JSON object')
+    if not record.get('quiz') or not record.get('question'):
+        raise ValueError('"quiz" and "question" are required')
+    if not isinstance(record['quiz'], str) or not isinstance(record['question'], str):
+        raise ValueError('"quiz" and "question" must be strings')
+    choices = record.get('choices') or []
+    if not isinstance(choices, list) or not all(isinstance(c, dict) and c.get('text') for c in choices):
+        raise ValueError('"choices" must be a list of objects with "text"')
+    for choice in choices:
+        if not isinstance(choice['text'], str):
+            raise ValueError('The "text" of each choice must be a string')
+        value = choice.get('value')
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            raise ValueError('The "value" of each choice must be an integer')
+    event_id = record.get('event_id')
+    return {**record, 'event_id': int(event_id) if event_id is not None else None, 'choices': choices}
+
+
+def batches(iterable, size):
+    """Yields lists of up to size items from the iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class QuestionImporter:
+    """Inserts parsed questions in batches and keeps count of what has been imported."""
+
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        self.quiz_ids = {}
+        self.counts = {'rows': 0, 'questions': 0, 'choices': 0, 'quiz_links': 0, 'quizzes': 0, 'errors': 0}
+        self.errors = []
+
+    def run(self, parsed):
+        """Imports the (line number, record or error) pairs from parse_ndjson() or parse_csv().
+
+        Returns:
+        report (dict): the counts, up to MAX_REPORTED_ERRORS errors, the time taken and the rows per second
+        """
+        start = time.perf_counter()
+        try:
+            for batch in batches(parsed, self.batch_size):
+                records = []
+                for line_number, record in batch:
+                    self.counts['rows'] += 1
+                    if isinstance(record, str):
+                        self.add_error(line_number, record)
+                    else:
+                        records.append((line_number, record))
+                if records:
+                    self.insert_records(records)
+        except (ValueError, csv.Error) as e:
+            # The file cannot be read any further, e.g. it is not UTF-8, so report what was imported before it
+            self.add_error(None, f'Stopped reading the file: {e}')
+        seconds = time.perf_counter() - start
+        return {**self.counts,
+                'error_details': self.errors,
+                'seconds': seconds,
+                'rows_per_second': self.counts['rows'] / seconds if seconds else None}
+
+    def add_error(self, line_number, message):
+        """Counts an error and keeps it to report if there are fewer than MAX_REPORTED_ERRORS."""
+        self.counts['errors'] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def insert_records(self, records):
+        """Inserts a batch of (line number, record) pairs.
+
+        Records with an event_id that is not in the event table are reported as errors and not inserted. This is
+        checked here as SQLite does not enforce the foreign key, PRAGMA foreign_keys is not enabled on the connections.
+        If the batch fails, each record is inserted in its own transaction so that only the records that fail are
+        reported as errors.
+        """
+        records = self.check_event_ids(records)
+        if not records:
+            return
+        try:
+            self.insert_batch([record for line_number, record in records])
+        except (SQLAlchemyError, OverflowError):
+            for line_number, record in records:
+                try:
+                    self.insert_batch([record])
+                except (SQLAlchemyError, OverflowError) as e:
+                    # Report the database error message without the SQL statement and parameters
+                    self.add_error(line_number, str(getattr(e, 'orig', None) or e))
+
+    def check_event_ids(self, records):
+        """Reports the records whose event_id is not in the event table as errors and returns the other records.
+
+        The event_ids of the batch are looked up with one query.
+        """
+        event_ids = {record['event_id'] for line_number, record in records if record['event_id'] is not None}
+        # Values too large for an SQLite integer cannot be bound as parameters, and cannot be in the table
+        lookup = [event_id for event_id in event_ids if SQLITE_MIN_INT <= event_id <= SQLITE_MAX_INT]
+        existing = set()
+        if lookup:
+            existing = set(db.session.scalars(db.select(Event.event_id).where(Event.event_id.in_(lookup))))
+        valid = []
+        for line_number, record in records:
+            if record['event_id'] is None or record['event_id'] in existing:
+                valid.append((line_number, record))
+            else:
+                self.add_error(line_number, f'event_id {record["event_id"]} is not in the event table')
+        return valid
+
+    def insert_batch(self, records):
+        """Inserts the questions, answer choices and quiz links for a batch of records in one transaction."""
+        try:
+            self.resolve_quizzes({record['quiz'] for record in records})
+
+            # Insert the questions and get the new question_id values in the same order as the rows
+            stmt = db.insert(Question.__table__).returning(Question.question_id, sort_by_parameter_order=True)
+            question_rows = [{'question': r['question'], 'event_id': r['event_id']} for r in records]
+            question_ids = db.session.execute(stmt, question_rows).scalars().all()
+
+            choices = []
+            links = []
+            for record, question_id in zip(records, question_ids):
+                links.append({'quiz_id': self.quiz_ids[record['quiz']], 'question_id': question_id})
+                for i, choice in enumerate(record['choices'], start=1):
+                    choices.append({'question_id': question_id,
+                                    'choice_text': choice['text'],
+                                    'choice_value': choice.get('value', i),
+                                    'is_correct': 1 if choice.get('correct') else 0})
+            if choices:
+                db.session.execute(db.insert(AnswerChoice.__table__), choices)
+            db.session.execute(db.insert(QuizQuestion.__table__), links)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # The quizzes added in this batch were rolled back, so look them up again in the next batch
+            self.quiz_ids.clear()
+            raise
+
+        self.counts['questions'] += len(question_ids)
+        self.counts['choices'] += len(choices)
+        self.counts['quiz_links'] += len(links)
+
+    def resolve_quizzes(self, names):
+        """Finds the quiz_id for each quiz name, adding quizzes that do not exist yet."""
+        missing = [name for name in names if name not in self.quiz_ids]
+        if not missing:
+            return
+        stmt = sqlite_insert(Quiz.__table__).on_conflict_do_nothing(index_elements=['quiz_name'])
+        result = db.session.execute(stmt, [{'quiz_name': name} for name in missing])
+        self.counts['quizzes'] += max(result.rowcount, 0)
+        query = db.select(Quiz.quiz_name, Quiz.quiz_id).where(Quiz.quiz_name.in_(missing))
+        self.quiz_ids.update(db.session.execute(query).tuples().all())
+
+
+def import_questions(stream, file_format, batch_size=1000):
+    """Imports questions from a binary or text file-like object.
+
+    Parameters:
+    stream: the file, read one line at a time
+    file_format (str): 'ndjson' or 'csv'
+    batch_size (int): the number of questions inserted in each transaction
+
+    Returns:
+    report (dict): see QuestionImporter.run()
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    if file_format == 'ndjson':
+        parsed = parse_ndjson(stream)
+    elif file_format == 'csv':
+        parsed = parse_csv(stream)
+    else:
+        raise ValueError(f'Unknown format "{file_format}", must be "ndjson" or "csv"')
+    return QuestionImporter(batch_size).run(parsed)
+
+
+def format_from_filename(filename):
+    """Returns 'csv' for a .csv file name, otherwise 'ndjson'."""
+    return 'csv' if filename and filename.lower().endswith('.csv') else 'ndjson'
+
+
+@click.command('import-questions')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True, type=click.IntRange(1, MAX_BATCH_SIZE, clamp=True),
+              help='Questions inserted in each transaction.')
+@with_appcontext
+def import_questions_command(path, batch_size):
+    """Import quiz questions from an NDJSON or CSV file."""
+    with open(path, encoding='utf-8', newline='') as f:
+        report = import_questions(f, format_from_filename(path), batch_size)
+    click.echo(f"Imported {report['questions']} questions, {report['choices']} answer choices and "
+               f"{report['quiz_links']} quiz links from {report['rows']} rows in {report['seconds']:.2f} s "
+               f"({report['rows_per_second'] or 0:.0f} rows/s), {report['errors']} errors")
+    for error in report['error_details']:
+        click.echo(f"Line {error['line']}: {error['error']}")
@@ -0,0 +1,192 @@
+"""
+Keeps a summary of the student responses for each quiz so that stats and leaderboards do not scan student_response.
+
+For each quiz there is one quiz_summary row (the count, total, lowest and highest score), a quiz_score_bucket row for
+each histogram bucket with responses in it, and up to TOP_SCORES quiz_top_score rows for the highest scores.
+update_summaries() is called by the ResponseWriter in the same transaction as the insert into student_response, so
+the summaries always match the responses that have been committed. It only adds to the summaries, so responses must
+only be written through the ResponseWriter; after changing student_response any other way, run:
+flask --app paralympics rebuild-quiz-summaries
+"""
+from collections import defaultdict
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from paralympics import db
+from paralympics.models import QuizScoreBucket, QuizSummary, QuizTopScore, StudentResponse
+
+# The width of each histogram bucket, e.g. 1 gives a bucket per score and 10 gives 0-9, 10-19 and so on
+SCORE_BUCKET_WIDTH = 1
+# The number of highest scores kept for each quiz
+TOP_SCORES = 10
+
+
+def update_summaries(conn, rows, response_ids):
+    """Add newly inserted student responses to the summaries for their quizzes.
+
+    Parameters:
+    conn: the connection with the transaction that inserted the responses
+    rows (list): the inserted rows, dicts with student_email, score and quiz_id
+    response_ids (list): the response_id of each row
+    """
+    summaries = {}
+    buckets = defaultdict(int)
+    top = defaultdict(list)
+    for row, response_id in zip(rows, response_ids):
+        quiz_id, score = row['quiz_id'], row.get('score')
+        summary = summaries.setdefault(quiz_id, {'quiz_id': quiz_id, 'response_count': 0, 'scored_count': 0,
+                                                 'score_total': 0, 'score_min': None, 'score_max': None})
+        summary['response_count'] += 1
+        if score is None:
+            continue
+        summary['scored_count'] += 1
+        summary['score_total'] += score
+        summary['score_min'] = score if summary['score_min'] is None else min(summary['score_min'], score)
+        summary['score_max'] = score if summary['score_max'] is None else max(summary['score_max'], score)
+        buckets[quiz_id, score // SCORE_BUCKET_WIDTH * SCORE_BUCKET_WIDTH] += 1
+        top[quiz_id].append({'response_id': response_id, 'quiz_id': quiz_id,
+                             'student_email': row['student_email'], 'score': score})
+    if not summaries:
+        return
+
+    stmt = sqlite_insert(QuizSummary.__table__)
+    stmt = stmt.on_conflict_do_update(index_elements=['quiz_id'], set_={
+        'response_count': QuizSummary.response_count + stmt.excluded.response_count,
+        'scored_count': QuizSummary.scored_count + stmt.excluded.scored_count,
+        'score_total': QuizSummary.score_total + stmt.excluded.score_total,
+        # min() and max() with more than one argument return NULL if any argument is NULL
+        'score_min': func.min(func.coalesce(QuizSummary.score_min, stmt.excluded.score_min),
+                              func.coalesce(stmt.excluded.score_min, QuizSummary.score_min)),
+        'score_max': func.max(func.coalesce(QuizSummary.score_max, stmt.excluded.score_max),
+                              func.coalesce(stmt.excluded.score_max, QuizSummary.score_max)),
+    })
+    conn.execute(stmt, list(summaries.values()))
+
+    if buckets:
+        stmt = sqlite_insert(QuizScoreBucket.__table__)
+        stmt = stmt.on_conflict_do_update(index_elements=['quiz_id', 'bucket'], set_={
+            'response_count': QuizScoreBucket.response_count + stmt.excluded.response_count})
+        conn.execute(stmt, [{'quiz_id': quiz_id, 'bucket': bucket, 'response_count': count}
+                            for (quiz_id, bucket), count in buckets.items()])
+
+    if top:
+        # Only the best TOP_SCORES responses in the batch for each quiz can be in its top scores
+        candidates = [row for quiz_rows in top.values() for row in sorted(quiz_rows, key=top_score_order)[:TOP_SCORES]]
+        conn.execute(insert(QuizTopScore.__table__), candidates)
+        for quiz_id in top:
+            conn.execute(delete(QuizTopScore).where(
+                QuizTopScore.quiz_id == quiz_id,
+                QuizTopScore.response_id.not_in(top_scores_query(quiz_id, TOP_SCORES).with_only_columns(
+                    QuizTopScore.response_id))))
+
+
+def top_score_order(row):
+    """Sort key for the leaderboard, highest score first and then the earliest response."""
+    return -row['score'], row['response_id']
+
+
+def top_scores_query(quiz_id, limit):
+    """Select the top scores for a quiz from quiz_top_score, highest first."""
+    return (select(QuizTopScore.response_id, QuizTopScore.student_email, QuizTopScore.score)
+            .where(QuizTopScore.quiz_id == quiz_id)
+            .order_by(QuizTopScore.score.desc(), QuizTopScore.response_id)
+            .limit(limit))
+
+
+def get_quiz_stats(quiz_id):
+    """Return the count, mean, min, max and histogram of the scores for a quiz, or None if it has no responses."""
+    summary = db.session.get(QuizSummary, quiz_id)
+    if summary is None:
+        return None
+    buckets = db.session.execute(
+        select(QuizScoreBucket.bucket, QuizScoreBucket.response_count)
+        .where(QuizScoreBucket.quiz_id == quiz_id)
+        .order_by(QuizScoreBucket.bucket)).tuples()
+    return {
+        'quiz_id': quiz_id,
+        'responses': summary.response_count,
+        'scored': summary.scored_count,
+        'mean': summary.score_total / summary.scored_count if summary.scored_count else None,
+        'min': summary.score_min,
+        'max': summary.score_max,
+        'histogram': [{'from': bucket, 'to': bucket + SCORE_BUCKET_WIDTH - 1, 'count': count}
+                      for bucket, count in buckets],
+    }
+
+
+def get_top_scores(quiz_id, limit=TOP_SCORES):
+    """Return up to limit (at most TOP_SCORES) of the highest scores for a quiz, highest first."""
+    rows = db.session.execute(top_scores_query(quiz_id, min(limit, TOP_SCORES))).mappings()
+    return [dict(row) for row in rows]
+
+
+def summary_snapshot():
+    """Return the contents of the summary tables, used to compare them before and after a rebuild."""
+    return {
+        'summaries': {row.quiz_id: tuple(row[1:]) for row in db.session.execute(
+            select(QuizSummary.quiz_id, QuizSummary.response_count, QuizSummary.scored_count,
+                   QuizSummary.score_total, QuizSummary.score_min, QuizSummary.score_max))},
+        'buckets': set(db.session.execute(select(QuizScoreBucket.quiz_id, QuizScoreBucket.bucket,
+                                                 QuizScoreBucket.response_count)).tuples()),
+        'top': set(db.session.execute(select(QuizTopScore.quiz_id, QuizTopScore.response_id)).tuples()),
+    }
+
+
+def rebuild_summaries():
+    """Recompute all the summary tables from student_response in one transaction.
+
+    Returns:
+    changed (set): the quiz_id of each quiz whose summary was different before the rebuild
+    """
+    before = summary_snapshot()
+    for model in (QuizSummary, QuizScoreBucket, QuizTopScore):
+        db.session.execute(delete(model))
+
+    score = StudentResponse.score
+    db.session.execute(insert(QuizSummary).from_select(
+        ['quiz_id', 'response_count', 'scored_count', 'score_total', 'score_min', 'score_max'],
+        select(StudentResponse.quiz_id, func.count(), func.count(score), func.coalesce(func.sum(score), 0),
+               func.min(score), func.max(score))
+        .where(StudentResponse.quiz_id.is_not(None))
+        .group_by(StudentResponse.quiz_id)))
+
+    # The SQLite % operator keeps the sign of the score, so this rounds down like // in update_summaries()
+    bucket = (score - ((score % SCORE_BUCKET_WIDTH) + SCORE_BUCKET_WIDTH) % SCORE_BUCKET_WIDTH).label('bucket')
+    db.session.execute(insert(QuizScoreBucket).from_select(
+        ['quiz_id', 'bucket', 'response_count'],
+        select(StudentResponse.quiz_id, bucket, func.count())
+        .where(StudentResponse.quiz_id.is_not(None), score.is_not(None))
+        .group_by(StudentResponse.quiz_id, bucket)))
+
+    rank = func.row_number().over(partition_by=StudentResponse.quiz_id,
+                                  order_by=(score.desc(), StudentResponse.response_id)).label('rank')
+    ranked = (select(StudentResponse.response_id, StudentResponse.quiz_id, StudentResponse.student_email, score, rank)
+              .where(StudentResponse.quiz_id.is_not(None), score.is_not(None))
+              .subquery())
+    db.session.execute(insert(QuizTopScore).from_select(
+        ['response_id', 'quiz_id', 'student_email', 'score'],
+        select(ranked.c.response_id, ranked.c.quiz_id, ranked.c.student_email, ranked.c.score)
+        .where(ranked.c.rank <= TOP_SCORES)))
+    db.session.commit()
+
+    after = summary_snapshot()
+    changed = {quiz_id for quiz_id in before['summaries'].keys() | after['summaries'].keys()
+               if before['summaries'].get(quiz_id) != after['summaries'].get(quiz_id)}
+    changed |= {row[0] for row in before['buckets'] ^ after['buckets']}
+    changed |= {row[0] for row in before['top'] ^ after['top']}
+    return changed
+
+
+@click.command('rebuild-quiz-summaries')
+@with_appcontext
+def rebuild_quiz_summaries_command():
+    """Recompute the quiz score summaries from the student responses."""
+    changed = rebuild_summaries()
+    if changed:
+        click.echo(f'Rebuilt the quiz summaries, these quizzes were out of date: '
+                   f'{", ".join(str(quiz_id) for quiz_id in sorted(changed))}')
+    else:
+        click.echo('Rebuilt the quiz summaries, they were all up to date.')
@@ -0,0 +1,71 @@
+"""
+An optional second, read-only database engine used for GET requests.
+
+When SQLALCHEMY_READ_ONLY_ENGINE is True, a second engine opens the same SQLite file with mode=ro. The session uses
+it for GET and HEAD requests, which only read data, and uses the main engine for all other requests so writes such
+as adding a quiz are unchanged. With the WAL journal mode (see sqlite_profile.py) reads on the read-only engine are
+not blocked by writes.
+
+If the database file is never written while the app runs, e.g. a database snapshot that is only read, set
+SQLALCHEMY_READ_ONLY_IMMUTABLE to True as well so that SQLite does not use any locks for reads.
+"""
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+from paralympics.sqlite_profile import apply_pragmas, get_pragmas
+
+# These PRAGMAs change the database file so they cannot be set on a read-only connection
+WRITE_PRAGMAS = {'journal_mode', 'synchronous', 'wal_autocheckpoint'}
+
+
+class ReadRoutingSession(Session):
+    """A session that uses the read-only engine, if there is one, during GET and HEAD requests."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context() and g.get('read_only_request') and not self._flushing:
+            engine = current_app.extensions.get('read_engine')
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only_uri(path, immutable=False):
+    """Returns the SQLAlchemy URI to open the SQLite database file read-only."""
+    uri = f'sqlite:///file:{path}?mode=ro&uri=true'
+    if immutable:
+        uri += '&immutable=1'
+    return uri
+
+
+def init_app(app):
+    """Create the read-only engine for the app's database file and use it for GET and HEAD requests.
+
+    Does nothing unless SQLALCHEMY_READ_ONLY_ENGINE is True in the app config. Must be called in an app context.
+    """
+    if not app.config.get('SQLALCHEMY_READ_ONLY_ENGINE'):
+        return
+
+    # Use the path the main engine opened, Flask-SQLAlchemy makes a relative path relative to the instance folder
+    from paralympics import db
+    path = db.engine.url.database
+    if not path or path == ':memory:':
+        raise ValueError('A read-only engine needs a SQLite database file')
+    engine = create_engine(read_only_uri(path, app.config.get('SQLALCHEMY_READ_ONLY_IMMUTABLE')))
+    pragmas = {name: value for name, value in get_pragmas(app.config).items() if name not in WRITE_PRAGMAS}
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    app.extensions['read_engine'] = engine
+
+    @app.before_request
+    def use_read_engine():
+        g.read_only_request = request.method in ('GET', 'HEAD')
+
+
+def get_read_engine():
+    """Returns the read-only engine for the current app, or the main engine if there is no read-only engine."""
+    from paralympics import db
+    return current_app.extensions.get('read_engine') or db.engine
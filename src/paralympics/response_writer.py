@@ -0,0 +1,213 @@
+"""
+Writes StudentResponse rows from many requests using a single writer thread that groups them into transactions.
+
+Each request puts its row on a queue and waits. The writer thread takes the rows that are waiting, up to
+RESPONSE_BATCH_SIZE rows or until RESPONSE_BATCH_WAIT_MS has passed since the first one, inserts them with one
+executemany INSERT and commits. Each request is then told the response_id of its row, so a request only returns once
+its row has been committed. With SQLite only one transaction can write at a time, so one commit for many rows gives
+far more submissions per second than one commit per request, which is what happens when a whole class submits as a
+quiz closes. If a transaction fails, its rows are written again one at a time, so a row that cannot be written only
+fails its own request.
+
+To compare the two from the command line:
+python -m paralympics.response_writer
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+from flask import current_app
+
+from paralympics.models import StudentResponse
+from paralympics.quiz_summary import update_summaries
+
+
+class ResponseWriter:
+    """Queue of responses waiting to be written and the thread that writes them.
+
+    Parameters:
+    engine: the SQLAlchemy engine to write to
+    batch_size (int): the most rows written in one transaction
+    batch_wait (float): the most time in seconds the first row in a batch waits for more rows
+    on_commit: function called with no arguments after each batch commits
+    """
+
+    def __init__(self, engine, batch_size=500, batch_wait=0.001, on_commit=None):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.on_commit = on_commit
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {'rows': 0, 'batches': 0, 'errors': 0, 'largest_batch': 0}
+
+    def submit(self, row, timeout=None):
+        """Add a response and wait until it has been committed.
+
+        Parameters:
+        row (dict): the student_email, score and quiz_id of the response
+        timeout (float): the most time in seconds to wait, concurrent.futures.TimeoutError is raised if it takes longer
+
+        Returns:
+        response_id (int): the id of the new row
+
+        Raises:
+        TimeoutError: if the row was still waiting in the queue after timeout seconds, it is removed so it is never
+        written and can safely be submitted again
+        the exception raised by the INSERT or commit if the row could not be written
+        """
+        future = self.submit_async(row)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise
+        # The row is already being written, so wait for the result rather than leave it to be saved after a retry
+        return future.result()
+
+    def submit_async(self, row):
+        """Add a response and return a Future that is given the response_id once the row has been committed."""
+        self._start()
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def close(self):
+        """Write the responses that are waiting and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self):
+        """Return the number of rows and batches written so far, and the number of rows that could not be written."""
+        return dict(self._stats)
+
+    def _start(self):
+        # The thread is started by the first submission, so apps and commands that never write responses do not
+        # have one
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='response-writer', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            # Leave out rows whose caller has given up waiting, and stop the others from being cancelled
+            batch = [(row, future) for row, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        rows = [row for row, future in batch]
+        try:
+            with self.engine.begin() as conn:
+                response_ids = self.write_batch(conn, rows)
+        except Exception as e:
+            if len(batch) > 1:
+                # Write the rows one at a time so that only the rows that fail are given the exception
+                for item in batch:
+                    self._write([item])
+                return
+            self._stats['errors'] += 1
+            batch[0][1].set_exception(e)
+            return
+        if self.on_commit:
+            self.on_commit()
+        self._stats['rows'] += len(rows)
+        self._stats['batches'] += 1
+        self._stats['largest_batch'] = max(self._stats['largest_batch'], len(rows))
+        for (row, future), response_id in zip(batch, response_ids):
+            future.set_result(response_id)
+
+    def write_batch(self, conn, rows):
+        """Insert the rows and update the quiz summaries in the transaction on conn.
+
+        Returns:
+        response_ids (list): the response_id of each row, in the same order as the rows
+        """
+        stmt = StudentResponse.__table__.insert().returning(StudentResponse.response_id, sort_by_parameter_order=True)
+        response_ids = conn.execute(stmt, rows).scalars().all()
+        update_summaries(conn, rows, response_ids)
+        return response_ids
+
+
+def init_app(app, engine):
+    """Create the ResponseWriter for the app."""
+    app.extensions['response_writer'] = ResponseWriter(engine,
+                                                       batch_size=app.config['RESPONSE_BATCH_SIZE'],
+                                                       batch_wait=app.config['RESPONSE_BATCH_WAIT_MS'] / 1000)
+
+
+def get_response_writer():
+    """Return the ResponseWriter for the current app."""
+    return current_app.extensions['response_writer']
+
+
+def benchmark(submissions=2000, threads=50):
+    """Print the submissions per second with one commit per request and with the ResponseWriter.
+
+    Each of the threads acts as a client submitting responses one after another to a new database file, using each of
+    the SQLite profiles.
+    """
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    from pathlib import Path
+
+    from sqlalchemy import create_engine, event
+
+    from paralympics.sqlite_profile import PROFILES, apply_pragmas
+
+    def commit_per_request(engine):
+        def submit(row):
+            with engine.begin() as conn:
+                conn.execute(StudentResponse.__table__.insert(), row)
+        return submit, None
+
+    def group_commit(engine):
+        writer = ResponseWriter(engine)
+        return writer.submit, writer.close
+
+    rows = [{'student_email': f'student{i}@example.com', 'score': i % 11, 'quiz_id': 1} for i in range(submissions)]
+    for profile, pragmas in PROFILES.items():
+        for name, make_submit in [('commit per request', commit_per_request), ('group commit', group_commit)]:
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = create_engine(f'sqlite:///{Path(tmp) / "benchmark.sqlite"}',
+                                       connect_args={'timeout': 60}, pool_size=threads)
+                event.listen(engine, 'connect', lambda conn, record: apply_pragmas(conn, pragmas))
+                StudentResponse.metadata.create_all(engine)
+                submit, close = make_submit(engine)
+                start = time.perf_counter()
+                with ThreadPoolExecutor(threads) as executor:
+                    list(executor.map(submit, rows))
+                seconds = time.perf_counter() - start
+                if close:
+                    close()
+                engine.dispose()
+            print(f'{profile} profile, {name}: {submissions} submissions from {threads} threads in {seconds:.2f} s '
+                  f'({submissions / seconds:.0f} submissions/s)')
+
+
+if __name__ == '__main__':
+    benchmark()
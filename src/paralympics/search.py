@@ -0,0 +1,199 @@
+"""
+Full-text search over the event highlights, host names and quiz questions using an SQLite FTS5 table.
+
+search_index has a title and a body column for each event, host and question. Its rowid is the id of the row that
+was indexed times 4 plus a number for the table (see KINDS), so triggers on the event, host and question tables can
+update or delete the row for a change with a rowid lookup. The triggers keep the index in step with the tables, in
+the same transaction as the change.
+
+Matches are found using the full-text index rather than scanning every row as LIKE '%term%' does, and are ranked by
+bm25() with matches in the title weighted higher than in the body. Words are not stemmed, as the porter stemmer stops
+prefixes of a word that is still being typed from matching (e.g. toky* is stemmed to toki*), instead the last word is
+matched as a prefix so wheelchair finds wheelchairs.
+
+To compare the search with LIKE on a synthetic set of 100,000 questions:
+python -m paralympics.search
+"""
+import html
+import re
+
+from sqlalchemy import inspect, text
+
+# The number added to id * 4 to make the rowid in search_index for each table
+KINDS = {1: 'event', 2: 'host', 3: 'question'}
+
+SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')""",
+
+    """CREATE TRIGGER IF NOT EXISTS event_search_insert AFTER INSERT ON event BEGIN
+        INSERT INTO search_index (rowid, title, body)
+        VALUES (new.event_id * 4 + 1, new.year || ' ' || new.type || ' paralympics', new.highlights);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_update AFTER UPDATE OF year, type, highlights ON event BEGIN
+        DELETE FROM search_index WHERE rowid = old.event_id * 4 + 1;
+        INSERT INTO search_index (rowid, title, body)
+        VALUES (new.event_id * 4 + 1, new.year || ' ' || new.type || ' paralympics', new.highlights);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS event_search_delete AFTER DELETE ON event BEGIN
+        DELETE FROM search_index WHERE rowid = old.event_id * 4 + 1;
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS host_search_insert AFTER INSERT ON host BEGIN
+        INSERT INTO search_index (rowid, title, body) VALUES (new.host_id * 4 + 2, new.host, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS host_search_update AFTER UPDATE OF host ON host BEGIN
+        DELETE FROM search_index WHERE rowid = old.host_id * 4 + 2;
+        INSERT INTO search_index (rowid, title, body) VALUES (new.host_id * 4 + 2, new.host, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS host_search_delete AFTER DELETE ON host BEGIN
+        DELETE FROM search_index WHERE rowid = old.host_id * 4 + 2;
+    END""",
+
+    """CREATE TRIGGER IF NOT EXISTS question_search_insert AFTER INSERT ON question BEGIN
+        INSERT INTO search_index (rowid, title, body) VALUES (new.question_id * 4 + 3, '', new.question);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS question_search_update AFTER UPDATE OF question ON question BEGIN
+        DELETE FROM search_index WHERE rowid = old.question_id * 4 + 3;
+        INSERT INTO search_index (rowid, title, body) VALUES (new.question_id * 4 + 3, '', new.question);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS question_search_delete AFTER DELETE ON question BEGIN
+        DELETE FROM search_index WHERE rowid = old.question_id * 4 + 3;
+    END""",
+]
+
+REBUILD_SQL = [
+    "DELETE FROM search_index",
+    """INSERT INTO search_index (rowid, title, body)
+       SELECT event_id * 4 + 1, year || ' ' || type || ' paralympics', highlights FROM event""",
+    "INSERT INTO search_index (rowid, title, body) SELECT host_id * 4 + 2, host, '' FROM host",
+    "INSERT INTO search_index (rowid, title, body) SELECT question_id * 4 + 3, '', question FROM question",
+]
+
+# Title matches count 5 times as much as body matches, lower bm25() values are better matches
+SEARCH_SQL = text("""
+    SELECT rowid, title, snippet(search_index, -1, char(2), char(3), '…', 16) AS snippet,
+        bm25(search_index, 5.0, 1.0) AS score
+    FROM search_index
+    WHERE search_index MATCH :query
+    ORDER BY score
+    LIMIT :limit
+""")
+
+
+def create_search_index(engine):
+    """Create the search_index table and the triggers that keep it up to date, if they do not exist.
+
+    If the table is created, it is filled from the rows already in the event, host and question tables.
+
+    Returns:
+    created (bool): True if the table was created
+    """
+    created = not inspect(engine).has_table('search_index')
+    with engine.begin() as conn:
+        for statement in SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+        if created:
+            rebuild_search_index(conn)
+    return created
+
+
+def rebuild_search_index(conn):
+    """Replace the contents of search_index with the current event, host and question rows."""
+    for statement in REBUILD_SQL:
+        conn.exec_driver_sql(statement)
+
+
+def match_query(terms):
+    """Convert search text to an FTS5 query that matches rows with all the words, the last word as a prefix.
+
+    Each word is quoted, so characters that have a meaning in FTS5 queries are ignored rather than causing an error.
+    Returns None if there are no words.
+    """
+    words = re.findall(r'\w+', terms)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words) + '*'
+
+
+def highlight(snippet):
+    """Escape the snippet for HTML and wrap the matched words, marked by char(2) and char(3), in <mark> tags."""
+    return html.escape(snippet or '').replace('\x02', '<mark>').replace('\x03', '</mark>')
+
+
+def search(session, terms, limit=20):
+    """Return the best matches for the search text.
+
+    Returns:
+    results (list): dicts with the kind ('event', 'host' or 'question'), id, title, HTML snippet and score
+    """
+    query = match_query(terms)
+    if query is None:
+        return []
+    rows = session.execute(SEARCH_SQL, {'query': query, 'limit': limit})
+    return [{'kind': KINDS[row.rowid % 4], 'id': row.rowid // 4, 'title': row.title,
+             'snippet': highlight(row.snippet), 'score': row.score} for row in rows]
+
+
+def benchmark(rows=100_000, repeat=20):
+    """Print the time to search a synthetic set of questions using LIKE '%term%' and using search_index."""
+    import random
+    import tempfile
+    import time
+    from pathlib import Path
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from paralympics.models import Event, Host, Question
+
+    rng = random.Random(23)
+    # Each question has common words, which are in about a quarter of the questions, and rarer words from a larger
+    # vocabulary, like names of athletes and places
+    common = ('athlete wheelchair basketball swimming record medal gold silver bronze sprint relay marathon archery '
+              'fencing rowing cycling tennis rugby skiing curling biathlon hockey snowboard host city opening '
+              'ceremony team country world champion final heat qualify stadium village volunteer').split()
+    syllables = 'ka lo mi ne ru sa ti vo ze pa de gu ri ho an el or us'.split()
+    rare = sorted({''.join(rng.choices(syllables, k=4)) for _ in range(20000)})
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite:///{Path(tmp) / "search.sqlite"}')
+        for table in (Event.__table__, Host.__table__, Question.__table__):
+            table.create(engine)
+        create_search_index(engine)
+        with engine.begin() as conn:
+            conn.execute(Question.__table__.insert(),
+                         [{'question': ' '.join(rng.choices(common, k=10) + rng.choices(rare, k=3)) + '?'}
+                          for i in range(rows)])
+
+        with Session(engine) as session:
+            for term in (rare[100], f'{rare[200]} {rare[300]}', rare[400][:6], 'curling', 'wheelchair rugby'):
+                like_terms = [f'%{word}%' for word in term.split()]
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    query = Question.__table__.select()
+                    for like in like_terms:
+                        query = query.where(Question.question.like(like))
+                    like_count = len(session.execute(query.limit(20)).all())
+                like_ms = (time.perf_counter() - start) / repeat * 1000
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    fts_count = len(search(session, term))
+                fts_ms = (time.perf_counter() - start) / repeat * 1000
+                print(f'"{term}" in {rows} questions, top 20: LIKE {like_ms:.2f} ms ({like_count} rows), '
+                      f'search_index {fts_ms:.2f} ms ({fts_count} rows, ranked)')
+
+                # Without a LIMIT, LIKE has to scan every row, as it does to rank or count the matches
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    session.execute(query.with_only_columns(Question.question_id)).all()
+                like_all_ms = (time.perf_counter() - start) / repeat * 1000
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    session.execute(text('SELECT rowid FROM search_index WHERE search_index MATCH :query'),
+                                    {'query': match_query(term)}).all()
+                fts_all_ms = (time.perf_counter() - start) / repeat * 1000
+                print(f'"{term}" all matches: LIKE {like_all_ms:.2f} ms, search_index {fts_all_ms:.2f} ms')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,75 @@
+"""
+Create the database by cloning a prebuilt, already seeded SQLite database file.
+
+When `DATABASE_SNAPSHOT` is set in the app config, create_app() copies that file to the database location instead of
+creating the tables and adding the data. This avoids every worker process repeating the schema and seed work and
+racing each other to do it.
+
+To build a snapshot from the app's seeded database:
+flask --app paralympics build-snapshot path/to/snapshot.db
+"""
+import os
+import sqlite3
+import tempfile
+
+import click
+from flask import current_app
+from sqlalchemy.engine import make_url
+
+
+def database_path(uri, instance_path):
+    """Return the file path for a SQLite SQLAlchemy database URI.
+
+    A relative path is relative to the app's instance folder, the same as Flask-SQLAlchemy opens it.
+    """
+    path = make_url(uri).database
+    if not path or path == ':memory:':
+        raise ValueError(f'A database snapshot needs a SQLite database file, not {uri}')
+    return os.path.join(instance_path, path)
+
+
+def copy_database(source, target):
+    """Copy a SQLite database using the sqlite3 backup API, which gives a consistent copy even if it is in use."""
+    src = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+    dst = sqlite3.connect(target)
+    try:
+        with dst:
+            src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def clone_database(source, target):
+    """Create the target database as a copy of the source database if the target does not already exist.
+
+    The copy is written to a temporary file which is then hard linked to the target name. Creating the link fails if
+    the target exists, so when several processes start at once only one copy is used and a database that another
+    process already has open is never replaced.
+
+    Returns:
+    cloned (bool): True if the target was created, False if it already existed
+    """
+    if os.path.exists(target):
+        return False
+    if not os.path.exists(source):
+        raise FileNotFoundError(f'Database snapshot {source} does not exist')
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), suffix='.tmp')
+    os.close(fd)
+    try:
+        copy_database(source, tmp)
+        os.link(tmp, target)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.unlink(tmp)
+
+
+@click.command('build-snapshot')
+@click.argument('path', type=click.Path(dir_okay=False))
+def build_snapshot_command(path):
+    """Copy the app's seeded database to PATH so it can be used as the DATABASE_SNAPSHOT."""
+    copy_database(database_path(current_app.config['SQLALCHEMY_DATABASE_URI'], current_app.instance_path), path)
+    click.echo(f'Saved the database snapshot to {path}')
@@ -0,0 +1,68 @@
+"""
+SQLite connection settings (PRAGMAs) that are applied to every new database connection.
+
+SQLite's defaults are a rollback journal, full sync on every commit, a small page cache and no memory mapping. With
+several worker processes this means a write blocks readers while it commits. The 'production' profile uses
+write-ahead logging (WAL) so reads continue while another connection writes, and a busy timeout so a writer waits
+for the lock instead of failing with "database is locked".
+
+Set SQLITE_PROFILE in the app config to the name of a profile, and optionally SQLITE_PRAGMAS to a dict of PRAGMA
+values that override the profile.
+"""
+import re
+
+from sqlalchemy import event
+
+PROFILES = {
+    # SQLite defaults
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        # With WAL, NORMAL only syncs at checkpoints. A commit may be lost on power failure but not corrupt the database
+        'synchronous': 'NORMAL',
+        # Negative values are in KiB, so this is a 64 MiB page cache per connection
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+ALLOWED_PRAGMAS = {'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'busy_timeout', 'temp_store',
+                   'foreign_keys', 'wal_autocheckpoint'}
+
+
+def get_pragmas(config):
+    """Returns the dict of PRAGMA names and values for the SQLITE_PROFILE and SQLITE_PRAGMAS in the config."""
+    profile = config.get('SQLITE_PROFILE') or 'default'
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown SQLITE_PROFILE "{profile}", must be one of {list(PROFILES)}')
+    pragmas = dict(PROFILES[profile])
+    pragmas.update(config.get('SQLITE_PRAGMAS') or {})
+    for name, value in pragmas.items():
+        # PRAGMA statements cannot use parameters, so only allow known names and simple values
+        if name not in ALLOWED_PRAGMAS or not re.fullmatch(r'-?\w+', str(value)):
+            raise ValueError(f'Invalid SQLite PRAGMA {name} = {value}')
+    return pragmas
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    """Run the PRAGMA statements on a sqlite3 connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def init_app(app, engine):
+    """Apply the app's SQLite profile to each connection the engine opens."""
+    pragmas = get_pragmas(app.config)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
@@ -0,0 +1,60 @@
+"""
+A cache of the teams that can be chosen on the prediction forms, used by both the paralympics and paralympics_sq3 apps.
+
+The list of teams comes from about 200 rows of the country table that almost never change, so rather than querying
+them for every /predict request, each app keeps the list in memory with the data version of the country table (see
+data_version.py) that it was read at. It is only read again after a write to the country table. The names are also
+kept in a set, so checking a submitted team is a set lookup rather than a query.
+"""
+import threading
+
+from flask import current_app
+
+
+class Teams:
+    """The names of the teams, in the order they are shown, as choices for a SelectField and as a set."""
+
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.name_set = frozenset(self.names)
+        # The first choice is blank so that a team has to be chosen
+        self.choices = [('', '')] + [(name, name) for name in self.names]
+
+    def __contains__(self, name):
+        return name in self.name_set
+
+
+class TeamChoices:
+    """The Teams for one app, with the data version of the country table they were read at."""
+
+    def __init__(self):
+        self.loads = 0
+        self._cached = None
+        self._lock = threading.Lock()
+
+    def get(self, version, load):
+        """Return the Teams, calling load() to read the team names again if the version has changed."""
+        cached = self._cached
+        if cached is None or cached[0] != version:
+            with self._lock:
+                cached = self._cached
+                if cached is None or cached[0] != version:
+                    cached = (version, Teams(load()))
+                    self._cached = cached
+                    self.loads += 1
+        return cached[1]
+
+
+def init_app(app):
+    """Create the TeamChoices cache for the app, the app must already have a DataVersion."""
+    app.extensions['team_choices'] = TeamChoices()
+
+
+def get_teams(load):
+    """Return the Teams for the current app.
+
+    Parameters:
+    load: function that returns the team names in order, it is only called when the country table has changed
+    """
+    version = current_app.extensions['data_version'].token('country')
+    return current_app.extensions['team_choices'].get(version, load)
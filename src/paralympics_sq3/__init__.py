@@ -9,7 +9,12 @@ def create_app(test_config=None):
     # configure the Flask app (see later notes on how to generate your own SECRET_KEY)
     app.config.from_mapping(
         SECRET_KEY='dev',
-        DATABASE=os.path.join(app.instance_path, 'paralympicsq3.db')
+        DATABASE=os.path.join(app.instance_path, 'paralympicsq3.db'),
+        # The maximum size of the cache of rendered pages, see paralympics/fragment_cache.py
+        FRAGMENT_CACHE_MAX_BYTES=4 * 1024 * 1024,
+        # SQLite connection settings, 'default' or 'production', see paralympics/sqlite_profile.py
+        SQLITE_PROFILE='default',
+        SQLITE_PRAGMAS=None
     )
 
     if test_config is None:
@@ -30,6 +35,23 @@ def create_app(test_config=None):
     from . import db
     db.init_app(app)
 
+    # Read the version of each table from the database, see paralympics/data_version.py
+    from paralympics.data_version import DataVersion
+    app.extensions['data_version'] = DataVersion(lambda sql, params: db.get_db().execute(sql, params).fetchall())
+
+    # Add the data version table and triggers to a database created before they were added to init-db
+    if os.path.exists(app.config['DATABASE']):
+        with app.app_context():
+            db.create_version_table()
+
+    # Create the cache for rendered pages
+    from paralympics import fragment_cache
+    fragment_cache.init_app(app)
+
+    # Create the cache of the teams for the prediction form
+    from paralympics import team_choices
+    team_choices.init_app(app)
+
     # Register the blueprint
     from paralympics_sq3.paralympics import main
     app.register_blueprint(main)
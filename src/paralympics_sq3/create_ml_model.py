@@ -3,25 +3,24 @@ Machine learning is not covered in the module.
 This is a simple example of how to create a model using the medal standings data.
 `pip install scikit-learn` is required before you can run this code.
 """
-from pathlib import Path
-
 import joblib
-import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 
+from data.workbook import read_sheet
+from paralympics.linear_model import export_coefficients
+
 
 def train_and_save_model():
     """
     Train a model to predict Total based on Year and Team, and save it to a .pkl file.
     """
-    # Read the data into a DataFrame
-    para_excel = Path(__file__).parent.parent.joinpath("data", "paralympics.xlsx")
+    # Read the data into a DataFrame, this uses the cached copy of the workbook if it has not changed
     cols = ["Year", "Rank", "Team", "Gold", "Silver", "Bronze", "Total"]
-    data = pd.read_excel(para_excel, sheet_name="medal_standings", usecols=cols)
+    data = read_sheet("medal_standings")[cols].copy()
 
     # Drop rows with NaNs since the accuracy of the model is not the focus here
     data.dropna(inplace=True)
@@ -55,6 +54,11 @@ def train_and_save_model():
 
     print("Model saved to model.pkl")
 
+    # Save the coefficients used by the app to make predictions without scikit-learn
+    export_coefficients(pipeline, 'model_coefficients.json')
+
+    print("Coefficients saved to model_coefficients.json")
+
 
 if __name__ == "__main__":
     # Train the model and save it
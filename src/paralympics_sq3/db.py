@@ -9,6 +9,9 @@ from datetime import datetime
 import click
 from flask import current_app, g
 
+from paralympics import data_version
+from paralympics.sqlite_profile import apply_pragmas, get_pragmas
+
 
 # Copied from https://flask.palletsprojects.com/en/stable/tutorial/database/
 def get_db():
@@ -24,6 +27,9 @@ def get_db():
         # Enable foreign key support
         g.db.execute('PRAGMA foreign_keys = ON;')
 
+        # Apply the SQLite connection settings for the SQLITE_PROFILE in the config
+        apply_pragmas(g.db, get_pragmas(current_app.config))
+
         # Print SQL to the terminal for debugging purposes
         g.db.set_trace_callback(trace_callback)
 
@@ -47,6 +53,25 @@ def init_db():
         with current_app.open_resource(str(sql_path)) as f:
             db.executescript(f.read().decode('utf8'))
 
+    create_indexes()
+
+    # The tables have been replaced, so replace the data versions as well
+    db.execute('DROP TABLE IF EXISTS data_version')
+    create_version_table()
+
+
+def create_version_table():
+    """Create the data version table and the triggers that update it, if they do not exist."""
+    db = get_db()
+    data_version.create_version_table(db.execute)
+    db.commit()
+
+
+def create_indexes():
+    """Create the indexes, this can be run again on an existing database to add any that are missing."""
+    db = get_db()
+    db.executescript(importlib.resources.files('data').joinpath('paralympics_indexes.sql').read_text())
+
 
 @click.command('init-db')
 def init_db_command():
@@ -55,6 +80,13 @@ def init_db_command():
     click.echo('Initialized the database.')
 
 
+@click.command('migrate-db')
+def migrate_db_command():
+    """Add any missing indexes to an existing database."""
+    create_indexes()
+    click.echo('Added the indexes to the database.')
+
+
 sqlite3.register_converter(
     "timestamp", lambda v: datetime.fromisoformat(v.decode())
 )
@@ -64,6 +96,7 @@ sqlite3.register_converter(
 def init_app(app):
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(migrate_db_command)
 
 
 def trace_callback(query):
@@ -3,6 +3,7 @@ from wtforms import IntegerField, StringField
 from wtforms.fields.choices import SelectField
 from wtforms.validators import DataRequired, Optional, Regexp, ValidationError
 
+from paralympics.team_choices import get_teams
 from paralympics_sq3.db import get_db
 
 
@@ -13,20 +14,22 @@ class QuizForm(FlaskForm):
                                              message="Date must be in the format DD/MM/YYYY")
                                       ])
 
-    def validate_quiz_name(self, quiz_name):
-        """Custom validator to ensure that the quiz_name is unique."""
-        db = get_db()
-        quiz = db.execute('SELECT * from quiz where quiz_name = ?', (quiz_name.data,)).fetchone()
-        if quiz:
-            raise ValidationError('Quiz name already exists. Please choose a different name.')
+    # The quiz_name is unique, this is checked by the database when the quiz is added (see the quiz route) rather than
+    # with a custom validator, so that adding a quiz is a single statement.
 
 
 class PredictionForm(FlaskForm):
     year = IntegerField('Year', validators=[DataRequired()])
-    team = SelectField('Team', validators=[DataRequired()])
+    # The team is checked by validate_team() with a set lookup, rather than SelectField searching the choices
+    team = SelectField('Team', validators=[DataRequired()], validate_choice=False)
 
     def set_choices(self):
-        db = get_db()
-        self.team.choices = [(row['name'], row['name']) for row in
-                             db.execute('SELECT name FROM country WHERE member_type != "dissolved"').fetchall()]
+        # The names are only queried again after the country table changes, see paralympics/team_choices.py
+        self.teams = get_teams(lambda: [row['name'] for row in get_db().execute(
+            "SELECT name FROM country WHERE member_type != 'dissolved' ORDER BY name").fetchall()])
+        self.team.choices = self.teams.choices
         return self
+
+    def validate_team(self, field):
+        if field.data not in self.teams:
+            raise ValidationError('Not a valid choice.')
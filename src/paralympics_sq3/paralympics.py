@@ -1,18 +1,23 @@
 """ This version of the app only has the routes that have database interaction. """
-import importlib.resources
 import sqlite3
 
-import joblib
-import pandas as pd
-from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, flash, jsonify, redirect, render_template, request, url_for
 
+from paralympics.fragment_cache import cached_fragment, get_fragment_cache
+from paralympics.linear_model import LinearPredictor
+from paralympics.model_registry import ModelRegistry
 from paralympics_sq3.db import get_db
 from paralympics_sq3.forms import PredictionForm, QuizForm
 
 main = Blueprint('main', __name__)
 
+# The coefficients of the prediction model are loaded once and shared by all requests, and reloaded if the file changes
+# The file is exported from model.pkl, see paralympics/linear_model.py
+model_registry = ModelRegistry('paralympics_sq3', 'model_coefficients.json', loader=LinearPredictor.load)
+
 
 @main.route('/')
+@cached_fragment('event', 'host_event', 'host')
 def index():
     """Renders the home page that is now a list of all paralympics with hyperlinks to the event page for each."""
     # Query the database to get all the events and arrange in date order
@@ -26,6 +31,7 @@ def index():
 
 
 @main.route('/event/<int:event_id>')
+@cached_fragment('event', 'host_event', 'host')
 def get_event(event_id):
     db = get_db()
     try:
@@ -51,25 +57,23 @@ def quiz():
         quiz_name = form.quiz_name.data
         close_date = form.close_date.data
 
-        # check if a quiz with the same name already exists
+        # Add the quiz, the unique index on quiz_name means nothing is added if a quiz with the same name exists
         db = get_db()
-        existing_quiz = db.execute("SELECT * FROM quiz WHERE quiz_name = ?", (quiz_name,)).fetchone()
-
-        # If it does, display a message and do not add it.
-        if existing_quiz:
-            flash(f"Quiz with name {quiz_name} already exists.")
-        # Otherwise, try to add it to the database
-        else:
-            try:
-                quiz_sql = "INSERT INTO quiz (quiz_name, close_date) VALUES (?, ?)"
-                db.execute(quiz_sql, (quiz_name, close_date))
-                db.commit()
+        try:
+            quiz_sql = ("INSERT INTO quiz (quiz_name, close_date) VALUES (?, ?) "
+                        "ON CONFLICT (quiz_name) DO NOTHING RETURNING quiz_id")
+            inserted = db.execute(quiz_sql, (quiz_name, close_date)).fetchone()
+            db.commit()
+            # If it already exists, display a message
+            if inserted is None:
+                flash(f"Quiz with name {quiz_name} already exists.")
+            else:
                 # Display a message to confirm it has been added
                 flash('Quiz added!', 'success')
                 return redirect(url_for('main.index'))
-            except sqlite3.Error as e:
-                # If there is an error, display a message and return to the previous form
-                flash(f'Error adding quiz: {e}', 'danger')
+        except sqlite3.Error as e:
+            # If there is an error, display a message and return to the previous form
+            flash(f'Error adding quiz: {e}', 'danger')
     return render_template('quiz.html', form=form)
 
 
@@ -98,6 +102,18 @@ def predict():
     return render_template("prediction.html", form=form)
 
 
+@main.get('/cache/stats')
+def cache_stats():
+    """Returns the hit and miss counts and the size of the rendered page cache as JSON."""
+    return jsonify(get_fragment_cache().stats())
+
+
+@main.get('/predict/model')
+def model_metrics():
+    """Returns the version and load time of the prediction model as JSON."""
+    return jsonify(model_registry.metrics())
+
+
 # Helper functions used in the routes
 # -----------------------------------
 
@@ -111,14 +127,11 @@ def make_prediction(year, team):
     Returns:
     prediction (str or int): int of the prediction result, or string if error
     """
-    # The predict() method fails if not in DataFrame format
-    input_data = pd.DataFrame({'Year': [year], 'Team': [team]})
     try:
         # Get a prediction from the model
-        with importlib.resources.open_binary('paralympics_sq3', 'model.pkl') as file:
-            model = joblib.load(file)
-            prediction = model.predict(input_data)
-            # Returns a float so convert to int. Handle negative predictions as O.
-            return max(0, int(prediction[0]))
+        model = model_registry.get()
+        prediction = model.predict(year, team)
+        # Returns a float so convert to int. Handle negative predictions as O.
+        return max(0, int(prediction))
     except Exception as e:
         return f"Error making prediction: {e}"
@@ -1,5 +1,9 @@
 import importlib.resources
+import json
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from paralympics import create_app, db
@@ -63,3 +67,46 @@ def db_session(app):
         db_session.close()
         transaction.rollback()
         connection.close()
+
+
+@pytest.fixture(scope='session')
+def news_server():
+    """Fixture that runs a local stand-in for the Hacker News API.
+
+    Each response is delayed by `news_server.delay` seconds to simulate the round trip to the real API.
+
+    Returns:
+        server A ThreadingHTTPServer, the API URL is in server.url
+    """
+
+    class HackerNewsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(self.server.delay)
+            if self.path == '/topstories.json':
+                body = list(range(1, 31))
+            elif self.path.startswith('/item/'):
+                item_id = int(self.path.removeprefix('/item/').removesuffix('.json'))
+                body = {'id': item_id, 'title': f'Story {item_id}', 'url': f'https://example.com/{item_id}'}
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HackerNewsHandler)
+    server.delay = 0.2
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
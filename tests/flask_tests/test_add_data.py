@@ -0,0 +1,45 @@
+from paralympics import db
+from paralympics.models import Country, Event, Host, HostEvent, MedalResult, Participants
+
+
+def test_add_all_data_loads_each_table(app):
+    """
+    GIVEN a Flask app that has been created with an empty test database
+    WHEN add_all_data() has run as part of create_app
+    THEN each table should contain the rows from paralympics.xlsx
+    AND each event should have its participants row
+    """
+    with app.app_context():
+        assert db.session.execute(db.select(db.func.count()).select_from(Country)).scalar() == 232
+        assert db.session.execute(db.select(db.func.count()).select_from(Event)).scalar() == 32
+        assert db.session.execute(db.select(db.func.count()).select_from(Participants)).scalar() == 32
+        assert db.session.execute(db.select(db.func.count()).select_from(Host)).scalar() == 30
+        assert db.session.execute(db.select(db.func.count()).select_from(HostEvent)).scalar() == 33
+        assert db.session.execute(db.select(db.func.count()).select_from(MedalResult)).scalar() > 0
+
+
+def test_add_all_data_skips_loaded_tables(app):
+    """
+    GIVEN a Flask app with a database that already contains the data
+    WHEN add_all_data() is called again
+    THEN no tables should be loaded and the timing report should be empty
+    """
+    from paralympics.add_data import add_all_data
+    with app.app_context():
+        assert add_all_data() == {}
+
+
+def test_key_resolver_records_unresolved_keys(app):
+    """
+    GIVEN a KeyResolver for the seeded database
+    WHEN a known and an unknown natural key are resolved
+    THEN the known key should return the database key
+    AND the unknown key should return None and be recorded in unresolved
+    """
+    from paralympics.add_data import KeyResolver
+    with app.app_context():
+        resolver = KeyResolver()
+        assert resolver.resolve('country', 'Germany', 'host') == 'GER'
+        assert resolver.resolve('event', (1960, 'summer'), 'participants') is not None
+        assert resolver.resolve('host_event', (1992, 'Tignes Albertville'), 'medal_result') is None
+        assert resolver.unresolved == [('medal_result', 'host_event', (1992, 'Tignes Albertville'))]
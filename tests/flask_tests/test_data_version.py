@@ -0,0 +1,65 @@
+from paralympics import create_app, db
+from paralympics.data_version import get_data_version
+from paralympics.models import Quiz
+
+
+def test_data_version_bumped_after_commit(app):
+    """
+    GIVEN the data version for the app
+    WHEN a quiz is added and committed, and another is added and rolled back
+    THEN the version of the quiz table should increase after the commit only
+    AND the version of other tables should not change
+    """
+    with app.app_context():
+        data_version = get_data_version()
+        quiz_version = data_version.get('quiz')
+        event_version = data_version.get('event')
+
+        quiz = Quiz(quiz_name='Data version quiz')
+        db.session.add(quiz)
+        db.session.commit()
+        assert data_version.get('quiz') == quiz_version + 1
+
+        db.session.add(Quiz(quiz_name='Rolled back quiz'))
+        db.session.flush()
+        db.session.rollback()
+        assert data_version.get('quiz') == quiz_version + 1
+        assert data_version.get('event') == event_version
+
+        # Remove the quiz so it does not affect other tests
+        db.session.delete(quiz)
+        db.session.commit()
+        assert data_version.get('quiz') == quiz_version + 2
+
+
+def test_data_version_shared_between_apps(app):
+    """
+    GIVEN two app instances using the same database, as with more than one worker process
+    WHEN a quiz is added by one of them
+    THEN both should have the same versions before and after the write
+    AND the ETag for the index page should be the same from both
+    """
+    other = create_app(test_config={"TESTING": True,
+                                    "SQLALCHEMY_DATABASE_URI": app.config['SQLALCHEMY_DATABASE_URI']})
+    quiz_id = None
+    try:
+        with app.app_context():
+            before = get_data_version().token('quiz', 'event')
+        with other.app_context():
+            assert get_data_version().token('quiz', 'event') == before
+            quiz = Quiz(quiz_name='Shared data version quiz')
+            db.session.add(quiz)
+            db.session.commit()
+            quiz_id = quiz.quiz_id
+            after = get_data_version().token('quiz', 'event')
+        assert after != before
+        with app.app_context():
+            assert get_data_version().token('quiz', 'event') == after
+        assert app.test_client().get('/').headers['ETag'] == other.test_client().get('/').headers['ETag']
+    finally:
+        with other.app_context():
+            if quiz_id is not None:
+                db.session.delete(db.session.get(Quiz, quiz_id))
+                db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
@@ -0,0 +1,65 @@
+import csv
+import gzip
+import io
+import json
+
+from paralympics import db
+from paralympics.models import MedalResult
+
+
+def medal_result_count(app):
+    with app.app_context():
+        return db.session.execute(db.select(db.func.count()).select_from(MedalResult)).scalar()
+
+
+def test_export_csv(app, client):
+    """
+    GIVEN the medal results
+    WHEN /api/export/medals.csv is requested
+    THEN the response is streamed with a header row and one row for each medal result
+    """
+    response = client.get('/api/export/medals.csv')
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == medal_result_count(app)
+    assert rows[0]['host'] == 'Barcelona' and rows[0]['country'] == 'United States of America'
+
+
+def test_export_ndjson_gzip(app, client):
+    """
+    GIVEN a client that accepts gzip
+    WHEN /api/export/medals.ndjson is requested
+    THEN the response is gzip compressed NDJSON with one object for each medal result
+    """
+    response = client.get('/api/export/medals.ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    lines = gzip.decompress(response.data).decode().splitlines()
+    assert len(lines) == medal_result_count(app)
+    assert set(json.loads(lines[0])) >= {'year', 'type', 'host', 'country_code', 'gold', 'total'}
+    assert client.get('/api/export/medals.xml').status_code == 404
+
+
+def test_export_medals_command(app, tmp_path):
+    """
+    GIVEN an output file name ending .csv.gz
+    WHEN the export-medals command is run with --gzip
+    THEN the file has the same CSV as the export endpoint
+    """
+    path = tmp_path / 'medals.csv.gz'
+    result = app.test_cli_runner().invoke(args=['export-medals', str(path), '--gzip'])
+    assert result.exit_code == 0
+    assert gzip.decompress(path.read_bytes()) == app.test_client().get('/api/export/medals.csv').data
+
+
+def test_export_csv_no_rows_has_header(app):
+    """
+    GIVEN an export query that selects no rows
+    WHEN it is exported as CSV
+    THEN the output is the header row only
+    """
+    from paralympics.export import csv_chunks, export_batches, export_query
+    with app.app_context():
+        query = export_query().where(MedalResult.result_id < 0)
+        text = ''.join(csv_chunks(export_batches(db.session, query)))
+    assert text.splitlines() == ['year,type,start,end,host,country_code,country,region,rank,gold,silver,bronze,total']
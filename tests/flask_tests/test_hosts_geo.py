@@ -0,0 +1,54 @@
+import json
+
+from paralympics import db
+from paralympics.models import Host
+
+
+def test_host_coordinates_loaded_as_real(app):
+    """
+    GIVEN the database created by the app
+    WHEN the host coordinates are read
+    THEN the hosts in latlon.csv have REAL latitude and longitude values
+    """
+    with app.app_context():
+        rows = db.session.execute(db.select(Host.host, db.func.typeof(Host.latitude), Host.longitude)).all()
+    types = {host: latitude_type for host, latitude_type, longitude in rows}
+    assert types['London'] == 'real' and types['Milano Cortina'] == 'real'
+    assert sum(t == 'real' for t in types.values()) == 29
+
+
+def test_nearest_hosts(client):
+    """
+    GIVEN a point in central London
+    WHEN the 3 nearest hosts are requested
+    THEN London is first, followed by the next closest host cities
+    """
+    hosts = client.get('/api/hosts/nearest?lat=51.5074&lon=-0.1278&k=3').json['hosts']
+    assert [host['host'] for host in hosts] == ['London', 'Paris', 'Arnhem']
+    assert hosts[0]['distance_km'] < 1
+    assert client.get('/api/hosts/nearest?lat=91&lon=0').status_code == 400
+
+
+def test_hosts_within_radius(client):
+    """
+    GIVEN a point in the Alps
+    WHEN the hosts within 200 km are requested
+    THEN the nearby winter host cities are returned nearest first
+    """
+    hosts = client.get('/api/hosts/within?lat=45.5&lon=7&radius_km=200').json['hosts']
+    assert [host['host'] for host in hosts] == ['Tignes-Albertville', 'Torino', 'Milano Cortina']
+    assert all(host['distance_km'] <= 200 for host in hosts)
+    assert client.get('/api/hosts/within?lat=45.5&lon=7').status_code == 400
+
+
+def test_hosts_geojson(client):
+    """
+    GIVEN the host cities
+    WHEN /api/hosts.geojson is requested
+    THEN a FeatureCollection with a point and the events for each host with coordinates is returned with an ETag
+    """
+    response = client.get('/api/hosts.geojson')
+    assert response.mimetype == 'application/geo+json' and response.headers['ETag']
+    features = {feature['properties']['name']: feature for feature in json.loads(response.data)['features']}
+    assert features['London']['geometry']['coordinates'] == [-0.1276, 51.5072]
+    assert '2012 summer' in features['London']['properties']['events']
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import text
+
+from paralympics import db
+
+# The queries used by the routes and the data loading, with the index each should use
+HOT_QUERIES = [
+    ("SELECT event_id FROM event WHERE year = 2012 AND type = 'summer'", 'ix_event_year_type'),
+    ("SELECT host_id FROM host WHERE host = 'London'", 'ix_host_host'),
+    ("SELECT code FROM country WHERE name = 'Germany'", 'ix_country_name'),
+    ("SELECT quiz_id FROM quiz WHERE quiz_name = 'Test'", 'ix_quiz_quiz_name'),
+    ("SELECT * FROM medal_result WHERE event_id = 1", 'ix_medal_result_event_id'),
+    ("SELECT * FROM medal_result WHERE country_code = 'GBR'", 'ix_medal_result_country_code'),
+    ("SELECT * FROM participants WHERE event_id = 1", 'ix_participants_event_id'),
+    ("SELECT * FROM host_event WHERE event_id = 1", 'ix_host_event_event_id'),
+    ("SELECT * FROM student_response WHERE quiz_id = 1", 'ix_student_response_quiz_id'),
+]
+
+
+@pytest.mark.parametrize('query, index_name', HOT_QUERIES)
+def test_hot_queries_use_index(app, query, index_name):
+    """
+    GIVEN the seeded test database
+    WHEN EXPLAIN QUERY PLAN is run for a query used by the app
+    THEN the plan should search using the expected index rather than scan the table
+    """
+    with app.app_context():
+        plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {query}')))
+    assert index_name in plan
+    assert not plan.startswith('SCAN')
+
+
+def test_event_detail_join_uses_indexes(app):
+    """
+    GIVEN the seeded test database
+    WHEN EXPLAIN QUERY PLAN is run for the get_event query
+    THEN no table should be scanned
+    """
+    query = ("SELECT event.year, host.host FROM event JOIN host_event ON event.event_id = host_event.event_id "
+             "JOIN host ON host_event.host_id = host.host_id WHERE event.event_id = 1")
+    with app.app_context():
+        plan = [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {query}'))]
+    assert not any(step.startswith('SCAN') for step in plan)
+
+
+def test_create_missing_indexes(app):
+    """
+    GIVEN a database that is missing an index defined on the models
+    WHEN create_missing_indexes() is run
+    THEN the missing index should be created and no others
+    """
+    from paralympics.migrate import create_missing_indexes
+    with app.app_context():
+        db.session.execute(text('DROP INDEX ix_medal_result_event_id'))
+        db.session.commit()
+        assert create_missing_indexes() == ['ix_medal_result_event_id']
+        assert create_missing_indexes() == []
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from paralympics import db
+from paralympics.models import Event, MedalResult
+from sqlalchemy import event
+
+
+def medal_rows(app, event_type=None):
+    with app.app_context():
+        query = db.select(MedalResult.country_code, Event.type, Event.year, MedalResult.rank, MedalResult.gold,
+                          MedalResult.silver, MedalResult.bronze, MedalResult.total).join(MedalResult.event)
+        if event_type:
+            query = query.where(Event.type == event_type)
+        return db.session.execute(query.order_by(Event.year)).all()
+
+
+def test_medal_totals(app, client):
+    """
+    GIVEN the medal results
+    WHEN /api/medals/totals is requested for the summer events
+    THEN each country's totals and rank match a calculation in Python
+    """
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for code, event_type, year, rank, gold, silver, bronze, total in medal_rows(app, 'summer'):
+        for i, value in enumerate((gold, silver, bronze, total)):
+            totals[code][i] += value
+    response = client.get('/api/medals/totals?type=summer')
+    assert response.status_code == 200
+    result = response.json['totals']
+    assert {row['code']: [row['gold'], row['silver'], row['bronze'], row['total']] for row in result} == totals
+    # Countries with the same gold, silver and bronze have the same rank
+    for before, after in zip(result, result[1:]):
+        medals = [(row['gold'], row['silver'], row['bronze']) for row in (before, after)]
+        assert after['rank'] == (before['rank'] if medals[0] == medals[1] else result.index(after) + 1)
+    assert client.get('/api/medals/totals?type=spring').status_code == 400
+
+
+def test_medal_history(app, client):
+    """
+    GIVEN the medal results for Great Britain
+    WHEN /api/medals/country/GBR is requested
+    THEN the running totals and rank changes are for the previous event of the same type
+    """
+    history = client.get('/api/medals/country/GBR').json
+    assert history['name'] == 'Great Britain'
+    previous = {}
+    running = defaultdict(int)
+    rows = [row for row in medal_rows(app) if row.country_code == 'GBR']
+    assert [(e['year'], e['type']) for e in history['events']] == sorted((row.year, row.type) for row in rows)
+    for item in history['events']:
+        running[item['type']] += item['total']
+        assert item['cumulative_total'] == running[item['type']]
+        assert item['previous_rank'] == previous.get(item['type'])
+        if item['previous_rank'] is not None:
+            assert item['rank_change'] == item['previous_rank'] - item['rank']
+        previous[item['type']] = item['rank']
+    assert client.get('/api/medals/country/XYZ').status_code == 404
+
+
+def test_medal_rank_changes(client):
+    """
+    GIVEN the 2012 and 2008 summer paralympics medal tables
+    WHEN /api/medals/summer/2012/rank-changes is requested
+    THEN each country is listed in 2012 rank order with its rank at its previous summer event
+    """
+    results = client.get('/api/medals/summer/2012/rank-changes').json['results']
+    assert [row['rank'] for row in results] == sorted(row['rank'] for row in results)
+    china = results[0]
+    assert (china['code'], china['previous_year'], china['previous_rank'], china['rank_change']) == ('CHN', 2008, 1, 0)
+    assert client.get('/api/medals/summer/2013/rank-changes').status_code == 404
+
+
+def test_medal_api_cached_by_data_version(app, client):
+    """
+    GIVEN a medal API response that has been requested once
+    WHEN it is requested again, and again after the medal_result data version changes
+    THEN the second request runs no SQL apart from reading the data versions and the third queries the database again
+    """
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def listener(conn, cursor, statement, *args):
+        if 'data_version' not in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        first = client.get('/api/medals/totals?limit=5')
+        count = len(statements)
+        assert client.get('/api/medals/totals?limit=5').data == first.data
+        assert len(statements) == count
+        with app.app_context():
+            db.session.execute(db.text('UPDATE medal_result SET total = total WHERE result_id = '
+                                       '(SELECT min(result_id) FROM medal_result)'))
+            db.session.commit()
+        assert client.get('/api/medals/totals?limit=5').data == first.data
+        assert len(statements) > count
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
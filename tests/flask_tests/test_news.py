@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from paralympics.news import NewsCache, NewsUnavailable
+
+
+def test_news_cache_hit_within_ttl(news_server):
+    """
+    GIVEN a NewsCache and a stand-in Hacker News API
+    WHEN the stories are requested twice within the TTL
+    THEN the second request should be a cache hit that does not call the API
+    """
+    cache = NewsCache()
+    stories = cache.get_stories(news_server.url, 2, timeout=5, ttl=60)
+    start = time.perf_counter()
+    assert cache.get_stories(news_server.url, 2, timeout=5, ttl=60) == stories
+    assert time.perf_counter() - start < news_server.delay
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_news_cache_serves_stale_while_refreshing(news_server):
+    """
+    GIVEN a NewsCache with stories older than the TTL
+    WHEN the stories are requested
+    THEN the stale stories should be returned without waiting for the API
+    AND the stories should be refreshed in the background
+    """
+    cache = NewsCache()
+    cache.get_stories(news_server.url, 2, timeout=5, ttl=0)
+    fetched_before = cache.stats()['entries'][0]['age_seconds']
+
+    start = time.perf_counter()
+    assert len(cache.get_stories(news_server.url, 2, timeout=5, ttl=0)) == 2
+    assert time.perf_counter() - start < news_server.delay
+    assert cache.stats()['stale_hits'] == 1
+
+    # Wait for the background refresh, the cached entry should then be newer
+    time.sleep(news_server.delay * 3)
+    assert cache.stats()['entries'][0]['age_seconds'] < fetched_before + news_server.delay
+
+
+def test_news_cache_circuit_breaker_opens_after_failures():
+    """
+    GIVEN a NewsCache for an API that cannot be reached
+    WHEN the stories are requested more times than the failure threshold
+    THEN NewsUnavailable should be raised each time
+    AND the circuit breaker should open so the API is no longer called
+    """
+    cache = NewsCache(failure_threshold=2, reset_timeout=60)
+    for i in range(2):
+        with pytest.raises(NewsUnavailable):
+            cache.get_stories('http://127.0.0.1:1', 2, timeout=1, ttl=60)
+    assert cache.stats()['circuit'] == 'open'
+
+    with pytest.raises(NewsUnavailable, match='unavailable'):
+        cache.get_stories('http://127.0.0.1:1', 2, timeout=1, ttl=60)
+    assert cache.stats()['failures'] == 2
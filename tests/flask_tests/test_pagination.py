@@ -0,0 +1,92 @@
+import pytest
+from paralympics import db
+from paralympics.models import Country, MedalResult
+
+
+def all_pages(client, url):
+    """Follows next_cursor from the first page to the last and returns the items and the number of pages."""
+    items, pages, cursor = [], 0, None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        items += response.json['items']
+        pages += 1
+        cursor = response.json['next_cursor']
+        if cursor is None:
+            return items, pages
+
+
+def test_medal_results_pages(app, client):
+    """
+    GIVEN the medal results
+    WHEN every page of /api/medal-results is requested, following the cursors
+    THEN each result is returned once, in result_id order
+    """
+    with app.app_context():
+        result_ids = db.session.execute(db.select(MedalResult.result_id).order_by(MedalResult.result_id)).scalars().all()
+    items, pages = all_pages(client, '/api/medal-results?limit=100')
+    assert [item['result_id'] for item in items] == result_ids
+    assert pages == len(result_ids) // 100 + 1
+
+
+def test_medal_results_filters(client):
+    """
+    GIVEN a country and year range filter
+    WHEN the pages of /api/medal-results are requested
+    THEN only that country's results in the range are returned
+    """
+    items, pages = all_pages(client, '/api/medal-results?country=gbr&type=summer&year_from=2000&year_to=2012&limit=2')
+    assert [(item['country_code'], item['year']) for item in items] == [('GBR', year) for year in (2000, 2004, 2008, 2012)]
+    assert pages == 2
+
+
+def test_events_pages(client):
+    """
+    GIVEN the events
+    WHEN the winter events are requested three at a time
+    THEN they are returned in year order across the pages
+    """
+    items, pages = all_pages(client, '/api/events?type=winter&limit=3')
+    years = [item['year'] for item in items]
+    assert years == sorted(years) and len(years) == 14
+    assert {item['type'] for item in items} == {'winter'}
+
+
+def test_countries_pages(app, client):
+    """
+    GIVEN the countries in a region
+    WHEN the pages of /api/countries are requested
+    THEN every country in the region is returned in code order
+    """
+    with app.app_context():
+        codes = db.session.execute(
+            db.select(Country.code).where(Country.region == 'Europe').order_by(Country.code)).scalars().all()
+    items, pages = all_pages(client, '/api/countries?region=Europe&limit=10')
+    assert [item['code'] for item in items] == codes
+
+
+@pytest.mark.parametrize('query', ['cursor=not-a-cursor', 'cursor=WyJHQlIiXQ', 'limit=0', 'limit=501'])
+def test_invalid_page_arguments(client, query):
+    """
+    GIVEN an invalid cursor, a cursor for a different list, or a limit out of range
+    WHEN /api/events is requested
+    THEN the response is 400
+    """
+    assert client.get(f'/api/events?{query}').status_code == 400
+
+
+@pytest.mark.parametrize('url, values', [
+    ('/api/countries', [{'code': 'GBR'}]),
+    ('/api/countries', [['GBR']]),
+    ('/api/countries', [None]),
+    ('/api/events', [2012, None]),
+    ('/api/events', [{'year': 2012}, 'summer']),
+])
+def test_cursor_with_invalid_values(client, url, values):
+    """
+    GIVEN a cursor made by the client with the right number of values but of a type that is not a str or int
+    WHEN the list is requested with the cursor
+    THEN the response is 400
+    """
+    from paralympics.pagination import encode_cursor
+    assert client.get(f'{url}?cursor={encode_cursor(values)}').status_code == 400
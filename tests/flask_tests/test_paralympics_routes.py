@@ -1,3 +1,6 @@
+import time
+
+
 def test_print_response_params(client):
     """
     This is just so you can see what type of detail you get in a response object.
@@ -144,3 +147,243 @@ def test_prediction_no_data_returns_error():
     from paralympics.paralympics import make_prediction
     prediction = make_prediction(2030, "Invalid")
     assert "Error making prediction" in prediction
+
+
+def test_model_metrics(client):
+    """
+    GIVEN a Flask test client
+    WHEN a prediction is made and then a request is made to /predict/model
+    THEN the JSON should include the model version and load time
+    """
+    client.post("/predict", data={"year": 2030, "team": "Germany"})
+    response = client.get("/predict/model")
+    assert response.status_code == 200
+    assert response.json['version'] is not None
+    assert response.json['load_seconds'] > 0
+
+
+def test_api_predict_items(client):
+    """
+    GIVEN a Flask test client
+    WHEN a POST request is made to /api/predict with a list of items including an unknown team
+    THEN the status code should be 200
+    AND there should be a prediction for each known team and an error for the unknown team
+    """
+    items = [{"year": 2028, "team": "Germany"}, {"year": 2032, "team": "France"}, {"year": 2028, "team": "Invalid"}]
+    response = client.post("/api/predict", json={"items": items})
+    assert response.status_code == 200
+    predictions = response.json['predictions']
+    assert len(predictions) == 3
+    assert isinstance(predictions[0]['prediction'], int)
+    assert isinstance(predictions[1]['prediction'], int)
+    assert 'Unknown team' in predictions[2]['error']
+
+
+def test_api_predict_uses_cached_teams(app, client):
+    """
+    GIVEN a Flask test client and a batch prediction that has been requested once
+    WHEN the same batch is requested again
+    THEN the country table is not queried again
+    """
+    from sqlalchemy import event
+    from paralympics import db
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    items = [{"year": 2028, "team": "Germany"}, {"year": 2028, "team": "Invalid"}]
+    client.post("/api/predict", json={"items": items})
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        response = client.post("/api/predict", json={"items": items})
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    assert isinstance(response.json['predictions'][0]['prediction'], int)
+    assert 'Unknown team' in response.json['predictions'][1]['error']
+    assert not any('FROM country' in statement for statement in statements)
+
+
+def test_api_predict_team_not_a_string(client):
+    """
+    GIVEN a Flask test client
+    WHEN a POST request is made to /api/predict with a team that is a list, as an item and in a sweep
+    THEN the status code should be 200
+    AND the item with the list should have an error while the other items are predicted
+    """
+    items = [{"year": 2028, "team": ["x"]}, {"year": 2028, "team": "Germany"}]
+    response = client.post("/api/predict", json={"items": items})
+    assert response.status_code == 200
+    predictions = response.json['predictions']
+    assert predictions[0]['error'] == 'Team must be a string'
+    assert isinstance(predictions[1]['prediction'], int)
+
+    response = client.post("/api/predict", json={"teams": [["x"], {"y": 1}], "start_year": 2028, "end_year": 2028})
+    assert response.status_code == 200
+    assert [p['error'] for p in response.json['predictions']] == ['Team must be a string'] * 2
+
+
+def test_api_predict_sweep_matches_single_prediction(client):
+    """
+    GIVEN a Flask test client
+    WHEN a POST request is made to /api/predict for a team across a range of years
+    THEN there should be a prediction for each year that matches make_prediction for the same year and team
+    """
+    from paralympics.paralympics import make_prediction
+    response = client.post("/api/predict", json={"teams": ["Germany"], "start_year": 2028, "end_year": 2036})
+    assert response.status_code == 200
+    predictions = response.json['predictions']
+    assert [p['year'] for p in predictions] == [2028, 2032, 2036]
+    assert predictions[1]['prediction'] == make_prediction(2032, "Germany")
+
+
+def test_api_predict_bad_request(client):
+    """
+    GIVEN a Flask test client
+    WHEN a POST request is made to /api/predict without items or a year range
+    THEN the status code should be 400
+    """
+    response = client.post("/api/predict", json={"teams": ["Germany"]})
+    assert response.status_code == 400
+
+
+def test_api_predict_sweep_too_large(client):
+    """
+    GIVEN a Flask test client
+    WHEN a POST request is made to /api/predict for a sweep of millions of years
+    THEN the status code should be 400 without the predictions being listed
+    """
+    from paralympics.paralympics import MAX_BATCH_PREDICTIONS
+    response = client.post("/api/predict", json={"start_year": 0, "end_year": 10 ** 12, "step": 1})
+    assert response.status_code == 400
+    assert str(MAX_BATCH_PREDICTIONS) in response.json['error']
+
+
+def test_chart_loads_plotly_js_separately(client):
+    """
+    GIVEN a Flask test client
+    WHEN a request is made to /chart twice
+    THEN the page should be small and link to plotly.js instead of including it
+    AND the second request should use the cached chart
+    AND the plotly.js URL should return the script with a long cache lifetime
+    """
+    response = client.get("/chart")
+    assert response.status_code == 200
+    assert len(response.data) < 100000
+    assert 'line-chart' in response.data.decode()
+
+    chart_cache = client.application.extensions['chart_cache']
+    hits = chart_cache.stats()['hits']
+    client.get("/chart")
+    assert chart_cache.stats()['hits'] == hits + 1
+
+    from paralympics.figures import plotly_js_fingerprint
+    js_response = client.get(f"/js/plotly-{plotly_js_fingerprint()}.min.js")
+    assert js_response.status_code == 200
+    assert 'immutable' in js_response.headers['Cache-Control']
+    js_response.close()
+
+
+def test_news_fetches_stories_concurrently(app, client, news_server, monkeypatch):
+    """
+    GIVEN a Flask test client and a stand-in Hacker News API that takes 0.2 seconds per request
+    WHEN a request is made to /news for 6 stories
+    THEN the page should include all 6 stories
+    AND it should take about two round trips (top stories then all items at once) rather than seven
+    """
+    monkeypatch.setitem(app.config, 'NEWS_API_URL', news_server.url)
+    monkeypatch.setitem(app.config, 'NEWS_STORY_COUNT', 6)
+    start = time.perf_counter()
+    response = client.get("/news")
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200
+    for item_id in range(1, 7):
+        assert f'Story {item_id}<' in response.data.decode()
+    assert elapsed < news_server.delay * 4
+
+
+def test_index_not_modified(client):
+    """
+    GIVEN a Flask test client
+    WHEN a request is made to / with the ETag from a previous response in If-None-Match
+    THEN the status code should be 304 with no content
+    AND a request with a different ETag should return the full page
+    """
+    response = client.get("/")
+    etag = response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    response = client.get("/", headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+    response = client.get("/", headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    assert 'Winter' in response.data.decode()
+
+
+def test_event_etag_changes_with_data(app, client):
+    """
+    GIVEN a Flask test client and the ETag for /event/1
+    WHEN the event table is written to
+    THEN a request with the old ETag should return the full page with a new ETag
+    """
+    etag = client.get("/event/1").headers['ETag']
+    assert client.get("/event/2").headers['ETag'] != etag
+
+    from paralympics import db
+    with app.app_context():
+        db.session.execute(db.text('UPDATE event SET year = year WHERE event_id = 2'))
+        db.session.commit()
+    response = client.get("/event/1", headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_new_quiz_duplicate_name(client, db_session):
+    """
+    GIVEN a Flask test client
+    WHEN two POST requests are made to /quiz with the same quiz name
+    THEN the second should display "already exists"
+    AND there should only be one quiz with the name in the database
+    """
+    form_data = {"quiz_name": "Duplicate Quiz", "close_date": "01/01/2025"}
+    client.post("/quiz", data=form_data, follow_redirects=True)
+    response = client.post("/quiz", data=form_data, follow_redirects=True)
+    assert response.status_code == 200
+    assert 'already exists' in response.data.decode()
+
+    from paralympics.paralympics import Quiz
+    assert db_session.query(Quiz).filter(Quiz.quiz_name == "Duplicate Quiz").count() == 1
+
+
+def test_prediction_team_choices_cached(app, client):
+    """
+    GIVEN the /predict form
+    WHEN it is requested and submitted several times, and then a country is added
+    THEN the teams are only queried again after the write to the country table
+    AND a team that is not in the choices is rejected
+    """
+    from paralympics import db
+    from paralympics.models import Country
+
+    client.get('/predict')
+    team_choices = app.extensions['team_choices']
+    loads = team_choices.loads
+    client.get('/predict')
+    response = client.post('/predict', data={'year': 2030, 'team': 'Atlantis'})
+    assert 'Not a valid choice' in response.data.decode()
+    assert team_choices.loads == loads
+
+    with app.app_context():
+        db.session.add(Country(code='ATL', name='Atlantis', member_type='country'))
+        db.session.commit()
+    try:
+        assert '<option value="Atlantis">' in client.get('/predict').data.decode()
+        assert team_choices.loads == loads + 1
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Country, 'ATL'))
+            db.session.commit()
@@ -0,0 +1,103 @@
+import pytest
+
+from paralympics_sq3 import create_app
+from paralympics_sq3.db import init_db
+
+
+@pytest.fixture(scope='module')
+def sq3_client(tmp_path_factory):
+    """Fixture that creates the sqlite3 version of the app with a new database in a temporary folder."""
+    db_path = tmp_path_factory.mktemp('sq3') / 'paralympics.sqlite'
+    app = create_app(test_config={
+        "TESTING": True,
+        "DATABASE": str(db_path),
+        "WTF_CSRF_ENABLED": False
+    })
+    with app.app_context():
+        init_db()
+    return app.test_client()
+
+
+def test_sq3_index_uses_fragment_cache(sq3_client):
+    """
+    GIVEN a Flask test client for the sqlite3 app
+    WHEN a request is made to / twice
+    THEN both responses should be the same list of events
+    AND the second should be a hit in the rendered page cache
+    """
+    first = sq3_client.get("/")
+    assert first.status_code == 200
+    assert 'Winter' in first.data.decode()
+
+    hits = sq3_client.get("/cache/stats").json['hits']
+    second = sq3_client.get("/")
+    assert second.data == first.data
+    assert sq3_client.get("/cache/stats").json['hits'] == hits + 1
+
+
+def test_sq3_new_quiz_duplicate_name(sq3_client):
+    """
+    GIVEN a Flask test client for the sqlite3 app
+    WHEN two POST requests are made to /quiz with the same quiz name
+    THEN the first should add the quiz and the second should display "already exists"
+    """
+    form_data = {"quiz_name": "Duplicate Quiz", "close_date": "01/01/2025"}
+    response = sq3_client.post("/quiz", data=form_data, follow_redirects=True)
+    assert 'Quiz added!' in response.data.decode()
+    response = sq3_client.post("/quiz", data=form_data, follow_redirects=True)
+    assert 'already exists' in response.data.decode()
+
+
+def test_sq3_prediction_form_team_choices(sq3_client):
+    """
+    GIVEN the sqlite3 app
+    WHEN the PredictionForm choices are set for two requests
+    THEN the teams are read from the database once and a submitted team is checked against them
+    """
+    from paralympics_sq3.forms import PredictionForm
+
+    app = sq3_client.application
+    with app.test_request_context('/predict', method='POST', data={'year': 2030, 'team': 'Germany'}):
+        form = PredictionForm().set_choices()
+        assert ('Germany', 'Germany') in form.team.choices
+        assert form.validate()
+    with app.test_request_context('/predict', method='POST', data={'year': 2030, 'team': 'Atlantis'}):
+        form = PredictionForm().set_choices()
+        assert not form.validate() and form.team.errors == ['Not a valid choice.']
+    assert app.extensions['team_choices'].loads == 1
+
+
+def test_sq3_caches_invalidated_by_writes(sq3_client):
+    """
+    GIVEN the sqlite3 app with the home page and the team choices cached
+    WHEN the host and country tables are written to with the app's sqlite3 connection
+    THEN the next request shows the new host name
+    AND the team choices are read again and include the new country
+    """
+    from paralympics_sq3.db import get_db
+    from paralympics_sq3.forms import PredictionForm
+
+    app = sq3_client.application
+    assert 'Test Host City' not in sq3_client.get("/").data.decode()
+    with app.test_request_context():
+        PredictionForm().set_choices()
+    loads = app.extensions['team_choices'].loads
+
+    with app.app_context():
+        db = get_db()
+        old_name = db.execute("SELECT host FROM host WHERE host_id = 1").fetchone()['host']
+        db.execute("UPDATE host SET host = 'Test Host City' WHERE host_id = 1")
+        db.execute("INSERT INTO country (code, name, member_type) VALUES ('ATL', 'Atlantis', 'member')")
+        db.commit()
+    try:
+        assert 'Test Host City' in sq3_client.get("/").data.decode()
+        with app.test_request_context('/predict', method='POST', data={'year': 2030, 'team': 'Atlantis'}):
+            form = PredictionForm().set_choices()
+            assert ('Atlantis', 'Atlantis') in form.team.choices
+        assert app.extensions['team_choices'].loads == loads + 1
+    finally:
+        with app.app_context():
+            db = get_db()
+            db.execute("UPDATE host SET host = ? WHERE host_id = 1", (old_name,))
+            db.execute("DELETE FROM country WHERE code = 'ATL'")
+            db.commit()
@@ -0,0 +1,145 @@
+import io
+import json
+
+from paralympics import db
+from paralympics.models import AnswerChoice, Event, Question, Quiz, QuizQuestion
+
+
+def quiz_questions(app, quiz_name):
+    """Returns {question: [(choice_text, is_correct), ...]} for the questions linked to a quiz."""
+    with app.app_context():
+        rows = db.session.execute(
+            db.select(Question.question, AnswerChoice.choice_text, AnswerChoice.is_correct)
+            .join(QuizQuestion, QuizQuestion.question_id == Question.question_id)
+            .join(Quiz, Quiz.quiz_id == QuizQuestion.quiz_id)
+            .outerjoin(AnswerChoice, AnswerChoice.question_id == Question.question_id)
+            .where(Quiz.quiz_name == quiz_name)
+            .order_by(Question.question_id, AnswerChoice.ac_id)).all()
+    questions = {}
+    for question, text, correct in rows:
+        questions.setdefault(question, []).append((text, correct))
+    return questions
+
+
+def test_import_ndjson_upload(app, client):
+    """
+    GIVEN an NDJSON file with valid questions and one invalid line
+    WHEN it is uploaded to /api/quiz/import with a batch size smaller than the file
+    THEN the valid questions, choices and quiz links are added and the invalid line is reported
+    """
+    lines = [json.dumps({'quiz': 'Import test NDJSON', 'question': f'Question {i}?',
+                         'choices': [{'text': 'Yes', 'correct': True}, {'text': 'No'}]}) for i in range(5)]
+    lines.insert(2, '{"quiz": "Import test NDJSON"}')
+    data = {'file': (io.BytesIO('\n'.join(lines).encode()), 'questions.ndjson')}
+    response = client.post('/api/quiz/import?batch_size=2', data=data, content_type='multipart/form-data')
+    report = response.json
+    assert response.status_code == 200
+    assert (report['rows'], report['questions'], report['choices'], report['quiz_links']) == (6, 5, 10, 5)
+    assert report['quizzes'] == 1
+    assert report['errors'] == 1 and report['error_details'][0]['line'] == 3
+    questions = quiz_questions(app, 'Import test NDJSON')
+    assert len(questions) == 5
+    assert questions['Question 0?'] == [('Yes', 1), ('No', 0)]
+
+
+def test_import_csv_body(app, client):
+    """
+    GIVEN a CSV request body for an existing quiz and a new quiz
+    WHEN it is posted to /api/quiz/import as text/csv
+    THEN the questions are linked to the right quiz with the correct answer marked
+    """
+    body = ('quiz,question,event_id,choices,correct\n'
+            'Import test CSV,Where were the 2012 games held?,,London|Beijing|Rio,1\n'
+            'Import test CSV 2,How often are the games held?,,Every 2 years|Every 4 years,2\n')
+    response = client.post('/api/quiz/import', data=body, content_type='text/csv')
+    assert response.json['questions'] == 2 and response.json['errors'] == 0
+    assert quiz_questions(app, 'Import test CSV') == {
+        'Where were the 2012 games held?': [('London', 1), ('Beijing', 0), ('Rio', 0)]}
+    assert quiz_questions(app, 'Import test CSV 2')['How often are the games held?'][1] == ('Every 4 years', 1)
+
+
+def test_import_unsupported_content_type(client):
+    """
+    GIVEN a request body that is not NDJSON or CSV
+    WHEN it is posted to /api/quiz/import
+    THEN the response is 415 and nothing is imported
+    """
+    response = client.post('/api/quiz/import', json={'quiz': 'x'})
+    assert response.status_code == 415
+
+
+def test_import_questions_command(app, tmp_path):
+    """
+    GIVEN an NDJSON file
+    WHEN the import-questions command is run
+    THEN the questions are imported and the throughput is reported
+    """
+    path = tmp_path / 'questions.ndjson'
+    path.write_text('\n'.join(json.dumps({'quiz': 'Import test CLI', 'question': f'CLI question {i}?'})
+                              for i in range(3)))
+    result = app.test_cli_runner().invoke(args=['import-questions', str(path), '--batch-size', '2'])
+    assert result.exit_code == 0
+    assert 'Imported 3 questions' in result.output and 'rows/s' in result.output
+    assert len(quiz_questions(app, 'Import test CLI')) == 3
+
+
+def test_import_reports_bad_lines_in_later_batches(app, client):
+    """
+    GIVEN an NDJSON file where lines in the second and third batches have values of the wrong type or too large
+    WHEN it is uploaded to /api/quiz/import
+    THEN the status code is 200 and every other question is imported
+    AND each bad line is reported as an error without the SQL
+    """
+    lines = [json.dumps({'quiz': 'Import test bad types', 'question': f'Bad types question {i}?',
+                         'choices': [{'text': 'Yes', 'value': 1}]}) for i in range(8)]
+    lines[3] = json.dumps({'quiz': 'Import test bad types', 'question': 'Dict text?', 'choices': [{'text': {'x': 1}}]})
+    lines[4] = json.dumps({'quiz': ['Import test bad types'], 'question': 'List quiz?'})
+    lines[5] = json.dumps({'quiz': 'Import test bad types', 'question': 'Bad value?',
+                           'choices': [{'text': 'A', 'value': 'a'}]})
+    lines[6] = json.dumps({'quiz': 'Import test bad types', 'question': 'Huge event?', 'event_id': 2 ** 70})
+    data = {'file': (io.BytesIO('\n'.join(lines).encode()), 'questions.ndjson')}
+    response = client.post('/api/quiz/import?batch_size=3', data=data, content_type='multipart/form-data')
+    report = response.json
+    assert response.status_code == 200
+    assert (report['rows'], report['questions'], report['errors']) == (8, 4, 4)
+    assert [error['line'] for error in report['error_details']] == [4, 5, 6, 7]
+    assert not any('INSERT' in error['error'] for error in report['error_details'])
+    assert len(quiz_questions(app, 'Import test bad types')) == 4
+
+
+def test_import_reports_unknown_event_ids(app, client):
+    """
+    GIVEN an NDJSON file where one question has an event_id that is not in the event table
+    WHEN it is uploaded to /api/quiz/import
+    THEN that line is reported as an error and the questions with an existing or no event_id are imported
+    """
+    with app.app_context():
+        event_id = db.session.scalars(db.select(Event.event_id)).first()
+        missing_id = db.session.scalar(db.select(db.func.max(Event.event_id))) + 1000
+    lines = [json.dumps({'quiz': 'Import test events', 'question': 'Existing event?', 'event_id': event_id}),
+             json.dumps({'quiz': 'Import test events', 'question': 'Missing event?', 'event_id': missing_id}),
+             json.dumps({'quiz': 'Import test events', 'question': 'No event?'})]
+    data = {'file': (io.BytesIO('\n'.join(lines).encode()), 'questions.ndjson')}
+    report = client.post('/api/quiz/import', data=data, content_type='multipart/form-data').json
+    assert (report['questions'], report['errors']) == (2, 1)
+    assert report['error_details'] == [{'line': 2, 'error': f'event_id {missing_id} is not in the event table'}]
+    assert set(quiz_questions(app, 'Import test events')) == {'Existing event?', 'No event?'}
+
+
+def test_import_batch_size_is_limited(client, monkeypatch):
+    """
+    GIVEN a batch_size larger than MAX_BATCH_SIZE
+    WHEN a file is posted to /api/quiz/import
+    THEN the questions are imported in batches of MAX_BATCH_SIZE
+    """
+    import paralympics.paralympics
+    from paralympics.quiz_import import MAX_BATCH_SIZE
+    batch_sizes = []
+
+    def record_batch_size(stream, file_format, batch_size):
+        batch_sizes.append(batch_size)
+        return {}
+
+    monkeypatch.setattr(paralympics.paralympics, 'import_questions', record_batch_size)
+    client.post(f'/api/quiz/import?batch_size={10 ** 9}', data='quiz,question\n', content_type='text/csv')
+    assert batch_sizes == [MAX_BATCH_SIZE]
@@ -0,0 +1,80 @@
+import random
+
+import pytest
+from paralympics import db
+from paralympics.models import Quiz, QuizSummary, StudentResponse
+from paralympics.quiz_summary import TOP_SCORES, rebuild_summaries
+from paralympics.response_writer import ResponseWriter
+
+
+@pytest.fixture(scope='module')
+def scored_quiz(app):
+    """Adds a quiz with 120 responses written in batches of 25 and returns its quiz_id and the responses."""
+    rng = random.Random(19)
+    with app.app_context():
+        quiz = Quiz(quiz_name='Quiz summary test')
+        db.session.add(quiz)
+        db.session.commit()
+        rows = [{'student_email': f'student{i}@ucl.ac.uk', 'score': rng.randint(0, 20), 'quiz_id': quiz.quiz_id}
+                for i in range(120)]
+        rows.append({'student_email': 'unscored@ucl.ac.uk', 'score': None, 'quiz_id': quiz.quiz_id})
+        writer = ResponseWriter(db.engine, batch_size=25)
+        response_ids = [future.result(5) for future in [writer.submit_async(row) for row in rows]]
+        writer.close()
+        return quiz.quiz_id, list(zip(response_ids, rows))
+
+
+def test_quiz_stats(client, scored_quiz):
+    """
+    GIVEN responses written by the ResponseWriter
+    WHEN /api/quiz/<quiz_id>/stats is requested
+    THEN the stats match the responses
+    """
+    quiz_id, responses = scored_quiz
+    scores = [row['score'] for response_id, row in responses if row['score'] is not None]
+    stats = client.get(f'/api/quiz/{quiz_id}/stats').json
+    assert (stats['responses'], stats['scored']) == (121, 120)
+    assert stats['mean'] == pytest.approx(sum(scores) / len(scores))
+    assert (stats['min'], stats['max']) == (min(scores), max(scores))
+    assert {b['from']: b['count'] for b in stats['histogram']} == {s: scores.count(s) for s in set(scores)}
+
+
+def test_quiz_top_scores(client, scored_quiz):
+    """
+    GIVEN responses written in several batches
+    WHEN /api/quiz/<quiz_id>/top is requested
+    THEN the highest scores across all batches are returned, earliest response first for equal scores
+    """
+    quiz_id, responses = scored_quiz
+    expected = sorted(((-row['score'], response_id) for response_id, row in responses if row['score'] is not None))
+    top = client.get(f'/api/quiz/{quiz_id}/top').json['top']
+    assert [(-t['score'], t['response_id']) for t in top] == expected[:TOP_SCORES]
+    assert len(client.get(f'/api/quiz/{quiz_id}/top?n=3').json['top']) == 3
+    assert client.get(f'/api/quiz/{quiz_id}/top?n={TOP_SCORES + 1}').status_code == 400
+
+
+def test_quiz_stats_no_responses(client):
+    """
+    GIVEN a quiz with no responses
+    WHEN its stats are requested
+    THEN the response is 404
+    """
+    assert client.get('/api/quiz/999999/stats').status_code == 404
+
+
+def test_rebuild_quiz_summaries(app, scored_quiz):
+    """
+    GIVEN summaries kept up to date by the ResponseWriter
+    WHEN they are rebuilt, and then rebuilt again after a response is added without the ResponseWriter
+    THEN the first rebuild changes nothing and the second fixes the out of date quiz
+    """
+    quiz_id, responses = scored_quiz
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['rebuild-quiz-summaries'])
+    assert 'they were all up to date' in result.output
+
+    with app.app_context():
+        db.session.add(StudentResponse(student_email='direct@ucl.ac.uk', score=20, quiz_id=quiz_id))
+        db.session.commit()
+        assert rebuild_summaries() == {quiz_id}
+        assert db.session.get(QuizSummary, quiz_id).response_count == 122
@@ -0,0 +1,88 @@
+import os
+import uuid
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from paralympics import create_app, db
+
+
+@pytest.fixture()
+def read_only_app(app, tmp_path):
+    """Fixture that creates an app with a read-only engine, using a copy of the seeded test database."""
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    read_only_app = create_app(test_config={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / 'paralympics.db'),
+        "DATABASE_SNAPSHOT": snapshot,
+        "SQLALCHEMY_READ_ONLY_ENGINE": True,
+        "SQLITE_PROFILE": "production",
+        "WTF_CSRF_ENABLED": False
+    })
+    yield read_only_app
+    with read_only_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    read_only_app.extensions['read_engine'].dispose()
+
+
+def test_get_requests_use_read_engine(read_only_app):
+    """
+    GIVEN an app with a read-only engine
+    WHEN a GET request is made to / and a quiz is added with a POST request to /quiz
+    THEN the GET request should run its query on the read-only engine
+    AND the quiz should be written using the main engine
+    """
+    statements = []
+    read_engine = read_only_app.extensions['read_engine']
+    event.listen(read_engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+
+    client = read_only_app.test_client()
+    assert client.get("/").status_code == 200
+    assert any('FROM event' in statement for statement in statements)
+
+    response = client.post("/quiz", data={"quiz_name": "Read engine quiz"}, follow_redirects=True)
+    assert 'Quiz added!' in response.data.decode()
+    assert not any('INSERT' in statement for statement in statements)
+
+
+def test_read_engine_cannot_write(read_only_app):
+    """
+    GIVEN an app with a read-only engine
+    WHEN a write is attempted on the read-only engine
+    THEN SQLite should refuse it
+    """
+    with read_only_app.extensions['read_engine'].connect() as conn:
+        with pytest.raises(OperationalError, match='readonly'):
+            conn.execute(text("INSERT INTO quiz (quiz_name) VALUES ('Not allowed')"))
+
+
+def test_read_engine_opens_same_file_for_relative_uri(app):
+    """
+    GIVEN a database URI with a relative path
+    WHEN an app is created with a read-only engine
+    THEN the read-only engine should open the same file as the main engine, in the instance folder
+    """
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    db_name = f'read-engine-test-{uuid.uuid4().hex}.db'
+    read_only_app = create_app(test_config={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_name,
+        "DATABASE_SNAPSHOT": snapshot,
+        "SQLALCHEMY_READ_ONLY_ENGINE": True,
+    })
+    db_path = os.path.join(read_only_app.instance_path, db_name)
+    read_engine = read_only_app.extensions['read_engine']
+    try:
+        with read_only_app.app_context():
+            assert db.engine.url.database == db_path
+        with read_engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM event")).scalar() == 32
+        assert read_only_app.test_client().get("/").status_code == 200
+    finally:
+        with read_only_app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        read_engine.dispose()
+        os.unlink(db_path)
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import threading
+
+import pytest
+from paralympics import db
+from paralympics.models import Quiz, StudentResponse
+from paralympics.response_writer import ResponseWriter
+from sqlalchemy.exc import IntegrityError
+
+
+@pytest.fixture(scope='module')
+def quiz_id(app):
+    with app.app_context():
+        quiz = Quiz(quiz_name='Response writer test')
+        db.session.add(quiz)
+        db.session.commit()
+        return quiz.quiz_id
+
+
+def test_submit_response(app, client, quiz_id):
+    """
+    GIVEN a quiz
+    WHEN a response is posted to /api/quiz/<quiz_id>/responses
+    THEN the response is 201 with the response_id of the row, which has already been committed
+    """
+    response = client.post(f'/api/quiz/{quiz_id}/responses', json={'student_email': 'a@ucl.ac.uk', 'score': 7})
+    assert response.status_code == 201
+    with app.app_context():
+        row = db.session.get(StudentResponse, response.json['response_id'])
+        assert (row.student_email, row.score, row.quiz_id) == ('a@ucl.ac.uk', 7, quiz_id)
+
+
+@pytest.mark.parametrize('url_quiz_id, body, status', [
+    (None, {'student_email': 'a@ucl.ac.uk', 'score': 'seven'}, 400),
+    (None, {'student_email': 'not an email', 'score': 7}, 400),
+    (999999, {'student_email': 'a@ucl.ac.uk', 'score': 7}, 404),
+])
+def test_submit_invalid_response(client, quiz_id, url_quiz_id, body, status):
+    """
+    GIVEN an invalid score or email, or a quiz that does not exist
+    WHEN the response is posted
+    THEN the request is rejected before anything is queued
+    """
+    response = client.post(f'/api/quiz/{url_quiz_id or quiz_id}/responses', json=body)
+    assert response.status_code == status
+
+
+def test_concurrent_submissions_are_grouped(app, quiz_id):
+    """
+    GIVEN a ResponseWriter
+    WHEN many threads submit responses at the same time
+    THEN every submission gets its own committed row and they are written in fewer transactions than rows
+    """
+    with app.app_context():
+        writer = ResponseWriter(db.engine, batch_size=50, batch_wait=0.01)
+        rows = [{'student_email': f'student{i}@ucl.ac.uk', 'score': i, 'quiz_id': quiz_id} for i in range(200)]
+        with ThreadPoolExecutor(40) as executor:
+            response_ids = list(executor.map(writer.submit, rows))
+        writer.close()
+
+        assert len(set(response_ids)) == 200
+        stats = writer.stats()
+        assert stats['rows'] == 200 and stats['batches'] < 200 and stats['largest_batch'] <= 50
+        saved = db.session.execute(db.select(StudentResponse.response_id, StudentResponse.score)
+                                   .where(StudentResponse.response_id.in_(response_ids))).tuples().all()
+        assert dict(saved) == dict(zip(response_ids, range(200)))
+
+
+def test_failed_row_only_fails_its_caller(app, quiz_id):
+    """
+    GIVEN a ResponseWriter
+    WHEN a batch cannot be written because of one bad row
+    THEN only the caller of the bad row gets the exception and the other rows in the batch are saved
+    """
+    with app.app_context():
+        writer = ResponseWriter(db.engine, batch_wait=0.05)
+        futures = [writer.submit_async({'student_email': 'ok@ucl.ac.uk', 'score': 1, 'quiz_id': quiz_id}),
+                   writer.submit_async({'student_email': None, 'score': 1, 'quiz_id': quiz_id}),
+                   writer.submit_async({'student_email': 'ok2@ucl.ac.uk', 'score': 2, 'quiz_id': quiz_id})]
+        with pytest.raises(IntegrityError):
+            futures[1].result(5)
+        response_ids = [futures[0].result(5), futures[2].result(5)]
+        writer.close()
+        assert writer.stats()['errors'] == 1 and writer.stats()['rows'] == 2
+        saved = db.session.execute(db.select(StudentResponse.student_email)
+                                   .where(StudentResponse.response_id.in_(response_ids))).scalars().all()
+        assert sorted(saved) == ['ok2@ucl.ac.uk', 'ok@ucl.ac.uk']
+
+
+def test_timed_out_submission_is_not_written(app, quiz_id):
+    """
+    GIVEN a ResponseWriter that is busy writing another row
+    WHEN a submission times out while it is still waiting in the queue
+    THEN TimeoutError is raised and the row is never written, so it can be submitted again without a duplicate
+    """
+    with app.app_context():
+        writer = ResponseWriter(db.engine, batch_size=1)
+        write_batch = writer.write_batch
+        release = threading.Event()
+        written = []
+
+        def slow_write_batch(conn, rows):
+            release.wait(5)
+            written.extend(row['student_email'] for row in rows)
+            return write_batch(conn, rows)
+
+        writer.write_batch = slow_write_batch
+        first = writer.submit_async({'student_email': 'first@ucl.ac.uk', 'score': 1, 'quiz_id': quiz_id})
+        with pytest.raises(TimeoutError):
+            writer.submit({'student_email': 'timeout@ucl.ac.uk', 'score': 2, 'quiz_id': quiz_id}, timeout=0.05)
+        release.set()
+        first.result(5)
+        writer.close()
+        assert written == ['first@ucl.ac.uk']
+        assert db.session.execute(db.select(StudentResponse)
+                                  .where(StudentResponse.student_email == 'timeout@ucl.ac.uk')).first() is None
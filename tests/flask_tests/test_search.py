@@ -0,0 +1,61 @@
+from paralympics.models import Question
+from paralympics.search import search
+
+
+def test_search_ranks_events_with_snippets(client):
+    """
+    GIVEN the event highlights
+    WHEN /search is requested with a word in several highlights
+    THEN the matching events are returned best match first, with the word marked in the snippet and a link
+    """
+    response = client.get('/search?q=wheelchair')
+    results = response.json['results']
+    assert response.status_code == 200 and results
+    assert [r['score'] for r in results] == sorted(r['score'] for r in results)
+    assert all(r['kind'] == 'event' and '<mark>' in r['snippet'] for r in results)
+    assert results[0]['url'] == f"/event/{results[0]['id']}"
+
+
+def test_search_hosts_and_query_syntax(client):
+    """
+    GIVEN the host names
+    WHEN /search is requested with a host name, a prefix, or text with FTS5 query syntax
+    THEN the host is found by its name or prefix and the query syntax is ignored rather than causing an error
+    """
+    for q in ('Tokyo', 'toky', '"Tokyo(*'):
+        results = client.get('/search', query_string={'q': q}).json['results']
+        assert ('host', 'Tokyo') in [(r['kind'], r['title']) for r in results]
+    assert client.get('/search?q=').json['results'] == []
+
+
+def test_search_host_snippet_from_title(client):
+    """
+    GIVEN a host, which has its name in the title column and an empty body
+    WHEN /search is requested with the host name
+    THEN the host's snippet is taken from the title with the name marked
+    """
+    results = client.get('/search?q=london').json['results']
+    hosts = [r for r in results if r['kind'] == 'host']
+    assert hosts and all(r['snippet'] == '<mark>London</mark>' for r in hosts)
+
+
+def test_search_index_follows_question_changes(db_session):
+    """
+    GIVEN a new quiz question
+    WHEN it is added, changed and deleted
+    THEN the triggers update the search index in the same transaction
+    """
+    question = Question(question='Which sport is played with a goalball bell?')
+    db_session.add(question)
+    db_session.flush()
+    assert [(r['kind'], r['id']) for r in search(db_session, 'bell')] == [('question', question.question_id)]
+    assert search(db_session, 'bell')[0]['snippet'].endswith('goalball <mark>bell</mark>?')
+
+    question.question = 'Which sport uses a ball with a rattle inside?'
+    db_session.flush()
+    assert search(db_session, 'bell') == []
+    assert search(db_session, 'rattle')[0]['id'] == question.question_id
+
+    db_session.delete(question)
+    db_session.flush()
+    assert search(db_session, 'rattle') == []
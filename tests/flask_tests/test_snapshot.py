@@ -0,0 +1,74 @@
+import os
+import uuid
+
+from paralympics import create_app, db
+from paralympics.models import Event
+
+
+def test_create_app_from_snapshot_skips_seed(app, tmp_path, monkeypatch):
+    """
+    GIVEN the seeded test database to use as a snapshot
+    WHEN an app is created with DATABASE_SNAPSHOT set and no existing database
+    THEN the database should be cloned from the snapshot
+    AND the tables should not be created or seeded
+    """
+    def fail(*args, **kwargs):
+        raise AssertionError('The schema and seed should be skipped in snapshot mode')
+
+    import paralympics.add_data
+    monkeypatch.setattr(db, 'create_all', fail)
+    monkeypatch.setattr(paralympics.add_data, 'add_all_data', fail)
+
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    db_path = tmp_path / 'paralympics.db'
+    snapshot_app = create_app(test_config={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(db_path),
+        "DATABASE_SNAPSHOT": snapshot,
+    })
+
+    assert db_path.exists()
+    with snapshot_app.app_context():
+        assert db.session.execute(db.select(db.func.count()).select_from(Event)).scalar() == 32
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_clone_database_does_not_replace_existing(app, tmp_path):
+    """
+    GIVEN a database file that already exists
+    WHEN clone_database is called for it
+    THEN it should return False and leave the existing file unchanged
+    """
+    from paralympics.snapshot import clone_database
+    target = tmp_path / 'existing.db'
+    target.write_bytes(b'existing')
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    assert clone_database(snapshot, str(target)) is False
+    assert target.read_bytes() == b'existing'
+
+
+def test_create_app_from_snapshot_with_relative_uri(app):
+    """
+    GIVEN the seeded test database to use as a snapshot
+    WHEN an app is created with DATABASE_SNAPSHOT set and a database URI with a relative path
+    THEN the snapshot should be cloned into the instance folder, where Flask-SQLAlchemy opens the database
+    """
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    db_name = f'snapshot-test-{uuid.uuid4().hex}.db'
+    snapshot_app = create_app(test_config={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_name,
+        "DATABASE_SNAPSHOT": snapshot,
+    })
+    db_path = os.path.join(snapshot_app.instance_path, db_name)
+    try:
+        assert os.path.exists(db_path)
+        assert not os.path.exists(db_name)
+        with snapshot_app.app_context():
+            assert db.engine.url.database == db_path
+            assert db.session.execute(db.select(db.func.count()).select_from(Event)).scalar() == 32
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        os.unlink(db_path)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from paralympics import create_app, db
+from paralympics.models import Quiz
+
+
+def profile_app(app, tmp_path, profile):
+    """Creates an app with its own copy of the seeded test database using the SQLite profile."""
+    snapshot = app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    return create_app(test_config={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / f'{profile}.db'),
+        "DATABASE_SNAPSHOT": snapshot,
+        "SQLITE_PROFILE": profile,
+    })
+
+
+def test_production_profile_pragmas(app, tmp_path):
+    """
+    GIVEN an app with SQLITE_PROFILE set to 'production'
+    WHEN a connection is opened
+    THEN the connection should use WAL, NORMAL sync and the busy timeout
+    """
+    production_app = profile_app(app, tmp_path, 'production')
+    with production_app.app_context():
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert db.session.execute(text('PRAGMA synchronous')).scalar() == 1
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() == 5000
+        db.session.remove()
+        db.engine.dispose()
+
+
+def run_reads_during_writes(test_app, seconds=1.0):
+    """Runs the index query repeatedly while another thread commits quizzes one at a time.
+
+    Returns:
+    (reads, max_read_seconds, errors)
+    """
+    stop = threading.Event()
+    errors = []
+
+    def write():
+        with test_app.app_context():
+            i = 0
+            while not stop.is_set():
+                try:
+                    db.session.add(Quiz(quiz_name=f'Concurrent quiz {i}'))
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+                i += 1
+            db.session.remove()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    reads = 0
+    max_read = 0
+    query = text("SELECT event.event_id, event.type, event.year, host.host FROM event "
+                 "JOIN host_event ON event.event_id = host_event.event_id "
+                 "JOIN host ON host_event.host_id = host.host_id ORDER BY event.type, event.year")
+    with test_app.app_context():
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            try:
+                with db.engine.connect() as conn:
+                    assert len(conn.execute(query).all()) > 0
+            except Exception as e:
+                errors.append(e)
+            max_read = max(max_read, time.perf_counter() - start)
+            reads += 1
+        stop.set()
+        writer.join()
+        db.session.remove()
+        db.engine.dispose()
+    return reads, max_read, errors
+
+
+@pytest.mark.parametrize('profile', ['default', 'production'])
+def test_reads_during_writes(app, tmp_path, profile):
+    """
+    GIVEN an app using the SQLite profile
+    WHEN the events are read while another thread is continually committing writes
+    THEN the reads should succeed
+    """
+    reads, max_read, errors = run_reads_during_writes(profile_app(app, tmp_path, profile))
+    assert not errors
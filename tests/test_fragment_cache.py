@@ -0,0 +1,32 @@
+from paralympics.fragment_cache import FragmentCache
+
+
+def test_fragment_cache_evicts_least_recently_used():
+    """
+    GIVEN a FragmentCache with room for two 10 byte entries
+    WHEN three entries are added after the first has been read again
+    THEN the least recently used entry should be removed
+    AND the size should not exceed the limit
+    """
+    cache = FragmentCache(max_bytes=20)
+    cache.set('a', 'a' * 10)
+    cache.set('b', 'b' * 10)
+    assert cache.get('a') == 'a' * 10
+    cache.set('c', 'c' * 10)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a' * 10
+    assert cache.get('c') == 'c' * 10
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'entries': 2, 'size_bytes': 20, 'max_bytes': 20}
+
+
+def test_fragment_cache_ignores_entries_larger_than_limit():
+    """
+    GIVEN a FragmentCache with a limit of 5 bytes
+    WHEN an entry larger than the limit is added
+    THEN it should not be cached
+    """
+    cache = FragmentCache(max_bytes=5)
+    cache.set('a', 'a' * 10)
+    assert cache.get('a') is None
+    assert cache.size == 0
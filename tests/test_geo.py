@@ -0,0 +1,58 @@
+import random
+
+from paralympics.geo import HostIndex, haversine_km
+
+
+def random_hosts(count, seed=24):
+    rng = random.Random(seed)
+    return [{'host_id': i, 'host': f'City {i}', 'country_code': 'XXX', 'events': [],
+             'latitude': rng.uniform(-90, 90), 'longitude': rng.uniform(-180, 180)} for i in range(count)]
+
+
+def test_host_index_matches_brute_force():
+    """
+    GIVEN a HostIndex of random points
+    WHEN the nearest hosts and the hosts within a radius of other random points are found
+    THEN the results match comparing the distance to every point, including across the 180 degree meridian
+    """
+    hosts = random_hosts(500)
+    index = HostIndex(hosts)
+    rng = random.Random(1)
+    for lat, lon in [(0, 179.9), (89, 0)] + [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(50)]:
+        by_distance = sorted(hosts, key=lambda host: haversine_km(lat, lon, host['latitude'], host['longitude']))
+        assert [host['host_id'] for host in index.nearest(lat, lon, 7)] == [host['host_id'] for host in by_distance[:7]]
+
+        within = [host['host_id'] for host in by_distance
+                  if haversine_km(lat, lon, host['latitude'], host['longitude']) <= 1500]
+        assert [host['host_id'] for host in index.within(lat, lon, 1500)] == within
+
+
+def test_host_index_skips_hosts_without_coordinates():
+    """
+    GIVEN hosts where one has no coordinates
+    WHEN the HostIndex is built
+    THEN the host is left out of the searches and the GeoJSON
+    """
+    hosts = random_hosts(3)
+    hosts[0]['latitude'] = None
+    index = HostIndex(hosts)
+    assert 0 not in [host['host_id'] for host in index.nearest(0, 0, 3)]
+    assert '"id":0' not in index.geojson
+
+
+def test_host_index_from_text_coordinates():
+    """
+    GIVEN hosts with the coordinates stored as text, as in a database created from the workbook, and one that is not a
+    number
+    WHEN the HostIndex is built
+    THEN the coordinates are converted to numbers and the host that is not a number is left out
+    """
+    hosts = random_hosts(3)
+    for host in hosts:
+        host['latitude'], host['longitude'] = str(host['latitude']), str(host['longitude'])
+    hosts[2]['longitude'] = 'unknown'
+    index = HostIndex(hosts)
+    nearest = index.nearest(float(hosts[0]['latitude']), float(hosts[0]['longitude']), 3)
+    assert [host['host_id'] for host in nearest] == [0, 1] and nearest[0]['distance_km'] == 0
+    assert isinstance(nearest[0]['latitude'], float)
+    assert '"id":2' not in index.geojson
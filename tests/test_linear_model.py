@@ -0,0 +1,45 @@
+import importlib.resources
+import json
+
+import joblib
+import pandas as pd
+import pytest
+
+from paralympics.linear_model import LinearPredictor, export_coefficients
+
+
+@pytest.mark.parametrize('package', ['data', 'paralympics_sq3'])
+def test_linear_predictor_matches_pipeline(package, tmp_path):
+    """
+    GIVEN the trained pipeline in model.pkl and the exported model_coefficients.json
+    WHEN predictions are made for every team the model was trained with across several years
+    THEN the LinearPredictor should give the same predictions as the pipeline
+    AND the shipped coefficients file should match a fresh export of model.pkl
+    """
+    with importlib.resources.files(package).joinpath('model.pkl').open('rb') as f:
+        pipeline = joblib.load(f)
+    with importlib.resources.files(package).joinpath('model_coefficients.json').open('rb') as f:
+        predictor = LinearPredictor.load(f)
+
+    teams = list(pipeline.named_steps['preprocessor'].named_transformers_['team'].categories_[0])
+    years = [1960, 2000, 2028, 2100]
+    input_data = pd.DataFrame({'Year': [y for t in teams for y in years], 'Team': [t for t in teams for y in years]})
+    expected = pipeline.predict(input_data)
+    actual = [predictor.predict(y, t) for t in teams for y in years]
+    assert actual == pytest.approx(list(expected))
+
+    export_coefficients(pipeline, tmp_path / 'coefficients.json')
+    with importlib.resources.files(package).joinpath('model_coefficients.json').open() as f:
+        assert json.loads((tmp_path / 'coefficients.json').read_text()) == json.load(f)
+
+
+def test_linear_predictor_unknown_team():
+    """
+    GIVEN a LinearPredictor
+    WHEN a prediction is made for a team that is not in the model
+    THEN a ValueError should be raised
+    """
+    predictor = LinearPredictor(1.0, 0.5, {'Germany': 2.0})
+    assert predictor.predict(2000, 'Germany') == 1003.0
+    with pytest.raises(ValueError):
+        predictor.predict(2000, 'Invalid')
@@ -0,0 +1,36 @@
+import os
+import shutil
+
+import joblib
+
+from paralympics.model_registry import ModelRegistry
+
+
+def test_model_registry_loads_once_and_reloads_on_change(tmp_path):
+    """
+    GIVEN a ModelRegistry for a copy of model.pkl
+    WHEN the model is requested several times, and again after the file is replaced
+    THEN the file should only be loaded once until it changes
+    AND the new model should be loaded with a new version after it changes
+    """
+    registry = ModelRegistry('data', 'model.pkl')
+    model_file = tmp_path / 'model.pkl'
+    shutil.copy(registry.path, model_file)
+    registry.path = model_file
+
+    model = registry.get()
+    assert registry.get() is model
+    assert registry.loads == 1
+    first_version = registry.metrics()['version']
+
+    # Touching the file without changing the contents does not reload the model
+    os.utime(model_file, ns=(0, 0))
+    assert registry.get() is model
+    assert registry.loads == 1
+
+    # Saving a different model replaces it
+    joblib.dump({'retrained': True}, model_file)
+    os.utime(model_file, ns=(10 ** 9, 10 ** 9))
+    assert registry.get() == {'retrained': True}
+    assert registry.loads == 2
+    assert registry.metrics()['version'] != first_version
@@ -0,0 +1,27 @@
+import shutil
+
+from data.workbook import cache_path, file_hash, read_workbook, workbook_path
+
+
+def test_read_workbook_uses_cache_until_file_changes(tmp_path):
+    """
+    GIVEN a copy of paralympics.xlsx
+    WHEN the workbook is read, and read again after the file has changed
+    THEN the first read should write a cache file for the hash of the workbook
+    AND the second read should replace it with a cache file for the new hash
+    """
+    xlsx = tmp_path / 'paralympics.xlsx'
+    shutil.copy(workbook_path(), xlsx)
+
+    sheets = read_workbook(xlsx)
+    assert {'events', 'medal_standings', 'npc_codes'} <= set(sheets)
+    first_cache = cache_path(xlsx, file_hash(xlsx))
+    assert first_cache.exists()
+    assert read_workbook(xlsx)['events'].equals(sheets['events'])
+
+    # Appending bytes changes the hash, the zip archive can still be read by openpyxl
+    with open(xlsx, 'ab') as f:
+        f.write(b'\0')
+    read_workbook(xlsx)
+    assert not first_cache.exists()
+    assert cache_path(xlsx, file_hash(xlsx)).exists()